@@ -0,0 +1,7 @@
+"""
+Performance benchmarks for the Sway backend.
+
+Every module is runnable on its own against a throwaway test database, for
+example `python -m benchmarks.usernames --rows 1000000`. They print a
+plain table so results can be compared between commits.
+"""
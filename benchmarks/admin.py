@@ -0,0 +1,91 @@
+"""
+User admin changelist page load time against the table size.
+
+Seeds `--rows` users (half vendors, 5% inactive and 1,000 staff), runs
+`ANALYZE` and times the rendered `UserAdmin` changelist unfiltered, with
+each `list_filter`, an email prefix search and a deep page, next to the
+same pages with Django's exact `COUNT(*)` paginator and full result count.
+
+    python -m benchmarks.admin --rows 10000000
+"""
+import argparse
+
+from benchmarks import common
+
+
+STAFF = 1000
+
+PAGES = (
+    ('unfiltered', {}),
+    ('vendors', {'user_type__exact': 'vendor'}),
+    ('inactive', {'is_active__exact': '0'}),
+    ('staff', {'is_staff__exact': '1'}),
+    ('email prefix', {'q': 'vendor12345'}),
+    ('page 100', {'p': '99'}),
+)
+
+
+def seed(rows):
+    from users.models import User
+
+    inactive = rows // 20
+    vendors = rows // 2
+    customers = rows - vendors - inactive - STAFF
+    common.seed_users(customers, prefix='customer')
+    common.seed_users(vendors, prefix='vendor', user_type=User.TYPE_VENDOR)
+    common.seed_users(inactive, prefix='inactive', is_active=False)
+    common.seed_users(STAFF, prefix='staff', is_staff=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    common.setup()
+    from django.core.paginator import Paginator
+    from django.test import Client, override_settings
+    from django.urls import reverse
+    from users.admin import UserAdmin
+    from users.models import User
+
+    url = reverse('admin:users_user_changelist')
+    rows = []
+    with common.benchmark_database() as connection, override_settings(
+            ALLOWED_HOSTS=['testserver'],
+            STATICFILES_STORAGE='django.contrib.staticfiles.storage'
+                                '.StaticFilesStorage'):
+        seed(args.rows)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        client = Client()
+        client.force_login(User.objects.create_superuser(
+            'admin@example.com', 'Password0978'))
+
+        def page_load(params):
+            res = client.get(url, params)
+            assert res.status_code == 200, res.status_code
+
+        def time_pages():
+            timings = {}
+            for name, params in PAGES:
+                page_load(params)  # Warm up the page cache.
+                timings[name] = common.summary(common.timed(
+                    lambda: page_load(params), args.repeat))
+            return timings
+
+        estimated = time_pages()
+        # Django's defaults: exact counts, also of the unfiltered table.
+        UserAdmin.paginator = Paginator
+        UserAdmin.show_full_result_count = True
+        for name, exact in time_pages().items():
+            rows.append((name, estimated[name]['mean'],
+                         estimated[name]['p95'], exact['mean'], exact['p95']))
+
+    common.print_table(
+        ('page', 'estimated ms', 'p95', 'exact count ms', 'p95'), rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Per-request authentication overhead of the DRF authentication stacks.
+
+Resolves `request.user` for JWT, Token and session-cookie requests through
+the original Session/Token/JWT tuple, the same tuple with the cached
+backends and `HeaderDispatchAuthentication`, reporting the time and the
+number of SQL queries per request. The cached backends need a cache shared
+between processes, a file based cache in a temporary directory stands in
+for memcached or Redis.
+
+    python -m benchmarks.authentication --repeat 2000
+"""
+import argparse
+import tempfile
+
+from benchmarks import common
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+
+    common.setup()
+    from django.contrib.auth.middleware import AuthenticationMiddleware
+    from django.contrib.sessions.middleware import SessionMiddleware
+    from django.conf import settings
+    from django.db import connection
+    from django.test import RequestFactory, override_settings
+    from django.test.utils import CaptureQueriesContext
+    from rest_framework.authentication import (
+        SessionAuthentication,
+        TokenAuthentication,
+    )
+    from rest_framework.authtoken.models import Token
+    from rest_framework.request import Request
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.tokens import AccessToken
+    from users.authentication import (
+        CachedJWTAuthentication,
+        CachedTokenAuthentication,
+        HeaderDispatchAuthentication,
+        get_cache,
+    )
+    from users.models import User
+
+    stacks = {
+        'original tuple': (SessionAuthentication, TokenAuthentication,
+                           JWTAuthentication),
+        'cached tuple': (SessionAuthentication, CachedTokenAuthentication,
+                         CachedJWTAuthentication),
+        'header dispatch': (HeaderDispatchAuthentication,),
+    }
+
+    cache_directory = tempfile.TemporaryDirectory()
+    shared_cache = {'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': cache_directory.name,
+    }}
+    with common.benchmark_database(), cache_directory, \
+            override_settings(CACHES=shared_cache):
+        user = User.objects.create_user('bench@example.com', 'Password0978')
+        token = Token.objects.create(user=user)
+        session = SessionMiddleware().SessionStore()
+        session['_auth_user_id'] = str(user.pk)
+        session['_auth_user_backend'] = settings.AUTHENTICATION_BACKENDS[0]
+        session['_auth_user_hash'] = user.get_session_auth_hash()
+        session.save()
+
+        factory = RequestFactory()
+        scenarios = {
+            'jwt': {'HTTP_AUTHORIZATION': f'JWT {AccessToken.for_user(user)}'},
+            'jwt + cookie': {
+                'HTTP_AUTHORIZATION': f'JWT {AccessToken.for_user(user)}',
+                'HTTP_COOKIE': f'{settings.SESSION_COOKIE_NAME}={session.session_key}',
+            },
+            'token': {'HTTP_AUTHORIZATION': f'Token {token.key}'},
+            'cookie': {
+                'HTTP_COOKIE': f'{settings.SESSION_COOKIE_NAME}={session.session_key}',
+            },
+        }
+
+        def authenticate(authenticators, meta):
+            request = factory.get('/api/auth/users/me/', **meta)
+            SessionMiddleware().process_request(request)
+            AuthenticationMiddleware().process_request(request)
+            drf_request = Request(request, authenticators=authenticators)
+            assert drf_request.user.pk == user.pk
+
+        rows = []
+        for scenario, meta in scenarios.items():
+            for name, classes in stacks.items():
+                authenticators = [cls() for cls in classes]
+                get_cache().clear()
+                authenticate(authenticators, meta)
+                with CaptureQueriesContext(connection) as queries:
+                    authenticate(authenticators, meta)
+                timings = common.timed(
+                    lambda: authenticate(authenticators, meta),
+                    repeat=args.repeat)
+                stats = common.summary(timings)
+                rows.append((scenario, name, len(queries),
+                             stats['mean'] * 1000, stats['p95'] * 1000))
+
+    common.print_table(
+        ('request', 'stack', 'queries', 'mean us', 'p95 us'), rows)
+
+
+if __name__ == '__main__':
+    main()
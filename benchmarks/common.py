@@ -0,0 +1,91 @@
+"""Shared setup, seeding and timing helpers for the benchmarks."""
+import os
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+
+
+def setup():
+    """Configure Django for a standalone benchmark run."""
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sway_backend_15594.settings')
+    os.environ.setdefault('SECRET_KEY', 'benchmark')
+    import django
+    django.setup()
+
+
+@contextmanager
+def benchmark_database():
+    """Run the block against a freshly migrated test database."""
+    from django.db import connection
+    from django.test.utils import (
+        setup_test_environment,
+        teardown_test_environment,
+    )
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(
+        verbosity=0, autoclobber=True)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def seed_users(count, start=0, prefix='user', batch_size=10000, **fields):
+    """
+    Bulk insert `count` users named `{prefix}{n}`, bypassing `User.save`
+    and password hashing so millions of rows can be created quickly.
+    """
+    from users.models import User
+
+    for offset in range(start, start + count, batch_size):
+        stop = min(offset + batch_size, start + count)
+        User.objects.bulk_create([
+            User(
+                username=f'{prefix}{n}',
+                email=f'{prefix}{n}@example.com',
+                password='!',
+                **fields
+            )
+            for n in range(offset, stop)
+        ])
+
+
+def timed(func, repeat=100):
+    """Call `func` `repeat` times and return the per-call timings in ms."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def summary(timings):
+    """Mean, p50 and p95 in milliseconds of a list of timings."""
+    ordered = sorted(timings)
+    return {
+        'mean': statistics.mean(ordered),
+        'p50': ordered[len(ordered) // 2],
+        'p95': ordered[int(len(ordered) * 0.95) - 1],
+    }
+
+
+def print_table(header, rows):
+    """Print `rows` of values aligned under `header`."""
+    widths = [
+        max(len(str(header[i])), *(len(format_cell(row[i])) for row in rows))
+        for i in range(len(header))
+    ]
+    print('  '.join(str(h).rjust(w) for h, w in zip(header, widths)))
+    for row in rows:
+        print('  '.join(format_cell(c).rjust(w) for c, w in zip(row, widths)))
+
+
+def format_cell(value):
+    if isinstance(value, float):
+        return f'{value:.3f}'
+    return str(value)
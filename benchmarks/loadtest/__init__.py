@@ -0,0 +1,15 @@
+"""
+Load tests driving the API through waitress.
+
+The app runs against a throwaway database with Authy pointed at
+`FakeAuthyServer` and email delivered to an `SMTPSink`, both local and
+with configurable latency. Each endpoint scenario is hammered by a pool of
+client threads and the latency percentiles and throughput are printed as
+JSON, so results can be compared between commits:
+
+    python -m benchmarks.loadtest --requests 500 --concurrency 16 \\
+        --authy-latency 0.05 --output before.json
+
+SQLite serializes writers; set DATABASE_URL to a PostgreSQL database for
+numbers representative of production.
+"""
@@ -0,0 +1,196 @@
+"""
+Run the load test scenarios and print the results as JSON.
+
+    python -m benchmarks.loadtest --requests 500 --concurrency 16
+"""
+import argparse
+import json
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks import common
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(int(round(fraction * len(ordered))) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            check=True).stdout.decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Client:
+    """Thread-local keep-alive sessions against the waitress server."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.local = threading.local()
+
+    def send(self, request):
+        session = getattr(self.local, 'session', None)
+        if session is None:
+            session = self.local.session = requests.Session()
+        start = time.perf_counter()
+        try:
+            response = session.request(request.method,
+                self.base_url + request.path, json=request.json,
+                headers=request.headers, timeout=60)
+            status = response.status_code
+        except requests.RequestException:
+            status = 'error'
+        return time.perf_counter() - start, status
+
+
+def run_scenario(client, prepared, concurrency, expected):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(client.send, prepared))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency * 1000 for latency, _ in results)
+    statuses = Counter(str(status) for _, status in results)
+    errors = sum(count for status, count in statuses.items()
+                 if status not in expected)
+    return {
+        'requests': len(results),
+        'errors': errors,
+        'status_codes': dict(sorted(statuses.items())),
+        'rps': round(len(results) / elapsed, 2),
+        'latency_ms': {
+            'mean': round(sum(latencies) / len(latencies), 3),
+            'p50': round(percentile(latencies, 0.50), 3),
+            'p95': round(percentile(latencies, 0.95), 3),
+            'p99': round(percentile(latencies, 0.99), 3),
+            'max': round(latencies[-1], 3),
+        },
+    }
+
+
+def drain_email(stop, interval):
+    """Deliver the outbox to the SMTP sink while the scenarios run."""
+    from django.db import close_old_connections
+    from users.mail import drain
+
+    while not stop.wait(interval):
+        drain()
+        close_old_connections()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=200,
+        help='Requests per endpoint.')
+    parser.add_argument('--warmup', type=int, default=10,
+        help='Untimed requests per endpoint sent first.')
+    parser.add_argument('--concurrency', type=int, default=8,
+        help='Client threads sending requests.')
+    parser.add_argument('--threads', type=int, default=8,
+        help='Waitress worker threads.')
+    parser.add_argument('--endpoints', default=None,
+        help='Comma separated scenarios, all of them by default.')
+    parser.add_argument('--authy-latency', type=float, default=0.05,
+        help='Seconds the fake Authy server takes per call.')
+    parser.add_argument('--authy-error-rate', type=float, default=0,
+        help='Share of Authy calls answered with a 503.')
+    parser.add_argument('--authy-dispatch', choices=('background', 'sync'),
+        default='background', help='AUTHY_DISPATCH_MODE of the app.')
+    parser.add_argument('--smtp-latency', type=float, default=0,
+        help='Seconds the SMTP sink takes to accept a message.')
+    parser.add_argument('--output', default=None,
+        help='Write the JSON report to this file instead of stdout.')
+    args = parser.parse_args()
+
+    common.setup()
+    from django.core.wsgi import get_wsgi_application
+    from django.test.utils import override_settings
+    from waitress.server import create_server
+
+    from benchmarks.loadtest.authy import FakeAuthyServer
+    from benchmarks.loadtest.scenarios import SCENARIOS
+    from benchmarks.loadtest.smtp import SMTPSink
+
+    names = args.endpoints.split(',') if args.endpoints else list(SCENARIOS)
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f'Unknown endpoints: {", ".join(sorted(unknown))}')
+
+    report = {
+        'commit': git_commit(),
+        'config': {key: value for key, value in vars(args).items()
+                   if key != 'output'},
+        'endpoints': {},
+    }
+    with common.benchmark_database(), \
+            FakeAuthyServer(latency=args.authy_latency,
+                            error_rate=args.authy_error_rate) as authy, \
+            SMTPSink(latency=args.smtp_latency) as sink:
+        settings = override_settings(
+            ALLOWED_HOSTS=['*'],
+            ACCOUNT_SECURITY_API_KEY='loadtest',
+            AUTHY_API_URI=authy.url,
+            AUTHY_TRANSPORT='',
+            AUTHY_DISPATCH_MODE=args.authy_dispatch,
+            EMAIL_BACKEND='users.mail.OutboxEmailBackend',
+            EMAIL_DELIVERY_BACKEND=(
+                'django.core.mail.backends.smtp.EmailBackend'),
+            EMAIL_HOST=sink.host,
+            EMAIL_PORT=sink.port,
+            EMAIL_HOST_USER='',
+            EMAIL_HOST_PASSWORD='',
+            EMAIL_USE_TLS=False,
+            PERF_LOG_SAMPLE_RATE=0,
+        )
+        settings.enable()
+        server = create_server(get_wsgi_application(), host='127.0.0.1',
+            port=0, threads=args.threads)
+        server_thread = threading.Thread(target=server.run, daemon=True)
+        server_thread.start()
+        stop = threading.Event()
+        drainer = threading.Thread(target=drain_email, args=(stop, 0.2),
+            daemon=True)
+        drainer.start()
+        client = Client(f'http://127.0.0.1:{server.effective_port}')
+        try:
+            for name in names:
+                prepare = SCENARIOS[name]
+                for request in prepare(args.warmup):
+                    client.send(request)
+                prepared = prepare(args.requests)
+                expected = {'200', '201', '204'}
+                result = run_scenario(client, prepared, args.concurrency,
+                    expected)
+                report['endpoints'][name] = result
+                print(f'{name}: {result["rps"]} req/s, '
+                      f'p95 {result["latency_ms"]["p95"]} ms, '
+                      f'{result["errors"]} errors', file=sys.stderr)
+        finally:
+            stop.set()
+            drainer.join()
+            server.close()
+            settings.disable()
+        report['authy_calls'] = len(authy.requests)
+        report['emails_delivered'] = len(sink.messages)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as stream:
+            stream.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Local HTTP server answering the Authy API calls the app makes."""
+import http.server
+import threading
+
+import requests
+
+from users.authy_client import FakeAuthyAdapter
+
+
+class AuthyHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def answer(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else None
+        request = requests.Request(self.command,
+            f'http://{self.server.address}{self.path}', data=body).prepare()
+        response = self.server.adapter.send(request)
+        self.send_response(response.status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(response.content)))
+        self.end_headers()
+        self.wfile.write(response.content)
+
+    do_GET = do_POST = answer
+
+    def log_message(self, format, *args):
+        pass
+
+
+class AuthyServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class FakeAuthyServer:
+    """
+    `FakeAuthyAdapter` behind a real socket, so the app pays for the
+    connection handling it would with Twilio.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0, error_rate=0):
+        self.server = AuthyServer((host, port), AuthyHandler)
+        self.host, self.port = self.server.server_address
+        self.server.address = f'{self.host}:{self.port}'
+        self.server.adapter = FakeAuthyAdapter(latency, error_rate)
+        self._thread = None
+
+    @property
+    def url(self):
+        return f'http://{self.host}:{self.port}'
+
+    @property
+    def requests(self):
+        return self.server.adapter.requests
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever,
+                    daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self.server.shutdown()
+            self._thread.join()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
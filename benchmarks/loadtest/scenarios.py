@@ -0,0 +1,125 @@
+"""
+Endpoint scenarios. `prepare(count)` creates whatever fixture data the
+requests need and returns `count` request specs; it runs before the clock
+starts.
+"""
+import itertools
+
+from django.contrib.auth.hashers import make_password
+from django.urls import reverse
+
+
+PASSWORD = 'Password0978'
+_numbers = itertools.count()
+
+
+class Request:
+    __slots__ = ('method', 'path', 'json', 'headers')
+
+    def __init__(self, method, path, json=None, headers=None):
+        self.method = method
+        self.path = path
+        self.json = json
+        self.headers = headers or {}
+
+
+def create_users(count, **fields):
+    """Bulk create active users sharing one password hash."""
+    from users.models import User
+
+    password = make_password(PASSWORD)
+    users = []
+    for _ in range(count):
+        n = next(_numbers)
+        users.append(User(
+            username=f'loadtest{n}',
+            email=f'loadtest{n}@example.com',
+            password=password,
+            **fields
+        ))
+    User.objects.bulk_create(users, batch_size=500)
+    return User.objects.filter(
+        email__in=[user.email for user in users]).order_by('pk')
+
+
+def jwt_headers(user):
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    return {'Authorization': f'JWT {AccessToken.for_user(user)}'}
+
+
+def signup(count):
+    path = reverse('users:user-list')
+    requests = []
+    for _ in range(count):
+        n = next(_numbers)
+        requests.append(Request('POST', path, {
+            'email': f'signup{n}@example.com',
+            'password': PASSWORD,
+            're_password': PASSWORD,
+        }))
+    return requests
+
+
+def vendor(count):
+    path = reverse('users:vendor')
+    requests = []
+    for _ in range(count):
+        n = next(_numbers)
+        requests.append(Request('POST', path, {
+            'email': f'vendor{n}@example.com',
+            'password': PASSWORD,
+            're_password': PASSWORD,
+            'country_code': '+48',
+            'phone_number': str(600000000 + n),
+            'business_name': f'Vendor {n}',
+        }))
+    return requests
+
+
+def jwt_create(count):
+    path = reverse('jwt-create')
+    return [
+        Request('POST', path, {'email': user.email, 'password': PASSWORD})
+        for user in create_users(count)
+    ]
+
+
+def jwt_refresh(count):
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    path = reverse('jwt-refresh')
+    return [
+        Request('POST', path, {'refresh': str(RefreshToken.for_user(user))})
+        for user in create_users(count)
+    ]
+
+
+def phone_verify(count):
+    path = reverse('users:phone_verify')
+    return [
+        Request('POST', path, {'phone_number': '+48600000000'},
+            jwt_headers(user))
+        for user in create_users(count)
+    ]
+
+
+def phone_register(count):
+    path = reverse('users:phone_register')
+    return [
+        Request('POST', path, {
+            'phone_number': '+48600000000',
+            'verification_code': '1234',
+        }, jwt_headers(user))
+        for user in create_users(count)
+    ]
+
+
+SCENARIOS = {
+    'signup': signup,
+    'vendor': vendor,
+    'jwt-create': jwt_create,
+    'jwt-refresh': jwt_refresh,
+    'phone-verify': phone_verify,
+    'phone-register': phone_register,
+}
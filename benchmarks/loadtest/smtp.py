@@ -0,0 +1,114 @@
+"""
+Local SMTP sink accepting every message, used by the load tests and the
+email delivery tests.
+
+    with SMTPSink() as sink:
+        # point EMAIL_HOST / EMAIL_PORT at sink.host / sink.port
+        ...
+    sink.messages  # [(mail_from, [rcpt_to, ...], data), ...]
+"""
+import socketserver
+import threading
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    """Minimal SMTP dialogue: HELO/EHLO, MAIL, RCPT, DATA, RSET, QUIT."""
+
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode('ascii'))
+
+    def handle(self):
+        sink = self.server.sink
+        with sink.lock:
+            sink.connections += 1
+        mail_from, rcpt_to = None, []
+        self.reply('220 localhost SMTP sink')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                break
+            command = line.decode('utf-8', 'replace').strip()
+            verb = command[:4].upper()
+            if verb in ('HELO', 'EHLO'):
+                self.reply('250 localhost')
+            elif verb == 'MAIL':
+                mail_from, rcpt_to = command[10:].strip(' <>'), []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                recipient = command[8:].strip(' <>')
+                if recipient in sink.hang_up:
+                    break
+                if recipient in sink.reject:
+                    self.reply('550 No such user')
+                    continue
+                rcpt_to.append(recipient)
+                self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                data = []
+                for data_line in self.rfile:
+                    if data_line in (b'.\r\n', b'.\n'):
+                        break
+                    data.append(data_line[1:] if data_line.startswith(b'..')
+                                else data_line)
+                with sink.lock:
+                    sink.messages.append((mail_from, rcpt_to, b''.join(data)))
+                if sink.latency:
+                    sink.wait(sink.latency)
+                self.reply('250 OK')
+            elif verb in ('RSET', 'NOOP'):
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                break
+            else:
+                self.reply('502 Command not implemented')
+
+
+class SMTPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class SMTPSink:
+    """
+    SMTP server on a background thread recording accepted messages. It
+    refuses the `reject` recipients and drops the connection on the
+    `hang_up` ones.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0, reject=(),
+                 hang_up=()):
+        self.server = SMTPServer((host, port), SMTPHandler)
+        self.server.sink = self
+        self.host, self.port = self.server.server_address
+        self.latency = latency
+        self.reject = set(reject)
+        self.hang_up = set(hang_up)
+        self.lock = threading.Lock()
+        self.messages = []
+        self.connections = 0
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def wait(self, seconds):
+        self._stopped.wait(seconds)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever,
+                    daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self.server.shutdown()
+            self._thread.join()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
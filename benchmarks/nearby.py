@@ -0,0 +1,93 @@
+"""
+Nearest vendor lookup latency on the `geo_cell` grid index.
+
+Seeds `--rows` vendors, 80% spread over a 6x10 degree region and 20%
+packed into a city sized cluster, then times `geo.nearest_vendors` for
+the 10 nearest vendors within 10 km of random points in both areas, next
+to the bounding box filter on the unindexed coordinates it replaces.
+
+    python -m benchmarks.nearby --rows 1000000
+"""
+import argparse
+import random
+
+from benchmarks import common
+
+
+REGION = ((49.0, 55.0), (14.0, 24.0))
+CITY = ((52.15, 52.32), (20.85, 21.20))
+
+
+def random_point(rng, area):
+    (south, north), (west, east) = area
+    return rng.uniform(south, north), rng.uniform(west, east)
+
+
+def seed_vendors(count, batch_size=10000):
+    from users.geo import grid_cell
+    from users.models import User
+
+    rng = random.Random(0)
+    for offset in range(0, count, batch_size):
+        vendors = []
+        for n in range(offset, min(offset + batch_size, count)):
+            latitude, longitude = random_point(
+                rng, CITY if n % 5 == 0 else REGION)
+            vendors.append(User(
+                username=f'vendor{n}',
+                email=f'vendor{n}@example.com',
+                password='!',
+                user_type=User.TYPE_VENDOR,
+                latitude=latitude,
+                longitude=longitude,
+                # `bulk_create` skips `User.save`, which sets the cell.
+                geo_cell=grid_cell(latitude, longitude),
+            ))
+        User.objects.bulk_create(vendors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--radius-km', type=float, default=10)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    common.setup()
+    from users import geo
+    from users.models import User
+
+    rng = random.Random(1)
+    rows = []
+    with common.benchmark_database():
+        seed_vendors(args.rows)
+        for name, area in (('city', CITY), ('region', REGION)):
+            points = iter([random_point(rng, area)
+                           for _ in range(args.repeat * 2)])
+
+            def lookup():
+                geo.nearest_vendors(*next(points), args.k, args.radius_km)
+
+            def scan():
+                latitude, longitude = next(points)
+                delta = args.radius_km / geo.KM_PER_DEGREE
+                list(User.objects.filter(
+                    user_type=User.TYPE_VENDOR, is_active=True,
+                    latitude__range=(latitude - delta, latitude + delta),
+                    longitude__range=(longitude - 2 * delta,
+                                      longitude + 2 * delta),
+                ).values_list('id', 'latitude', 'longitude'))
+
+            grid = common.summary(common.timed(lookup, args.repeat))
+            bbox = common.summary(common.timed(scan, args.repeat))
+            rows.append((name, grid['mean'], grid['p50'], grid['p95'],
+                         bbox['mean'], bbox['p95']))
+
+    common.print_table(
+        ('area', 'grid ms', 'grid p50', 'grid p95', 'scan ms', 'scan p95'),
+        rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+User list page cost by depth, keyset versus OFFSET pagination.
+
+Seeds `--rows` users, half of them vendors, and at growing depths times a
+page of `UserKeysetPagination` (seeking from the cursor of the boundary
+row) next to the LIMIT/OFFSET query reaching the same rows, unfiltered and
+with the `user_type` filter. Keyset pages should cost the same at any
+depth while OFFSET grows linearly.
+
+    python -m benchmarks.pagination --rows 1000000
+"""
+import argparse
+from urllib import parse
+
+from benchmarks import common
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--page-size', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    common.setup()
+    from rest_framework.pagination import Cursor
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+    from users.models import User
+    from users.pagination import UserKeysetPagination
+
+    factory = APIRequestFactory()
+    ordering = UserKeysetPagination.ordering
+    rows = []
+    with common.benchmark_database():
+        common.seed_users(args.rows // 2, prefix='customer')
+        common.seed_users(args.rows - args.rows // 2, prefix='vendor',
+            user_type=User.TYPE_VENDOR)
+
+        for user_type in (None, User.TYPE_VENDOR):
+            queryset = User.objects.all()
+            params = {'page_size': args.page_size}
+            if user_type:
+                queryset = queryset.filter(user_type=user_type)
+                params['user_type'] = user_type
+            total = queryset.count()
+            depths = [n for n in (0, 1000, 10000, 100000, 490000, 990000)
+                      if n < total]
+            for depth in depths:
+                if depth:
+                    # Cursor of the row preceding the page, as a `next` link.
+                    paginator = UserKeysetPagination()
+                    paginator.base_url = 'http://testserver/'
+                    boundary = queryset.order_by(*ordering)[depth - 1]
+                    link = paginator.encode_cursor(
+                        Cursor(offset=0, reverse=False, position=boundary))
+                    params['cursor'] = parse.parse_qs(
+                        parse.urlsplit(link).query)['cursor'][0]
+                request = Request(factory.get('/', params))
+
+                def keyset():
+                    UserKeysetPagination().paginate_queryset(
+                        queryset, request)
+
+                def offset():
+                    list(queryset.order_by(*ordering)[
+                        depth:depth + args.page_size])
+
+                keyset_ms = common.summary(common.timed(keyset, args.repeat))
+                offset_ms = common.summary(common.timed(offset, args.repeat))
+                rows.append((user_type or 'all', depth,
+                             keyset_ms['mean'], keyset_ms['p95'],
+                             offset_ms['mean'], offset_ms['p95']))
+
+    common.print_table(
+        ('filter', 'depth', 'keyset ms', 'keyset p95', 'offset ms',
+         'offset p95'),
+        rows)
+
+
+if __name__ == '__main__':
+    main()
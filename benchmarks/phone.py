@@ -0,0 +1,56 @@
+"""
+Cold versus warm phone number validation throughput.
+
+Validates a working set of `--numbers` distinct numbers `--repeat` times,
+once with `phonenumber_field.to_python` plus `is_valid()` as the
+serializers used to, and once through `users.phone.lookup_phone_number`.
+
+    python -m benchmarks.phone --numbers 1000 --repeat 20
+"""
+import argparse
+import time
+
+from benchmarks import common
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--numbers', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    common.setup()
+    from phonenumber_field.phonenumber import to_python
+    from users.phone import (
+        clear_phone_cache,
+        lookup_phone_number,
+        phone_cache_info,
+    )
+
+    numbers = [f'+48{600000000 + n * 7919}' for n in range(args.numbers)]
+    workload = numbers * args.repeat
+
+    def uncached(value):
+        phone_number = to_python(value)
+        return phone_number, phone_number.is_valid()
+
+    rows = []
+    for name, validate in (('uncached', uncached),
+                           ('lru cache', lookup_phone_number)):
+        clear_phone_cache()
+        start = time.perf_counter()
+        for value in workload:
+            validate(value)
+        elapsed = time.perf_counter() - start
+        rows.append((name, len(workload), len(workload) / elapsed,
+                     elapsed / len(workload) * 1e6))
+    info = phone_cache_info()
+
+    common.print_table(('validation', 'calls', 'per second', 'us per call'),
+                       rows)
+    print(f'cache hits={info.hits} misses={info.misses} '
+          f'size={info.currsize}/{info.maxsize}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Vendor search latency against the table size.
+
+Seeds `--rows` vendors with business names and addresses drawn from small
+word lists, then times `search_vendors` for a rare and a common term, a
+two word query and the second page of the common term, next to the
+`icontains` scan `UserAdmin` search relied on.
+
+    python -m benchmarks.search --rows 1000000
+"""
+import argparse
+import random
+
+from benchmarks import common
+
+
+NAMES = ('pizza', 'sushi', 'bakery', 'coffee', 'burger', 'noodle', 'taco',
+         'garden', 'florist', 'barber', 'tailor', 'books', 'market', 'deli')
+SUFFIXES = ('house', 'corner', 'express', 'kitchen', 'shop', 'studio', 'bar')
+STREETS = ('main', 'high', 'church', 'park', 'station', 'mill', 'king')
+
+
+def seed_vendors(count, batch_size=10000):
+    from users.models import User
+
+    rng = random.Random(0)
+    for offset in range(0, count, batch_size):
+        User.objects.bulk_create([
+            User(
+                username=f'vendor{n}',
+                email=f'vendor{n}@example.com',
+                password='!',
+                user_type=User.TYPE_VENDOR,
+                business_name=f'{rng.choice(NAMES).title()} '
+                              f'{rng.choice(SUFFIXES).title()} {n}',
+                address=f'{rng.randint(1, 999)} '
+                        f'{rng.choice(STREETS).title()} Street',
+            )
+            for n in range(offset, min(offset + batch_size, count))
+        ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--page-size', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    common.setup()
+    from users.models import User
+    from users.search import search_vendors
+
+    rows = []
+    with common.benchmark_database():
+        seed_vendors(args.rows)
+        # A rare business name number and common words.
+        queries = [str(args.rows // 2), 'florist', 'florist king']
+        for query in queries:
+            timings = common.summary(common.timed(
+                lambda: search_vendors(query, args.page_size),
+                repeat=args.repeat))
+            rows.append((query, 'first page', timings['mean'],
+                         timings['p95']))
+
+        cursor = search_vendors('florist', args.page_size)[1]
+        timings = common.summary(common.timed(
+            lambda: search_vendors('florist', args.page_size, cursor),
+            repeat=args.repeat))
+        rows.append(('florist', 'second page', timings['mean'],
+                     timings['p95']))
+
+        timings = common.summary(common.timed(
+            lambda: list(User.objects.filter(
+                business_name__icontains='florist')[:args.page_size]),
+            repeat=args.repeat))
+        rows.append(('florist', 'icontains scan', timings['mean'],
+                     timings['p95']))
+        timings = common.summary(common.timed(
+            lambda: list(User.objects.filter(
+                business_name__icontains=str(args.rows // 2))
+                [:args.page_size]),
+            repeat=args.repeat))
+        rows.append((str(args.rows // 2), 'icontains scan', timings['mean'],
+                     timings['p95']))
+
+    common.print_table(('query', 'method', 'ms', 'p95'), rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Username allocation cost as the users table grows.
+
+Seeds users sharing the `john` prefix up to `--rows` and, at every
+checkpoint, times `User.save` inserts together with the allauth
+`generate_unique_username` lookup. With `PRESERVE_USERNAME_CASING` off
+both make a single `username__in` query, so the lookup alone is not a
+like-for-like comparison with a full insert; both should stay flat.
+
+    python -m benchmarks.usernames --rows 1000000
+"""
+import argparse
+import itertools
+
+from benchmarks import common
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    common.setup()
+    from allauth.utils import generate_unique_username
+    from users.models import User
+
+    checkpoints = [n for n in (0, 10000, 100000, 1000000, 10000000)
+                   if n <= args.rows]
+    emails = (f'john.{n}@example.org' for n in itertools.count())
+    rows = []
+    with common.benchmark_database():
+        seeded = 0
+        for checkpoint in checkpoints:
+            common.seed_users(checkpoint - seeded, start=seeded, prefix='john_')
+            seeded = checkpoint
+            insert = common.summary(common.timed(
+                lambda: User.objects.create_user(next(emails), name='John'),
+                repeat=args.repeat))
+            allauth = common.summary(common.timed(
+                lambda: generate_unique_username(['John']),
+                repeat=args.repeat))
+            rows.append((User.objects.count(), insert['mean'], insert['p95'],
+                         allauth['mean'], allauth['p95']))
+
+    common.print_table(
+        ('users', 'insert ms', 'insert p95', 'allauth ms', 'allauth p95'),
+        rows)
+
+
+if __name__ == '__main__':
+    main()
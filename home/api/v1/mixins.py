@@ -0,0 +1,101 @@
+from django.db import transaction
+from django.db.models import Count, Max
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from rest_framework.response import Response
+
+
+def timestamp(value):
+    """Microseconds since the epoch of a datetime, 0 for None."""
+    return int(value.timestamp() * 1000000) if value else 0
+
+
+class ConditionalModelMixin:
+    """
+    ETag and Last-Modified handling for viewsets of models with an
+    `updated_at = DateTimeField(auto_now=True)` field.
+
+    `list` and `retrieve` answer `If-None-Match` and `If-Modified-Since`
+    with a 304 before the serializer runs; the list validators come from a
+    single aggregate query. `update` locks the row it already loads and
+    answers a stale `If-Match` or `If-Unmodified-Since` with a 412, so
+    concurrent PUT/PATCH requests cannot silently overwrite each other.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # Schema generators call this without a request.
+        request = getattr(self, 'request', None)
+        if request is not None and request.method in ('PUT', 'PATCH'):
+            queryset = queryset.select_for_update()
+        return queryset
+
+    def get_conditional_response(self, request, etag, updated_at):
+        """
+        Return the 304 or 412 response for the given validators, or None
+        when the request should go ahead.
+        """
+        headers = HttpResponse()
+        headers['ETag'] = quote_etag(etag)
+        last_modified = None
+        if updated_at is not None:
+            last_modified = int(updated_at.timestamp())
+            headers['Last-Modified'] = http_date(last_modified)
+        response = get_conditional_response(request, etag=headers['ETag'],
+            last_modified=last_modified, response=headers)
+        if response is headers:
+            return None
+        return response
+
+    def get_list_validators(self, queryset):
+        aggregate = queryset.aggregate(count=Count('pk'),
+            updated_at=Max('updated_at'))
+        etag = f"{aggregate['count']}-{timestamp(aggregate['updated_at'])}"
+        return etag, aggregate['updated_at']
+
+    def get_object_validators(self, instance):
+        return f'{instance.pk}-{timestamp(instance.updated_at)}', \
+            instance.updated_at
+
+    def set_validators(self, response, etag, updated_at):
+        response['ETag'] = quote_etag(etag)
+        if updated_at is not None:
+            response['Last-Modified'] = http_date(updated_at.timestamp())
+        return response
+
+    def list(self, request, *args, **kwargs):
+        validators = self.get_list_validators(
+            self.filter_queryset(self.get_queryset()))
+        response = self.get_conditional_response(request, *validators)
+        if response is not None:
+            return response
+        response = super().list(request, *args, **kwargs)
+        return self.set_validators(response, *validators)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        validators = self.get_object_validators(instance)
+        response = self.get_conditional_response(request, *validators)
+        if response is not None:
+            return response
+        serializer = self.get_serializer(instance)
+        response = Response(serializer.data)
+        return self.set_validators(response, *validators)
+
+    @transaction.atomic
+    def update(self, request, *args, **kwargs):
+        partial = kwargs.pop('partial', False)
+        instance = self.get_object()
+        response = self.get_conditional_response(request,
+            *self.get_object_validators(instance))
+        if response is not None:
+            return response
+        serializer = self.get_serializer(instance, data=request.data,
+            partial=partial)
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+        response = Response(serializer.data)
+        return self.set_validators(response,
+            *self.get_object_validators(serializer.instance))
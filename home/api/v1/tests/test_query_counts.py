@@ -0,0 +1,48 @@
+"""
+Query count regression tests of the `/api/v1/` endpoints.
+"""
+import hmac
+import os
+from unittest import mock
+
+from django.test import TestCase
+
+from home.models import CustomText, HomePage
+from users.tests.querycount import QueryCountMixin, Scenario
+
+
+def staff(case, n):
+    return case.make_user(is_staff=True)
+
+
+def signature(case, n):
+    digest = hmac.new(b'secret', digestmod='sha1').hexdigest()
+    return {'HTTP_X_CB_SIGNATURE': f'sha1={digest}'}
+
+
+class HomeQueryCountTests(QueryCountMixin, TestCase):
+    prefix = '/api/v1/'
+    budget_path = os.path.join(os.path.dirname(__file__),
+        'query_budget.json')
+    scenarios = (
+        Scenario('get', 'customtext-list', user=staff),
+        Scenario('get', 'customtext-detail', user=staff,
+            kwargs=lambda case, n: {'pk': CustomText.objects.first().pk}),
+        Scenario('patch', 'customtext-detail', user=staff,
+            kwargs=lambda case, n: {'pk': CustomText.objects.first().pk},
+            data=lambda case, n: {'title': f'Title {n}'}),
+        Scenario('get', 'homepage-list', user=staff),
+        Scenario('get', 'homepage-detail', user=staff,
+            kwargs=lambda case, n: {'pk': HomePage.objects.first().pk}),
+        Scenario('patch', 'homepage-detail', user=staff,
+            kwargs=lambda case, n: {'pk': HomePage.objects.first().pk},
+            data=lambda case, n: {'body': f'Body {n}'}),
+        Scenario('get', 'api-root'),
+        Scenario('get', 'app_report', headers=signature),
+    )
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.dict(os.environ, {'CROWDBOTICS_SECRET': 'secret'})
+        patcher.start()
+        self.addCleanup(patcher.stop)
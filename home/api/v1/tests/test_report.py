@@ -0,0 +1,65 @@
+"""
+Unit tests for the project report.
+"""
+import hmac
+import json
+import os
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from home import report
+
+
+class AppReportViewTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        report.get_report.cache_clear()
+        self.addCleanup(report.get_report.cache_clear)
+        patcher = mock.patch.dict(os.environ, {'CROWDBOTICS_SECRET': 'secret'})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        digest = hmac.new(b'secret', digestmod='sha1').hexdigest()
+        self.signature = f'sha1={digest}'
+
+    def test_report_built_once(self):
+        """Test the inventory is built on first use only."""
+        url = reverse('app_report')
+        with mock.patch('home.report.get_models', wraps=report.get_models) \
+                as get_models:
+            res = self.client.get(url, HTTP_X_CB_SIGNATURE=self.signature)
+            self.client.get(url, HTTP_X_CB_SIGNATURE=self.signature)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(get_models.call_count, 1)
+        self.assertIn('CustomText', res.data['models'])
+        self.assertIn({
+            'url': '/api/v1/report',
+            'module': 'home.api.v1.viewsets.AppReportView',
+            'name': 'app_report',
+            'decorators': '',
+        }, res.data['urls'])
+
+    def test_namespaced_urls(self):
+        """Test URL names carry their namespaces."""
+        names = {url['name'] for url in report.get_report()['urls']}
+        self.assertIn('users:user-list', names)
+        self.assertIn('admin:index', names)
+
+    def test_signature_required(self):
+        """Test the report is not served without a valid signature."""
+        res = self.client.get(reverse('app_report'))
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_command(self):
+        """Test `generate_project_report` prints the same inventory."""
+        out = StringIO()
+        call_command('generate_project_report', stdout=out)
+        self.assertEqual(json.loads(out.getvalue()),
+            json.loads(json.dumps(report.get_report())))
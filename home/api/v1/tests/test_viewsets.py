@@ -0,0 +1,80 @@
+"""
+Unit tests for conditional requests on the CustomText and HomePage APIs.
+"""
+from unittest import mock
+
+from django.test import TestCase
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from home.api.v1.serializers import HomePageSerializer
+from home.models import CustomText, HomePage
+from users.models import User
+
+
+class ConditionalRequestTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_superuser('a@a.com', 'Password0978')
+        self.client.force_authenticate(self.user)
+        self.homepage = HomePage.objects.first()
+        self.url = f'/api/v1/homepage/{self.homepage.pk}/'
+
+    def test_retrieve_not_modified(self):
+        """Test a matching If-None-Match skips the serializer."""
+        res = self.client.get(self.url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('Last-Modified', res)
+
+        with mock.patch.object(HomePageSerializer, 'to_representation') \
+                as to_representation:
+            res = self.client.get(self.url, HTTP_IF_NONE_MATCH=res['ETag'])
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertIn('ETag', res)
+        to_representation.assert_not_called()
+
+    def test_retrieve_modified(self):
+        """Test a changed resource is sent again with a new ETag."""
+        etag = self.client.get(self.url)['ETag']
+        self.homepage.body = 'Changed'
+        self.homepage.save()
+        res = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['body'], 'Changed')
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_list_not_modified(self):
+        """Test list validators come from one query and change on save."""
+        url = '/api/v1/customtext/'
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(1):
+            res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        customtext = CustomText.objects.first()
+        customtext.title = 'Changed'
+        customtext.save()
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_if_match(self):
+        """Test updates with a stale If-Match are rejected."""
+        etag = self.client.get(self.url)['ETag']
+        res = self.client.patch(self.url, {'body': 'First'},
+            HTTP_IF_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+        res = self.client.patch(self.url, {'body': 'Second'},
+            HTTP_IF_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.homepage.refresh_from_db()
+        self.assertEqual(self.homepage.body, 'First')
+
+    def test_update_without_precondition(self):
+        """Test updates without If-Match still succeed."""
+        res = self.client.put(self.url, {'body': 'Changed'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('ETag', res)
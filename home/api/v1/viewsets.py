@@ -1,11 +1,7 @@
-import json
-
-from django import apps
-from django.core.management import call_command
 from .permissions import CrowboticsExclusive
 
 from rest_framework import generics, status
-from rest_framework.authentication import SessionAuthentication, TokenAuthentication
+from rest_framework.authentication import SessionAuthentication
 from rest_framework.authtoken.serializers import AuthTokenSerializer
 from rest_framework.permissions import IsAdminUser
 from rest_framework.viewsets import ModelViewSet, ViewSet
@@ -17,21 +13,24 @@ from home.api.v1.serializers import (
     CustomTextSerializer,
     HomePageSerializer,
 )
+from home.api.v1.mixins import ConditionalModelMixin
 from home.models import CustomText, HomePage
+from home.report import get_report
+from users.authentication import CachedTokenAuthentication
 
 
-class CustomTextViewSet(ModelViewSet):
+class CustomTextViewSet(ConditionalModelMixin, ModelViewSet):
     serializer_class = CustomTextSerializer
     queryset = CustomText.objects.all()
-    authentication_classes = (SessionAuthentication, TokenAuthentication)
+    authentication_classes = (SessionAuthentication, CachedTokenAuthentication)
     permission_classes = [IsAdminUser]
     http_method_names = ['get', 'put', 'patch']
 
 
-class HomePageViewSet(ModelViewSet):
+class HomePageViewSet(ConditionalModelMixin, ModelViewSet):
     serializer_class = HomePageSerializer
     queryset = HomePage.objects.all()
-    authentication_classes = (SessionAuthentication, TokenAuthentication)
+    authentication_classes = (SessionAuthentication, CachedTokenAuthentication)
     permission_classes = [IsAdminUser]
     http_method_names = ['get', 'put', 'patch']
 
@@ -43,22 +42,5 @@ class AppReportView(APIView):
     """
     permission_classes = [CrowboticsExclusive]
 
-    def _get_models(self):
-        project_models = apps.apps.get_models(
-            include_auto_created=True, include_swapped=True
-        )
-        parsed_data = [
-            str(model).split(".")[-1].replace("'", "").strip(">") for model in
-            project_models
-        ]
-        return parsed_data
-
-    def _get_urls(self):
-        parsed_data = json.loads(call_command("show_urls", format="json"))
-        return parsed_data
-
     def get(self, request):
-        return Response({
-            "models": self._get_models(),
-            "urls": self._get_urls()
-        }, status=status.HTTP_200_OK)
+        return Response(get_report(), status=status.HTTP_200_OK)
@@ -1,5 +1,14 @@
 from django.apps import AppConfig
+from django.core import checks
 
 
 class HomeConfig(AppConfig):
     name = 'home'
+
+    def ready(self):
+        from home.page_cache import check_page_cache
+        checks.register(check_page_cache, checks.Tags.caches)
+        try:
+            import home.signals  # noqa F401
+        except ImportError:
+            pass
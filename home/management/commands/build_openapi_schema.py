@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from home.openapi import CODECS, write_schema
+
+
+class Command(BaseCommand):
+    help = (
+        "Write the OpenAPI schema served by /api-docs/ to "
+        "OPENAPI_SCHEMA_DIR. Run it whenever the API changes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format', dest='formats', action='append',
+            choices=sorted(CODECS),
+            help='Schema format to write, all of them by default.',
+        )
+
+    def handle(self, *args, **options):
+        formats = options.get('formats') or tuple(CODECS)
+        for path in write_schema(formats):
+            self.stdout.write(f"Wrote {path}")
@@ -0,0 +1,356 @@
+"""
+Prometheus metrics.
+
+Metrics are declared once at module level, which registers them with
+`REGISTRY`:
+
+    EMAILS = Counter('emails_total', 'Emails by outcome.', ('status',))
+    EMAILS.inc(status='sent')
+
+Every request is measured by `home.perf.PerformanceMiddleware` and labelled
+with its view name, so new views are reported without any code. Values are
+kept in memory and guarded by a lock shared by the server threads.
+
+Processes started with `METRICS_MULTIPROCESS_DIR` also write their values
+to a file of their own in that directory every `METRICS_FLUSH_INTERVAL`
+seconds and at exit. `MetricsView` sums those files, so any process
+reports the totals of all of them. When a process starts it merges the
+files of processes that are no longer running into `ARCHIVE` and removes
+them, like `prometheus_client`'s `mark_process_dead`, so totals survive
+restarts without the directory growing.
+
+`MetricsView` serves the text exposition format at `/metrics` to staff
+users and to requests signed like `CrowboticsExclusive` expects.
+"""
+import atexit
+import fcntl
+import glob
+import json
+import math
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.http import HttpResponse
+
+from rest_framework.permissions import IsAdminUser
+from rest_framework.views import APIView
+
+from home.api.v1.permissions import CrowboticsExclusive
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, math.inf)
+# Values of exited processes, see `Registry.merge_dead_processes`.
+ARCHIVE = 'metrics-archive.json'
+PROCESS_FILE = re.compile(r'metrics-(\d+)-\d+\.json$')
+
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+@contextmanager
+def directory_lock(directory, operation):
+    with open(os.path.join(directory, 'metrics.lock'), 'a') as lock:
+        fcntl.flock(lock, operation)
+        yield
+
+
+def read_snapshot(path):
+    try:
+        with open(path) as stream:
+            return json.load(stream)
+    except (OSError, ValueError):
+        return None
+
+
+def write_snapshot(path, snapshot):
+    """Atomically replace `path` with `snapshot`."""
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w') as stream:
+        json.dump(snapshot, stream)
+    os.replace(temporary, path)
+
+
+def format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def format_labels(names, values):
+    if not names:
+        return ''
+    pairs = (
+        '{}="{}"'.format(name, str(value).replace('\\', r'\\')
+                         .replace('"', r'\"').replace('\n', r'\n'))
+        for name, value in zip(names, values)
+    )
+    return '{' + ','.join(pairs) + '}'
+
+
+class Registry:
+    """The declared metrics and their per-process storage."""
+
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+        self.path = None
+        self.flusher = None
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f'Metric {metric.name} is already registered.')
+        self.metrics[metric.name] = metric
+
+    def enabled(self):
+        if not settings.METRICS_ENABLED:
+            return False
+        if settings.METRICS_MULTIPROCESS_DIR and self.flusher is None:
+            self.start_flusher()
+        return True
+
+    def start_flusher(self):
+        with self.lock:
+            if self.flusher is not None:
+                return
+            os.makedirs(settings.METRICS_MULTIPROCESS_DIR, exist_ok=True)
+            self.merge_dead_processes(settings.METRICS_MULTIPROCESS_DIR)
+            self.path = os.path.join(settings.METRICS_MULTIPROCESS_DIR,
+                f'metrics-{os.getpid()}-{int(time.time() * 1000)}.json')
+            self.flusher = threading.Thread(target=self.flush_forever,
+                name='metrics-flusher', daemon=True)
+            self.flusher.start()
+        atexit.register(self.flush)
+
+    def flush_forever(self):
+        while True:
+            time.sleep(settings.METRICS_FLUSH_INTERVAL)
+            self.flush()
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                name: [[list(labels), value] for labels, value in
+                       metric.values.items()]
+                for name, metric in self.metrics.items()
+            }
+
+    def flush(self):
+        """Atomically replace the file of this process with its values."""
+        if self.path is None:
+            return
+        write_snapshot(self.path, self.snapshot())
+
+    def merge_dead_processes(self, directory):
+        """
+        Fold the files of exited processes into `ARCHIVE` and remove them.
+        Starting processes hold an exclusive lock on the directory while
+        merging, so no file is merged twice or read half merged.
+        """
+        with directory_lock(directory, fcntl.LOCK_EX):
+            dead = []
+            for path in glob.glob(os.path.join(directory, 'metrics-*.json')):
+                match = PROCESS_FILE.search(os.path.basename(path))
+                if match and not process_alive(int(match.group(1))):
+                    dead.append(path)
+            if not dead:
+                return
+            archive = os.path.join(directory, ARCHIVE)
+            snapshots = [read_snapshot(path) for path in [archive] + dead]
+            totals = self.merge(
+                [snapshot for snapshot in snapshots if snapshot is not None])
+            write_snapshot(archive, {
+                name: [[list(labels), value]
+                       for labels, value in values.items()]
+                for name, values in totals.items()
+            })
+            for path in dead:
+                os.remove(path)
+
+    def collect(self):
+        """Values of every metric summed over all processes."""
+        snapshots = [self.snapshot()]
+        directory = settings.METRICS_MULTIPROCESS_DIR
+        if directory and os.path.isdir(directory):
+            with directory_lock(directory, fcntl.LOCK_SH):
+                for path in glob.glob(
+                        os.path.join(directory, 'metrics-*.json')):
+                    if path == self.path:
+                        continue
+                    snapshot = read_snapshot(path)
+                    if snapshot is not None:
+                        snapshots.append(snapshot)
+        return self.merge(snapshots)
+
+    def merge(self, snapshots):
+        """Sum `snapshots` into label values to value by metric name."""
+        totals = {name: {} for name in self.metrics}
+        for snapshot in snapshots:
+            for name, samples in snapshot.items():
+                metric = self.metrics.get(name)
+                if metric is None:
+                    continue
+                for labels, value in samples:
+                    values = totals[name]
+                    labels = tuple(labels)
+                    values[labels] = metric.merge(values.get(labels), value)
+        return totals
+
+    def exposition(self):
+        totals = self.collect()
+        lines = []
+        for name, metric in sorted(self.metrics.items()):
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.type}')
+            for labels, value in sorted(totals[name].items()):
+                lines.extend(metric.samples(labels, value))
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labels=(), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.registry = registry
+        # Label values tuple to the metric value, guarded by registry.lock.
+        self.values = {}
+        registry.register(self)
+
+    def label_values(self, labels):
+        return tuple(str(labels[name]) for name in self.labels)
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        if not self.registry.enabled():
+            return
+        key = self.label_values(labels)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def merge(self, total, value):
+        return (total or 0) + value
+
+    def samples(self, labels, value):
+        yield (f'{self.name}{format_labels(self.labels, labels)} '
+               f'{format_value(value)}')
+
+
+class Histogram(Metric):
+    """Histogram stored as `[bucket counts..., sum, count]`."""
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labels=(),
+                 buckets=DEFAULT_BUCKETS, registry=REGISTRY):
+        self.buckets = tuple(buckets)
+        if self.buckets[-1] != math.inf:
+            self.buckets += (math.inf,)
+        super(Histogram, self).__init__(name, documentation, labels, registry)
+
+    def observe(self, amount, **labels):
+        if not self.registry.enabled():
+            return
+        key = self.label_values(labels)
+        with self.registry.lock:
+            value = self.values.get(key)
+            if value is None:
+                value = self.values[key] = [0] * (len(self.buckets) + 2)
+            for index, bound in enumerate(self.buckets):
+                if amount <= bound:
+                    value[index] += 1
+                    break
+            value[-2] += amount
+            value[-1] += 1
+
+    def merge(self, total, value):
+        if total is None:
+            return list(value)
+        return [a + b for a, b in zip(total, value)]
+
+    def samples(self, labels, value):
+        names = self.labels + ('le',)
+        cumulative = 0
+        for bound, count in zip(self.buckets, value):
+            cumulative += count
+            bucket_labels = format_labels(names,
+                labels + (format_value(bound),))
+            yield f'{self.name}_bucket{bucket_labels} {cumulative}'
+        label_text = format_labels(self.labels, labels)
+        yield f'{self.name}_sum{label_text} {format_value(value[-2])}'
+        yield f'{self.name}_count{label_text} {value[-1]}'
+
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds',
+    'Time spent processing requests, by view.',
+    ('method', 'view'),
+)
+RESPONSES = Counter(
+    'http_responses_total',
+    'Responses sent, by view and status code.',
+    ('method', 'view', 'status'),
+)
+DB_QUERIES = Counter(
+    'db_queries_total',
+    'SQL queries run while processing requests, by view.',
+    ('view',),
+)
+OUTBOUND_LATENCY = Histogram(
+    'outbound_http_duration_seconds',
+    'Time spent in outbound HTTP calls, such as Authy, by service.',
+    ('service',),
+)
+OUTBOUND_ERRORS = Counter(
+    'outbound_http_errors_total',
+    'Outbound HTTP calls failing or answered with an error status.',
+    ('service',),
+)
+EMAILS = Counter(
+    'emails_total',
+    'Emails queued and delivery attempts, by outcome.',
+    ('status',),
+)
+
+
+def record_request(method, view, status, seconds, queries):
+    REQUEST_LATENCY.observe(seconds, method=method, view=view)
+    RESPONSES.inc(method=method, view=view, status=status)
+    if queries:
+        DB_QUERIES.inc(queries, view=view)
+
+
+def record_outbound(service, seconds, error):
+    OUTBOUND_LATENCY.observe(seconds, service=service)
+    if error:
+        OUTBOUND_ERRORS.inc(service=service)
+
+
+class MetricsView(APIView):
+    """Prometheus scrape endpoint."""
+    permission_classes = [IsAdminUser | CrowboticsExclusive]
+    swagger_schema = None
+
+    def get(self, request):
+        return HttpResponse(REGISTRY.exposition(), content_type=CONTENT_TYPE)
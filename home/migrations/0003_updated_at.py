@@ -0,0 +1,23 @@
+# Generated by Django 2.2.28 on 2026-10-17 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0002_load_initial_data'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customtext',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='homepage',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -7,6 +7,7 @@ from django.db import models
 
 class CustomText(models.Model):
     title = models.CharField(max_length=150)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.title
@@ -22,6 +23,7 @@ class CustomText(models.Model):
 
 class HomePage(models.Model):
     body = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
 
     @property
     def api(self):
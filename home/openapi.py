@@ -0,0 +1,155 @@
+"""
+Prebuilt OpenAPI schema.
+
+Generating the schema makes drf_yasg inspect every viewset and serializer
+of the project, which takes hundreds of milliseconds. The
+`build_openapi_schema` command writes it once, at build time, to
+`openapi.json` and `openapi.yaml` in `OPENAPI_SCHEMA_DIR`, and
+`SchemaFileView` serves those files from memory, gzip compressed when the
+client accepts it and with an ETag for conditional requests.
+
+With `OPENAPI_SCHEMA_REGENERATE` (on in development) the files are
+ignored and the schema is generated in-process on first use instead, so
+it always matches the running code.
+"""
+import gzip
+import hashlib
+import io
+import os
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+
+from drf_yasg import openapi
+from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+from drf_yasg.generators import OpenAPISchemaGenerator
+from rest_framework import permissions
+from rest_framework.views import APIView
+
+
+API_INFO = openapi.Info(
+    title="Sway Backend API",
+    default_version="v1",
+    description="API documentation for Sway Backend App",
+)
+
+CODECS = {
+    'json': OpenAPICodecJson,
+    'yaml': OpenAPICodecYaml,
+}
+
+
+def build_schema():
+    generator = OpenAPISchemaGenerator(API_INFO)
+    return generator.get_schema(request=None, public=True)
+
+
+def encode_schema(schema, extension):
+    return CODECS[extension](validators=[]).encode(schema)
+
+
+def schema_path(extension):
+    return os.path.join(settings.OPENAPI_SCHEMA_DIR, f'openapi.{extension}')
+
+
+def write_schema(extensions=tuple(CODECS)):
+    """Write the schema in each of `extensions`, returning the paths."""
+    schema = build_schema()
+    os.makedirs(settings.OPENAPI_SCHEMA_DIR, exist_ok=True)
+    paths = []
+    for extension in extensions:
+        path = schema_path(extension)
+        with open(path, 'wb') as stream:
+            stream.write(encode_schema(schema, extension))
+        paths.append(path)
+    return paths
+
+
+def compress(content):
+    """
+    Gzip `content` with a zero modification time, so the same schema
+    always compresses to the same bytes. `gzip.compress` only takes `mtime`
+    from Python 3.8.
+    """
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode='wb', mtime=0) as stream:
+        stream.write(content)
+    return buffer.getvalue()
+
+
+def accepts_gzip(accept_encoding):
+    """Whether an `Accept-Encoding` header allows gzip, honouring `q=0`."""
+    qualities = {}
+    for coding in accept_encoding.split(','):
+        name, *params = coding.split(';')
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name.strip().lower()] = quality
+    return qualities.get('gzip', qualities.get('*', 0.0)) > 0
+
+
+class SchemaArtifact:
+    """An encoded schema with its gzip variant and ETag."""
+
+    def __init__(self, content, content_type):
+        self.content = content
+        self.content_type = content_type
+        self.compressed = compress(content)
+        self.etag = f'"{hashlib.sha1(content).hexdigest()}"'
+
+
+@lru_cache(maxsize=None)
+def get_artifact(extension):
+    if settings.OPENAPI_SCHEMA_REGENERATE:
+        content = encode_schema(build_schema(), extension)
+    else:
+        try:
+            with open(schema_path(extension), 'rb') as stream:
+                content = stream.read()
+        except FileNotFoundError:
+            raise Http404(
+                'The OpenAPI schema has not been built, run '
+                '`manage.py build_openapi_schema`.')
+    return SchemaArtifact(content, CODECS[extension].media_type)
+
+
+@receiver(setting_changed)
+def clear_artifacts(setting, **kwargs):
+    if setting.startswith('OPENAPI_SCHEMA_'):
+        get_artifact.cache_clear()
+
+
+class SchemaFileView(APIView):
+    """Serve the prebuilt schema in the format of its `extension`."""
+    permission_classes = (permissions.IsAuthenticated,)
+    swagger_schema = None
+
+    def get(self, request, extension):
+        artifact = get_artifact(extension)
+        response = HttpResponse(content_type=artifact.content_type)
+        response['ETag'] = artifact.etag
+        # Browsers may keep the schema but have to revalidate it.
+        response['Cache-Control'] = 'private, no-cache'
+        patch_vary_headers(response, ('Accept-Encoding',))
+        conditional = get_conditional_response(request, etag=artifact.etag,
+            response=response)
+        if conditional is not response:
+            return conditional
+
+        if accepts_gzip(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+            response.content = artifact.compressed
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response.content = artifact.content
+        response['Content-Length'] = len(response.content)
+        return response
@@ -0,0 +1,111 @@
+"""
+Rendered home page cache.
+
+The home page only changes when a `CustomText` or `HomePage` row is edited,
+which happens rarely, so `home.views.home` serves it from the
+`HOME_PAGE_CACHE_ALIAS` cache. Every entry is tagged with the content
+version stored under `VERSION_KEY`; the `home.signals` receivers replace
+that version whenever either model is saved or deleted. The version has
+to reach every process, so the page is only cached when the alias is a
+shared backend; with a per-process one such as `LocMemCache` it is
+rendered on every request and the `home.W001` check warns.
+
+An entry is fresh for `HOME_PAGE_CACHE_TIMEOUT` seconds and kept for
+`HOME_PAGE_CACHE_STALE_TIMEOUT` seconds. Once it is outdated the first
+request to grab the rebuild lock renders the page again while concurrent
+requests keep getting the previous copy, and when the database cannot be
+reached the previous copy is served instead of an error.
+"""
+import time
+import uuid
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import DatabaseError
+
+
+VERSION_KEY = 'home:page:version'
+# Seconds a rebuild may take before another request takes over.
+LOCK_TIMEOUT = 30
+# Backends whose version bumps other processes cannot see.
+PROCESS_LOCAL_CACHES = (LocMemCache, DummyCache)
+
+
+def get_cache():
+    """The `HOME_PAGE_CACHE_ALIAS` cache, None when it is not shared."""
+    cache = caches[settings.HOME_PAGE_CACHE_ALIAS]
+    if isinstance(cache, PROCESS_LOCAL_CACHES):
+        return None
+    return cache
+
+
+def check_page_cache(app_configs, **kwargs):
+    """Warn when the home page cache is disabled by its backend."""
+    if get_cache() is not None:
+        return []
+    return [checks.Warning(
+        f'HOME_PAGE_CACHE_ALIAS "{settings.HOME_PAGE_CACHE_ALIAS}" is not '
+        f'shared between processes, the home page will not be cached.',
+        hint='Point it at a memcached, Redis or database cache.',
+        id='home.W001',
+    )]
+
+
+def page_cache_key(variant):
+    return f'home:page:{variant}'
+
+
+def lock_cache_key(variant):
+    return f'home:page:lock:{variant}'
+
+
+def bump_version():
+    """Outdate every cached home page."""
+    cache = get_cache()
+    if cache is not None:
+        cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def get_version(cache):
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def get_page(variant, render):
+    """
+    Return the page rendered by `render()` for `variant`, from the cache
+    unless it is outdated and this request won the rebuild lock.
+    """
+    cache = get_cache()
+    if cache is None:
+        return render()
+    version = get_version(cache)
+    entry = cache.get(page_cache_key(variant))
+    if entry is not None:
+        entry_version, expires_at, content = entry
+        if entry_version == version and expires_at > time.time():
+            return content
+        if not cache.add(lock_cache_key(variant), 1, LOCK_TIMEOUT):
+            # Someone else is rebuilding, the previous copy will do.
+            return content
+    try:
+        content = render()
+    except DatabaseError:
+        # The lock is left to expire so a broken database is only retried
+        # every LOCK_TIMEOUT seconds.
+        if entry is None:
+            raise
+        return entry[2]
+    cache.set(
+        page_cache_key(variant),
+        (version, time.time() + settings.HOME_PAGE_CACHE_TIMEOUT, content),
+        settings.HOME_PAGE_CACHE_STALE_TIMEOUT,
+    )
+    cache.delete(lock_cache_key(variant))
+    return content
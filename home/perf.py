@@ -0,0 +1,161 @@
+"""
+Per-request performance instrumentation.
+
+`PerformanceMiddleware` measures every request: its total time, the number
+and duration of SQL queries (through `connection.execute_wrapper`) and the
+time spent in outbound HTTP calls wrapped in `timed_http`, such as the
+Authy API. The measurements are sent back in a `Server-Timing` header
+with `PERF_SERVER_TIMING` (off unless `DEBUG`, it is readable by any
+client) and logged as one JSON line on the `home.perf` logger for a
+`PERF_LOG_SAMPLE_RATE` fraction of requests, and for every request slower
+than `PERF_SLOW_REQUEST_MS`. Request, query and outbound call metrics
+are recorded in `home.metrics`.
+
+Instrumentation is switched off with `PERF_INSTRUMENTATION = False`, in
+which case the middleware removes itself from the stack at startup and
+`timed_http` costs a single context variable lookup.
+"""
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from home import metrics
+
+
+logger = logging.getLogger(__name__)
+
+current_timings = ContextVar('current_timings', default=None)
+
+
+class RequestTimings:
+    """Counters collected while a single request is processed."""
+    __slots__ = ('db_count', 'db_time', 'http_count', 'http_time', 'http')
+
+    def __init__(self):
+        self.db_count = 0
+        self.db_time = 0.0
+        self.http_count = 0
+        self.http_time = 0.0
+        # Seconds spent per outbound service, e.g. `{'authy': 0.21}`.
+        self.http = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        """`connection.execute_wrapper` timing every query."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_count += 1
+            self.db_time += time.perf_counter() - start
+
+    def add_http(self, service, seconds):
+        self.http_count += 1
+        self.http_time += seconds
+        self.http[service] = self.http.get(service, 0.0) + seconds
+
+
+class OutboundCall:
+    """Outcome of a `timed_http` call, `error` is set on failures."""
+    __slots__ = ('error',)
+
+    def __init__(self):
+        self.error = False
+
+
+@contextmanager
+def timed_http(service):
+    """
+    Account the wrapped outbound HTTP call to the current request and to
+    the `service` metrics. Callers set `error` on the yielded call when
+    the response has an error status.
+    """
+    call = OutboundCall()
+    start = time.perf_counter()
+    try:
+        yield call
+    except Exception:
+        call.error = True
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        timings = current_timings.get()
+        if timings is not None:
+            timings.add_http(service, seconds)
+        metrics.record_outbound(service, seconds, call.error)
+
+
+def milliseconds(seconds):
+    return round(seconds * 1000, 3)
+
+
+def server_timing(total, timings):
+    entries = [
+        f'total;dur={milliseconds(total)}',
+        f'db;dur={milliseconds(timings.db_time)};'
+        f'desc="{timings.db_count} queries"',
+        f'http;dur={milliseconds(timings.http_time)};'
+        f'desc="{timings.http_count} calls"',
+    ]
+    for service, seconds in timings.http.items():
+        entries.append(f'http-{service};dur={milliseconds(seconds)}')
+    return ', '.join(entries)
+
+
+class PerformanceMiddleware:
+    """Measure requests, see the module documentation."""
+
+    def __init__(self, get_response):
+        if not settings.PERF_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.PERF_LOG_SAMPLE_RATE
+        self.slow_request = settings.PERF_SLOW_REQUEST_MS / 1000
+        self.server_timing = settings.PERF_SERVER_TIMING
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timings))
+                response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        total = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        # Unresolved paths share one label to bound the series count.
+        view = match.view_name if match else '<unresolved>'
+        metrics.record_request(request.method, view, response.status_code,
+            total, timings.db_count)
+        if self.server_timing:
+            response['Server-Timing'] = server_timing(total, timings)
+        slow = total >= self.slow_request
+        if slow or random.random() < self.sample_rate:
+            self.log(request, response, view, total, timings, slow)
+        return response
+
+    def log(self, request, response, view, total, timings, slow):
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': view,
+            'status': response.status_code,
+            'slow': slow,
+            'total_ms': milliseconds(total),
+            'db_count': timings.db_count,
+            'db_ms': milliseconds(timings.db_time),
+            'http_count': timings.http_count,
+            'http_ms': milliseconds(timings.http_time),
+        }
+        logger.log(logging.WARNING if slow else logging.INFO,
+            json.dumps(record))
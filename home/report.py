@@ -0,0 +1,98 @@
+"""
+Model and URL inventory of the project, reported to the Crowdbotics
+dashboard by `AppReportView` and the `generate_project_report` command.
+
+The inventory is built in-process by walking `get_resolver()` the first
+time it is requested and kept for the lifetime of the process; the URL
+entries have the shape of `manage.py show_urls --format=json`.
+"""
+import functools
+import re
+
+from django.apps import apps
+from django.contrib.admindocs.views import simplify_regex
+from django.core.exceptions import ViewDoesNotExist
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.urls import URLPattern, URLResolver, get_resolver
+
+
+# Decorators reported for each view, as `show_urls` does by default.
+REPORTED_DECORATORS = ('login_required',)
+
+
+def get_models():
+    project_models = apps.get_models(
+        include_auto_created=True, include_swapped=True
+    )
+    return [
+        str(model).split(".")[-1].replace("'", "").strip(">") for model in
+        project_models
+    ]
+
+
+def describe_view(callback, url, name):
+    func_globals = getattr(callback, '__globals__', {})
+    decorators = [d for d in REPORTED_DECORATORS if d in func_globals]
+    if isinstance(callback, functools.partial):
+        callback = callback.func
+        decorators.insert(0, 'functools.partial')
+
+    if hasattr(callback, '__name__'):
+        func_name = callback.__name__
+    elif hasattr(callback, '__class__'):
+        func_name = f'{callback.__class__.__name__}()'
+    else:
+        func_name = re.sub(r' at 0x[0-9a-f]+', '', repr(callback))
+
+    return {
+        'url': simplify_regex(url),
+        'module': f'{callback.__module__}.{func_name}',
+        'name': name or '',
+        'decorators': ', '.join(decorators),
+    }
+
+
+def get_urls(urlpatterns=None, base='', namespace=None):
+    """Describe every view reachable from `urlpatterns`, depth first."""
+    if urlpatterns is None:
+        urlpatterns = get_resolver().url_patterns
+    urls = []
+    for pattern in urlpatterns:
+        if isinstance(pattern, URLPattern):
+            name = pattern.name
+            if name and namespace:
+                name = f'{namespace}:{name}'
+            try:
+                callback = pattern.callback
+            except ViewDoesNotExist:
+                continue
+            urls.append(
+                describe_view(callback, base + str(pattern.pattern), name))
+        elif isinstance(pattern, URLResolver):
+            try:
+                patterns = pattern.url_patterns
+            except ImportError:
+                continue
+            if namespace and pattern.namespace:
+                child_namespace = f'{namespace}:{pattern.namespace}'
+            else:
+                child_namespace = pattern.namespace or namespace
+            urls.extend(get_urls(patterns, base + str(pattern.pattern),
+                child_namespace))
+    return urls
+
+
+@functools.lru_cache(maxsize=None)
+def get_report():
+    """The `{"models": [...], "urls": [...]}` inventory, built once."""
+    return {
+        'models': get_models(),
+        'urls': get_urls(),
+    }
+
+
+@receiver(setting_changed)
+def clear_report(setting, **kwargs):
+    if setting in ('ROOT_URLCONF', 'INSTALLED_APPS'):
+        get_report.cache_clear()
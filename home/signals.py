@@ -0,0 +1,14 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import CustomText, HomePage
+from .page_cache import bump_version
+
+
+@receiver(post_save, sender=CustomText)
+@receiver(post_save, sender=HomePage)
+@receiver(post_delete, sender=CustomText)
+@receiver(post_delete, sender=HomePage)
+def invalidate_home_page(sender, instance, **kwargs):
+    """Outdate the cached home page when its content changes."""
+    bump_version()
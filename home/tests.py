@@ -1,3 +1,375 @@
-from django.test import TestCase
+import glob
+import gzip
+import hmac
+import json
+import os
+import tempfile
+import threading
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from home import metrics, openapi, page_cache, perf
+from home.models import CustomText, HomePage
+from users.models import User
+
+
+# The page is only cached with a backend shared by processes.
+SHARED_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'page': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'home-page-tests'),
+    },
+}
+
+
+@override_settings(
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+    CACHES=SHARED_CACHES, HOME_PAGE_CACHE_ALIAS='page')
+class HomePageCacheTests(TestCase):
+
+    def setUp(self):
+        page_cache.get_cache().clear()
+        self.addCleanup(page_cache.get_cache().clear)
+        self.url = reverse('home')
+
+    def test_cached(self):
+        """Test a cached home page is served without queries."""
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            res = self.client.get(self.url)
+        self.assertEqual(res.status_code, 200)
+
+    def test_save_invalidates(self):
+        """Test saving the content renders the page again."""
+        self.client.get(self.url)
+        homepage = HomePage.objects.first()
+        homepage.body = '<h1>Changed body</h1>'
+        homepage.save()
+        self.assertContains(self.client.get(self.url), 'Changed body')
+
+        customtext = CustomText.objects.first()
+        customtext.title = 'Changed title'
+        customtext.save()
+        self.assertContains(self.client.get(self.url), 'Changed title')
+
+    def test_variants(self):
+        """Test visitors and users get their own navigation."""
+        self.assertContains(self.client.get(self.url), 'Sign Up')
+        user = User.objects.create_user('a@a.com', 'Password0978')
+        self.client.force_login(user)
+        res = self.client.get(self.url)
+        self.assertContains(res, 'Logout')
+        self.assertNotContains(res, 'id="editor"')
+
+    def test_single_rebuild(self):
+        """Test an outdated page is served while the lock is held."""
+        self.client.get(self.url)
+        page_cache.bump_version()
+        page_cache.get_cache().add(page_cache.lock_cache_key('anonymous'), 1)
+        with self.assertNumQueries(0):
+            res = self.client.get(self.url)
+        self.assertEqual(res.status_code, 200)
+
+    def test_stale_on_database_error(self):
+        """Test the previous page is served when the database fails."""
+        self.client.get(self.url)
+        page_cache.bump_version()
+        with mock.patch('home.views.HomePage.objects.first',
+                side_effect=DatabaseError):
+            res = self.client.get(self.url)
+        self.assertContains(res, 'Sign Up')
+        # The lock is kept so the next attempt waits for LOCK_TIMEOUT.
+        self.assertTrue(page_cache.get_cache().get(
+            page_cache.lock_cache_key('anonymous')))
+
+    def test_database_error_without_page(self):
+        """Test the error is raised when there is nothing to serve."""
+        with mock.patch('home.views.HomePage.objects.first',
+                side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.client.get(self.url)
+
+    @override_settings(HOME_PAGE_CACHE_ALIAS='default')
+    def test_local_cache_disabled(self):
+        """Test per-process caches are not used and fail the check."""
+        self.client.get(self.url)
+        with self.assertNumQueries(2):
+            res = self.client.get(self.url)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(
+            [error.id for error in page_cache.check_page_cache(None)],
+            ['home.W001'])
+
+
+class SchemaFileViewTests(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        override = self.settings(OPENAPI_SCHEMA_DIR=directory.name,
+            OPENAPI_SCHEMA_REGENERATE=False)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.client.force_login(
+            User.objects.create_user('a@a.com', 'Password0978'))
+        self.url = reverse('api_schema', kwargs={'extension': 'json'})
+
+    def build(self):
+        call_command('build_openapi_schema', format=['json'], stdout=StringIO())
+
+    def test_not_built(self):
+        """Test a missing schema file is reported as not found."""
+        res = self.client.get(self.url)
+        self.assertEqual(res.status_code, 404)
+
+    def test_served_compressed(self):
+        """Test the built schema is served gzipped with an ETag."""
+        self.build()
+        with mock.patch('home.openapi.build_schema') as build_schema:
+            res = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        build_schema.assert_not_called()
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        schema = json.loads(gzip.decompress(res.content))
+        self.assertEqual(schema['info']['title'], 'Sway Backend API')
+        self.assertIn('/v1/customtext/', schema['paths'])
+
+        res = self.client.get(self.url, HTTP_IF_NONE_MATCH=res['ETag'])
+        self.assertEqual(res.status_code, 304)
+
+    def test_compress(self):
+        """Test the gzip variant round-trips and does not vary by time."""
+        content = b'{"swagger": "2.0"}'
+        compressed = openapi.compress(content)
+        self.assertEqual(gzip.decompress(compressed), content)
+        with mock.patch('time.time', return_value=0.0):
+            self.assertEqual(openapi.compress(content), compressed)
+
+    def test_uncompressed(self):
+        """Test clients without gzip support get the plain schema."""
+        self.build()
+        res = self.client.get(self.url)
+        self.assertNotIn('Content-Encoding', res)
+        self.assertEqual(res.json()['swagger'], '2.0')
+        res = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip;q=0, br')
+        self.assertNotIn('Content-Encoding', res)
+
+    def test_accepts_gzip(self):
+        self.assertTrue(openapi.accepts_gzip('deflate, GZIP;q=0.5'))
+        self.assertTrue(openapi.accepts_gzip('*'))
+        self.assertFalse(openapi.accepts_gzip('gzip;q=0'))
+        self.assertFalse(openapi.accepts_gzip('*, gzip; q=0.000'))
+        self.assertFalse(openapi.accepts_gzip(''))
+
+    def test_regenerate(self):
+        """Test development servers generate the schema in-process."""
+        with self.settings(OPENAPI_SCHEMA_REGENERATE=True):
+            res = self.client.get(self.url)
+        self.assertEqual(res.status_code, 200)
+
+    def test_login_required(self):
+        """Test the schema is only served to authenticated users."""
+        self.build()
+        self.client.logout()
+        res = self.client.get(self.url)
+        self.assertEqual(res.status_code, 401)
+
+    @override_settings(STATICFILES_STORAGE=(
+        'django.contrib.staticfiles.storage.StaticFilesStorage'))
+    def test_ui_spec_url(self):
+        """Test the documentation page loads the prebuilt schema."""
+        res = self.client.get(reverse('api_docs'))
+        self.assertContains(res, self.url)
+
+
+@override_settings(PERF_LOG_SAMPLE_RATE=0, PERF_SLOW_REQUEST_MS=60000,
+    PERF_SERVER_TIMING=True)
+class PerformanceMiddlewareTests(TestCase):
+
+    def setUp(self):
+        self.client = Client()
+        self.url = reverse('users:user-list')
+
+    def timing(self, res):
+        return dict(metric.split(';', 1)
+            for metric in res['Server-Timing'].split(', '))
+
+    def test_server_timing(self):
+        """Test request, query and HTTP timings are sent back."""
+        res = self.client.post(self.url, {'email': 'invalid'})
+        timing = self.timing(res)
+        self.assertIn('total', timing)
+        self.assertRegex(timing['db'], r'desc="[1-9]\d* queries"')
+        self.assertIn('desc="0 calls"', timing['http'])
+
+    def test_timed_http(self):
+        """Test outbound calls are accounted to the current request."""
+        timings = perf.RequestTimings()
+        token = perf.current_timings.set(timings)
+        try:
+            with perf.timed_http('authy'):
+                pass
+        finally:
+            perf.current_timings.reset(token)
+        self.assertEqual(timings.http_count, 1)
+        self.assertIn('authy', timings.http)
+        self.assertIn('http-authy;dur=',
+            perf.server_timing(0.1, timings))
+
+    def test_slow_request_logged(self):
+        """Test slow requests are always logged."""
+        with self.settings(PERF_SLOW_REQUEST_MS=0):
+            with self.assertLogs('home.perf', 'WARNING') as logs:
+                Client().get(self.url)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'users:user-list')
+        self.assertTrue(record['slow'])
+        self.assertIn('db_count', record)
+
+    def test_sampling(self):
+        """Test fast requests are only logged when sampled."""
+        with mock.patch.object(perf.logger, 'log') as log:
+            self.client.get(self.url)
+        log.assert_not_called()
+        with self.settings(PERF_LOG_SAMPLE_RATE=1):
+            with self.assertLogs('home.perf', 'INFO'):
+                Client().get(self.url)
+
+    def test_server_timing_disabled(self):
+        """Test the timings are not sent without PERF_SERVER_TIMING."""
+        with self.settings(PERF_SERVER_TIMING=False):
+            res = Client().get(self.url)
+        self.assertNotIn('Server-Timing', res)
+
+    def test_disabled(self):
+        """Test the middleware is left out when disabled."""
+        with self.settings(PERF_INSTRUMENTATION=False):
+            res = Client().get(self.url)
+        self.assertNotIn('Server-Timing', res)
+
+
+class MetricsTests(TestCase):
+
+    def setUp(self):
+        self.registry = metrics.Registry()
+        self.latency = metrics.Histogram('latency_seconds', 'Latency.',
+            ('view',), buckets=(0.1, 1), registry=self.registry)
+        self.requests = metrics.Counter('requests_total', 'Requests.',
+            ('status',), registry=self.registry)
+
+    def test_exposition(self):
+        """Test counters and histograms in the text format."""
+        self.latency.observe(0.05, view='home')
+        self.latency.observe(0.5, view='home')
+        self.requests.inc(status=200)
+        self.assertEqual(self.registry.exposition().splitlines(), [
+            '# HELP latency_seconds Latency.',
+            '# TYPE latency_seconds histogram',
+            'latency_seconds_bucket{view="home",le="0.1"} 1',
+            'latency_seconds_bucket{view="home",le="1"} 2',
+            'latency_seconds_bucket{view="home",le="+Inf"} 2',
+            'latency_seconds_sum{view="home"} 0.55',
+            'latency_seconds_count{view="home"} 2',
+            '# HELP requests_total Requests.',
+            '# TYPE requests_total counter',
+            'requests_total{status="200"} 1',
+        ])
+
+    def test_threads(self):
+        """Test increments from concurrent threads are all counted."""
+        def work():
+            for i in range(1000):
+                self.requests.inc(status=200)
+        threads = [threading.Thread(target=work) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.requests.values[('200',)], 8000)
+
+    def test_multiprocess(self):
+        """Test values flushed by other processes are summed."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        other = metrics.Registry()
+        metrics.Counter('requests_total', 'Requests.', ('status',),
+            registry=other).values[('200',)] = 2
+        other.path = os.path.join(directory.name, 'metrics-1-1.json')
+        other.flush()
+
+        self.requests.inc(status=200)
+        with self.settings(METRICS_MULTIPROCESS_DIR=directory.name):
+            totals = self.registry.collect()
+        self.assertEqual(totals['requests_total'], {('200',): 3})
+
+    @mock.patch('home.metrics.process_alive', side_effect=lambda pid: pid == 2)
+    def test_merge_dead_processes(self, process_alive):
+        """Test files of exited processes are merged and removed."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        for pid, count in ((1, 2), (2, 3), (3, 4)):
+            other = metrics.Registry()
+            metrics.Counter('requests_total', 'Requests.', ('status',),
+                registry=other).values[('200',)] = count
+            other.path = os.path.join(directory.name,
+                f'metrics-{pid}-1.json')
+            other.flush()
+
+        for i in range(2):
+            self.registry.merge_dead_processes(directory.name)
+        self.assertEqual(
+            sorted(glob.glob(os.path.join(directory.name, '*.json'))), [
+                os.path.join(directory.name, 'metrics-2-1.json'),
+                os.path.join(directory.name, metrics.ARCHIVE),
+            ])
+        with self.settings(METRICS_MULTIPROCESS_DIR=directory.name):
+            totals = self.registry.collect()
+        self.assertEqual(totals['requests_total'], {('200',): 9})
+
+    def test_disabled(self):
+        """Test nothing is recorded when metrics are disabled."""
+        with self.settings(METRICS_ENABLED=False):
+            self.requests.inc(status=200)
+        self.assertEqual(self.requests.values, {})
+
+
+class MetricsViewTests(TestCase):
+
+    def setUp(self):
+        self.url = reverse('metrics')
+
+    def test_staff(self):
+        """Test staff users see the request metrics."""
+        user = User.objects.create_superuser('a@a.com', 'Password0978')
+        self.client.force_login(user)
+        self.client.get(reverse('users:user-list'))
+        res = self.client.get(self.url)
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        self.assertContains(res, 'http_responses_total{method="GET",'
+            'view="users:user-list",status="200"}')
+        self.assertContains(res, '# TYPE outbound_http_duration_seconds '
+            'histogram')
+
+    def test_signature(self):
+        """Test scrapers may authenticate with the HMAC signature."""
+        digest = hmac.new(b'secret', digestmod='sha1').hexdigest()
+        with mock.patch.dict(os.environ, {'CROWDBOTICS_SECRET': 'secret'}):
+            res = self.client.get(self.url,
+                HTTP_X_CB_SIGNATURE=f'sha1={digest}')
+        self.assertEqual(res.status_code, 200)
+
+    def test_forbidden(self):
+        """Test other users are refused."""
+        user = User.objects.create_user('a@a.com', 'Password0978')
+        self.client.force_login(user)
+        res = self.client.get(self.url)
+        self.assertEqual(res.status_code, 403)
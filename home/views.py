@@ -1,8 +1,10 @@
-from django.shortcuts import render
+from django.http import HttpResponse
+from django.template.loader import render_to_string
 
 # Create your views here.
 
 from home.models import CustomText, HomePage
+from home.page_cache import get_page
 
 
 def home(request):
@@ -11,9 +13,21 @@ def home(request):
 	{'name':'django-bootstrap4', 'url': 'https://pypi.org/project/django-bootstrap4/0.0.7/'},
 	{'name':'djangorestframework', 'url': 'https://pypi.org/project/djangorestframework/3.9.0/'},
     ]
-    context = {
-        'customtext': CustomText.objects.first(),
-        'homepage': HomePage.objects.first(),
-        'packages': packages
-    }
-    return render(request, 'home/index.html', context)
+
+    def render():
+        context = {
+            'customtext': CustomText.objects.first(),
+            'homepage': HomePage.objects.first(),
+            'packages': packages
+        }
+        return render_to_string('home/index.html', context, request)
+
+    # The navigation differs for visitors, users and superusers.
+    user = request.user
+    if user.is_superuser:
+        variant = 'superuser'
+    elif user.is_authenticated:
+        variant = 'user'
+    else:
+        variant = 'anonymous'
+    return HttpResponse(get_page(variant, render))
@@ -47,7 +47,7 @@ INSTALLED_APPS = [
     'django.contrib.sites'
 ]
 LOCAL_APPS = [
-    'home',
+    'home.apps.HomeConfig',
     'users.apps.UsersConfig',
 ]
 THIRD_PARTY_APPS = [
@@ -66,6 +66,7 @@ THIRD_PARTY_APPS = [
 INSTALLED_APPS += LOCAL_APPS + THIRD_PARTY_APPS
 
 MIDDLEWARE = [
+    'home.perf.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -181,18 +182,114 @@ AUTH_USER_MODEL = "users.User"
 EMAIL_HOST = env.str("EMAIL_HOST", "smtp.sendgrid.net")
 EMAIL_HOST_USER = env.str("SENDGRID_USERNAME", "")
 EMAIL_HOST_PASSWORD = env.str("SENDGRID_PASSWORD", "")
-EMAIL_PORT = 587
-EMAIL_USE_TLS = True
+EMAIL_PORT = env.int("EMAIL_PORT", 587)
+EMAIL_USE_TLS = env.bool("EMAIL_USE_TLS", True)
+
+# Emails are queued in the `OutboxEmail` table with the rest of the request
+# transaction and delivered by the `send_queued_email` worker through
+# `EMAIL_DELIVERY_BACKEND`.
+EMAIL_BACKEND = "users.mail.OutboxEmailBackend"
+EMAIL_DELIVERY_BACKEND = env.str(
+    "EMAIL_DELIVERY_BACKEND", "django.core.mail.backends.smtp.EmailBackend")
+EMAIL_OUTBOX_MAX_ATTEMPTS = env.int("EMAIL_OUTBOX_MAX_ATTEMPTS", 5)
+# Seconds before the first retry, doubled on every following attempt.
+EMAIL_OUTBOX_RETRY_DELAY = env.int("EMAIL_OUTBOX_RETRY_DELAY", 60)
+# Seconds a worker holds the messages it claimed, longer than a batch of
+# SMTP sends takes, before other workers may retry them.
+EMAIL_OUTBOX_CLAIM_SECONDS = env.int("EMAIL_OUTBOX_CLAIM_SECONDS", 1800)
 
 
 REST_FRAMEWORK = {
+    # Dispatches to Session, Token or JWT authentication from the request
+    # credentials instead of trying each of them in turn.
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.TokenAuthentication',
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.HeaderDispatchAuthentication',
     ),
 }
 
+# Page sizes of the keyset paginated User list, see `users.pagination`.
+USER_LIST_PAGE_SIZE = env.int('USER_LIST_PAGE_SIZE', default=50)
+USER_LIST_MAX_PAGE_SIZE = env.int('USER_LIST_MAX_PAGE_SIZE', default=500)
+
+# User change feed, see `users.changes`. Rows younger than the settle delay,
+# or on PostgreSQL than the oldest open writing transaction, are held back.
+USER_CHANGES_PAGE_SIZE = env.int('USER_CHANGES_PAGE_SIZE', default=500)
+USER_CHANGES_SETTLE_SECONDS = env.int('USER_CHANGES_SETTLE_SECONDS', default=5)
+
+# Vendor search result pages, see `users.search`.
+VENDOR_SEARCH_PAGE_SIZE = env.int('VENDOR_SEARCH_PAGE_SIZE', default=20)
+VENDOR_SEARCH_MAX_PAGE_SIZE = env.int('VENDOR_SEARCH_MAX_PAGE_SIZE',
+                                      default=100)
+
+# Nearest vendors lookup defaults and limits, see `users.geo`.
+VENDOR_NEARBY_RESULTS = env.int('VENDOR_NEARBY_RESULTS', default=10)
+VENDOR_NEARBY_MAX_RESULTS = env.int('VENDOR_NEARBY_MAX_RESULTS', default=50)
+VENDOR_NEARBY_RADIUS_KM = env.float('VENDOR_NEARBY_RADIUS_KM', default=10)
+VENDOR_NEARBY_MAX_RADIUS_KM = env.float('VENDOR_NEARBY_MAX_RADIUS_KM',
+                                        default=100)
+
+# Rows fetched per round trip by the streaming User exports.
+USER_EXPORT_CHUNK_SIZE = env.int('USER_EXPORT_CHUNK_SIZE', default=2000)
+
+# The `UserAdmin` changelist shows planner row estimates instead of exact
+# counts from this many rows, see `users.changelist`.
+USER_ADMIN_COUNT_ESTIMATE_THRESHOLD = env.int(
+    'USER_ADMIN_COUNT_ESTIMATE_THRESHOLD', default=100000)
+
+# Set CACHE_URL to a cache shared by every process (memcached, Redis or a
+# database table) in production, local memory caches are per process.
+CACHES = {'default': env.cache('CACHE_URL', default='locmemcache://')}
+
+# Token and JWT authentication keep User snapshots in this cache, which must
+# be shared by every process for invalidation to work, see
+# `users.authentication`.
+AUTH_CACHE_ALIAS = env.str('AUTH_CACHE_ALIAS', default='default')
+AUTH_CACHE_TIMEOUT = env.int('AUTH_CACHE_TIMEOUT', default=60)
+
+# Request instrumentation by `home.perf.PerformanceMiddleware`.
+PERF_INSTRUMENTATION = env.bool('PERF_INSTRUMENTATION', default=True)
+# The Server-Timing header exposes query counts and timings to every client,
+# so it is only sent in development by default.
+PERF_SERVER_TIMING = env.bool('PERF_SERVER_TIMING', default=DEBUG)
+# Fraction of requests logged, slow requests are always logged.
+PERF_LOG_SAMPLE_RATE = env.float('PERF_LOG_SAMPLE_RATE', default=0.01)
+PERF_SLOW_REQUEST_MS = env.int('PERF_SLOW_REQUEST_MS', default=1000)
+
+# Prometheus metrics served at /metrics, see `home.metrics`. Requests are
+# measured by the instrumentation middleware above.
+METRICS_ENABLED = env.bool('METRICS_ENABLED', default=True)
+# Directory shared by the processes of one instance, e.g. the web server
+# and the queue workers, so /metrics reports their combined values.
+METRICS_MULTIPROCESS_DIR = env.str('METRICS_MULTIPROCESS_DIR', default='')
+METRICS_FLUSH_INTERVAL = env.int('METRICS_FLUSH_INTERVAL', default=5)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'home.perf': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+# Rendered home page, outdated by CustomText/HomePage saves. The version is
+# shared through the cache, so the page is only cached with a shared backend,
+# see `home.page_cache`.
+HOME_PAGE_CACHE_ALIAS = env.str('HOME_PAGE_CACHE_ALIAS', default='default')
+HOME_PAGE_CACHE_TIMEOUT = env.int('HOME_PAGE_CACHE_TIMEOUT', default=300)
+# How long an outdated page may still be served while it is rebuilt or the
+# database is unavailable.
+HOME_PAGE_CACHE_STALE_TIMEOUT = env.int(
+    'HOME_PAGE_CACHE_STALE_TIMEOUT', default=24 * 60 * 60)
+
 
 # `djoser` app is used for API User registration and authentication.
 DJOSER = {
@@ -214,13 +311,45 @@ SIMPLE_JWT = {
 }
 
 
+# API documentation
+SWAGGER_SETTINGS = {
+    'SPEC_URL': ('api_schema', {'extension': 'json'}),
+}
+# `manage.py build_openapi_schema` writes the served schema files here.
+OPENAPI_SCHEMA_DIR = env.str(
+    'OPENAPI_SCHEMA_DIR', default=os.path.join(BASE_DIR, 'openapi'))
+# Generate the schema in-process instead of serving the built files.
+OPENAPI_SCHEMA_REGENERATE = env.bool('OPENAPI_SCHEMA_REGENERATE', default=DEBUG)
+
+
 # Twilio App API
 ACCOUNT_SECURITY_API_KEY = env.str('ACCOUNT_SECURITY_API_KEY', default='')
+AUTHY_API_URI = env.str('AUTHY_API_URI', default='https://api.authy.com')
+# Keep-alive connections shared by all threads of the process.
+AUTHY_POOL_SIZE = env.int('AUTHY_POOL_SIZE', default=10)
+AUTHY_CONNECT_TIMEOUT = env.float('AUTHY_CONNECT_TIMEOUT', default=3.05)
+AUTHY_READ_TIMEOUT = env.float('AUTHY_READ_TIMEOUT', default=10)
+# Dotted path of a `requests` transport adapter replacing the network,
+# e.g. `users.authy_client.FakeAuthyAdapter` for tests and benchmarks.
+AUTHY_TRANSPORT = env.str('AUTHY_TRANSPORT', default='')
+
+# Parsed and validated phone numbers memoized by `users.phone`.
+PHONE_NUMBER_CACHE_SIZE = env.int('PHONE_NUMBER_CACHE_SIZE', default=4096)
+# `background` queues Vendor phone verifications for the
+# `dispatch_phone_verifications` worker, `sync` calls Authy in the request.
+AUTHY_DISPATCH_MODE = env.str('AUTHY_DISPATCH_MODE', default='background')
+AUTHY_DISPATCH_MAX_ATTEMPTS = env.int('AUTHY_DISPATCH_MAX_ATTEMPTS', default=5)
+# Seconds before the first retry, doubled on every following attempt.
+AUTHY_DISPATCH_RETRY_DELAY = env.int('AUTHY_DISPATCH_RETRY_DELAY', default=30)
+# Seconds a worker holds the dispatches it claimed, longer than a batch
+# of Authy calls takes, before other workers may retry them.
+AUTHY_DISPATCH_CLAIM_SECONDS = env.int('AUTHY_DISPATCH_CLAIM_SECONDS',
+                                       default=1800)
 
 
 if DEBUG:
     # output email to console instead of sending
-    EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
+    EMAIL_DELIVERY_BACKEND = "django.core.mail.backends.console.EmailBackend"
 
 
 try:
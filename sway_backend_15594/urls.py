@@ -14,11 +14,13 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from allauth.account.views import confirm_email
 from rest_framework import permissions
 from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
+
+from home.metrics import MetricsView
+from home.openapi import API_INFO, SchemaFileView
 
 urlpatterns = [
     path("", include("home.urls")),
@@ -29,6 +31,7 @@ urlpatterns = [
     path('api/auth/users/', include('users.urls', namespace='users')),
     path('api/auth/', include('djoser.urls')),
     path('api/auth/', include('djoser.urls.jwt')),
+    path("metrics", MetricsView.as_view(), name="metrics"),
 ]
 
 admin.site.site_header = "Sway Backend"
@@ -36,16 +39,15 @@ admin.site.site_title = "Sway Backend Admin Portal"
 admin.site.index_title = "Sway Backend Admin"
 
 # swagger
+# The UI only renders the page, it loads the schema from `api_schema`.
 schema_view = get_schema_view(
-    openapi.Info(
-        title="Sway Backend API",
-        default_version="v1",
-        description="API documentation for Sway Backend App",
-    ),
+    API_INFO,
     public=True,
     permission_classes=(permissions.IsAuthenticated,),
 )
 
 urlpatterns += [
-    path("api-docs/", schema_view.with_ui("swagger", cache_timeout=0), name="api_docs")
+    path("api-docs/", schema_view.with_ui("swagger", cache_timeout=0), name="api_docs"),
+    re_path(r"^api-docs/openapi\.(?P<extension>json|yaml)$",
+            SchemaFileView.as_view(), name="api_schema"),
 ]
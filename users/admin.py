@@ -2,6 +2,8 @@ from django.contrib import admin
 from django.contrib.auth import admin as auth_admin
 from django.contrib.auth import get_user_model
 
+from users.changelist import EstimatedCountPaginator
+from users.export import export_response
 from users.forms import UserChangeForm, UserCreationForm
 
 User = get_user_model()
@@ -21,6 +23,8 @@ class UserAdmin(auth_admin.UserAdmin):
                 'last_name',
                 'phone_number',
                 'business_name',
+                'latitude',
+                'longitude',
                 'authy_id',
             )
         }),
@@ -39,7 +43,24 @@ class UserAdmin(auth_admin.UserAdmin):
         'is_staff',
         'user_type',
     ]
-    search_fields = ["name"]
+    # Filters, search and ordering served by indexes, and no exact counts
+    # on large tables, see `users.changelist`.
+    list_filter = ['user_type', 'is_active', 'is_staff']
+    search_fields = ['^email', '^name']
+    ordering = ['-date_joined', '-id']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     readonly_fields = [
         'authy_id',
     ]
+    actions = ['export_ndjson', 'export_csv']
+
+    def export_ndjson(self, request, queryset):
+        return export_response(queryset, file_format='ndjson')
+    export_ndjson.short_description = 'Export selected users as NDJSON'
+    export_ndjson.allowed_permissions = ('view',)
+
+    def export_csv(self, request, queryset):
+        return export_response(queryset, file_format='csv')
+    export_csv.short_description = 'Export selected users as CSV'
+    export_csv.allowed_permissions = ('view',)
@@ -1,4 +1,6 @@
 from django.apps import AppConfig
+from django.core import checks
+from django.db.models.signals import post_migrate
 from django.utils.translation import gettext_lazy as _
 
 
@@ -7,6 +9,12 @@ class UsersConfig(AppConfig):
     verbose_name = _("Users")
 
     def ready(self):
+        from users.authentication import check_auth_cache
+        checks.register(check_auth_cache, checks.Tags.caches)
+        from users.changelist import install_sqlite_prefix_indexes
+        from users.search import install_sqlite_triggers
+        post_migrate.connect(install_sqlite_triggers, sender=self)
+        post_migrate.connect(install_sqlite_prefix_indexes, sender=self)
         try:
             import users.signals  # noqa F401
         except ImportError:
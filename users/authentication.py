@@ -0,0 +1,246 @@
+"""
+Cache-backed DRF authentication classes.
+
+Token and JWT authentication normally load the `Token` and `User` rows on
+every request. These classes keep a compact snapshot of the User row,
+without its password hash, in the `AUTH_CACHE_ALIAS` cache for
+`AUTH_CACHE_TIMEOUT` seconds, so a warm read request authenticates without
+touching the database. Snapshots are dropped by the `users.signals`
+receivers whenever a User is saved or deleted (which covers deactivation
+and password changes) and token mappings when a Token is deleted, again
+when the transaction commits so a snapshot cached meanwhile from the old
+row does not survive. `QuerySet.update()`, e.g.
+`update(is_active=False)`, bypasses those signals and is only picked up
+once the snapshot expires.
+
+Invalidation has to reach every process, so the cache is only used when
+`AUTH_CACHE_ALIAS` is a shared backend; with a per-process one such as
+`LocMemCache` every request reads the database and the `users.W001` check
+warns. Snapshots only serve safe methods: writes authenticate with a fresh
+User, so a stale snapshot is never saved back over newer data.
+
+`HeaderDispatchAuthentication` replaces the Session/Token/JWT tuple by
+picking exactly one of them from the `Authorization` header and cookies.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import ugettext_lazy as _
+
+from rest_framework import exceptions, permissions
+from rest_framework.authentication import (
+    BaseAuthentication,
+    SessionAuthentication,
+    TokenAuthentication,
+)
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .models import User
+
+
+SNAPSHOT_FIELDS = tuple(field.attname for field in User._meta.concrete_fields
+                        if field.attname != 'password')
+# Snapshots written by a different version of the User table are ignored.
+SNAPSHOT_VERSION = hashlib.md5(
+    ','.join(SNAPSHOT_FIELDS).encode()).hexdigest()[:8]
+
+
+# Backends whose entries other processes cannot see or invalidate.
+PROCESS_LOCAL_CACHES = (LocMemCache, DummyCache)
+
+
+def get_cache():
+    """The `AUTH_CACHE_ALIAS` cache, None when it is not shared."""
+    cache = caches[settings.AUTH_CACHE_ALIAS]
+    if isinstance(cache, PROCESS_LOCAL_CACHES):
+        return None
+    return cache
+
+
+def check_auth_cache(app_configs, **kwargs):
+    """Warn when the authentication cache is disabled by its backend."""
+    if get_cache() is not None:
+        return []
+    return [checks.Warning(
+        f'AUTH_CACHE_ALIAS "{settings.AUTH_CACHE_ALIAS}" is not shared '
+        f'between processes, Token and JWT authentication will not be '
+        f'cached.',
+        hint='Point it at a memcached, Redis or database cache.',
+        id='users.W001',
+    )]
+
+
+def use_snapshot(request):
+    """Whether `request` may be authenticated from a cached snapshot."""
+    return request.method in permissions.SAFE_METHODS and \
+        get_cache() is not None
+
+
+def user_cache_key(user_id):
+    return f'auth:user:{SNAPSHOT_VERSION}:{user_id}'
+
+
+def token_cache_key(key):
+    return f'auth:token:{key}'
+
+
+def snapshot(user):
+    """Tuple of the User column values, in `SNAPSHOT_FIELDS` order."""
+    return tuple(getattr(user, attname) for attname in SNAPSHOT_FIELDS)
+
+
+def cache_user(user):
+    get_cache().set(user_cache_key(user.pk), snapshot(user),
+        settings.AUTH_CACHE_TIMEOUT)
+
+
+def get_cached_user(user_id):
+    """
+    Return the User with `user_id`, from its cached snapshot when there is
+    one. Returns None when the User does not exist. Snapshots defer the
+    `password` and may be stale, they must not be saved.
+    """
+    values = get_cache().get(user_cache_key(user_id))
+    if values is not None:
+        return User.from_db(DEFAULT_DB_ALIAS, SNAPSHOT_FIELDS, values)
+    try:
+        user = User.objects.get(pk=user_id)
+    except (User.DoesNotExist, ValueError, TypeError):
+        return None
+    cache_user(user)
+    return user
+
+
+def invalidate_user(user_id):
+    cache = get_cache()
+    if cache is not None:
+        cache.delete(user_cache_key(user_id))
+
+
+def invalidate_token(key):
+    cache = get_cache()
+    if cache is not None:
+        cache.delete(token_cache_key(key))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """`TokenAuthentication` resolving token keys and users from the cache."""
+    cached = False
+
+    def authenticate(self, request):
+        self.cached = use_snapshot(request)
+        return super(CachedTokenAuthentication, self).authenticate(request)
+
+    def authenticate_credentials(self, key):
+        if not self.cached:
+            return super(CachedTokenAuthentication, self) \
+                .authenticate_credentials(key)
+        model = self.get_model()
+        cache = get_cache()
+        user_id = cache.get(token_cache_key(key))
+        if user_id is None:
+            try:
+                token = model.objects.select_related('user').get(key=key)
+            except model.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+            user = token.user
+            cache.set(token_cache_key(key), user.pk,
+                settings.AUTH_CACHE_TIMEOUT)
+            cache_user(user)
+        else:
+            user = get_cached_user(user_id)
+            if user is None:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+            token = model(key=key, user=user)
+
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        return (user, token)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """`JWTAuthentication` resolving the token `user_id` from the cache."""
+    cached = False
+
+    def authenticate(self, request):
+        self.cached = use_snapshot(request)
+        return super(CachedJWTAuthentication, self).authenticate(request)
+
+    def get_user(self, validated_token):
+        if not self.cached:
+            return super(CachedJWTAuthentication, self).get_user(
+                validated_token)
+        try:
+            user_id = validated_token[jwt_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _('Token contained no recognizable user identification'))
+
+        if jwt_settings.USER_ID_FIELD != User._meta.pk.attname:
+            return super(CachedJWTAuthentication, self).get_user(
+                validated_token)
+
+        user = get_cached_user(user_id)
+        if user is None:
+            raise exceptions.AuthenticationFailed(
+                _('User not found'), code='user_not_found')
+
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User is inactive'), code='user_inactive')
+
+        return user
+
+
+class HeaderDispatchAuthentication(BaseAuthentication):
+    """
+    Authenticate with the single backend matching the request credentials.
+
+    DRF tries every class of `DEFAULT_AUTHENTICATION_CLASSES` in order, so
+    API clients sending `Authorization: JWT ...` still pay for the session
+    lookup and CSRF check of `SessionAuthentication`. This class inspects
+    the `Authorization` keyword once and hands the request to the Token or
+    JWT backend only; session authentication, with its CSRF enforcement,
+    is used just for requests without a recognised header that carry the
+    session cookie.
+    """
+    token_authentication_class = CachedTokenAuthentication
+    jwt_authentication_class = CachedJWTAuthentication
+    session_authentication_class = SessionAuthentication
+
+    def __init__(self):
+        self.token_authentication = self.token_authentication_class()
+        self.jwt_authentication = self.jwt_authentication_class()
+        self.session_authentication = self.session_authentication_class()
+        self.jwt_keywords = set(jwt_settings.AUTH_HEADER_TYPES)
+
+    def get_backend(self, request):
+        header = request.META.get('HTTP_AUTHORIZATION', '').split(None, 1)
+        if header:
+            keyword = header[0]
+            # Matched ignoring case like `TokenAuthentication`, JWT header
+            # types are case-sensitive in simplejwt.
+            if keyword.lower() == self.token_authentication.keyword.lower():
+                return self.token_authentication
+            if keyword in self.jwt_keywords:
+                return self.jwt_authentication
+        if settings.SESSION_COOKIE_NAME in request.COOKIES:
+            return self.session_authentication
+        return None
+
+    def authenticate(self, request):
+        backend = self.get_backend(request)
+        if backend is None:
+            return None
+        return backend.authenticate(request)
+
+    def authenticate_header(self, request):
+        return self.jwt_authentication.authenticate_header(request)
@@ -0,0 +1,193 @@
+"""
+Process-wide Authy API client.
+
+`authy.api.AuthyApiClient` resources call `requests.request` directly, so
+every Twilio call pays for a new TCP and TLS handshake. `get_authy_client`
+returns one client per process whose resources share a `requests.Session`
+with a bounded keep-alive connection pool and explicit timeouts.
+"""
+import json
+import random
+import threading
+import time
+from urllib.parse import parse_qsl, urlparse
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from authy.api import AuthyApiClient
+
+from home.perf import timed_http
+
+
+class PooledAuthyApiClient(AuthyApiClient):
+    """
+    `AuthyApiClient` sending every resource request through one session.
+
+    `requests.Session` is safe to share between threads as long as its
+    configuration is not mutated, and the mounted adapter blocks once
+    `pool_size` connections are in use instead of opening more.
+    """
+    RESOURCES = ('users', 'tokens', 'apps', 'stats', 'phones', 'one_touch')
+
+    def __init__(self, api_key, api_uri='https://api.authy.com',
+                 adapter=None, pool_size=10, timeout=None):
+        super(PooledAuthyApiClient, self).__init__(api_key, api_uri)
+        if adapter is None:
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=pool_size,
+                pool_block=True,
+            )
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.mount(api_uri, adapter)
+        for name in self.RESOURCES:
+            resource = getattr(self, name)
+            resource.request = self._bind_request(resource)
+
+    def _bind_request(self, resource):
+        """Build a replacement for `Resource.request` using the session."""
+
+        def request(method, path, data={}, headers={}):
+            request_headers = dict(resource.def_headers)
+            request_headers.update(headers)
+            request_headers['X-Authy-API-Key'] = resource.api_key
+            url = resource.api_uri + path
+            with timed_http('authy') as call:
+                if method == 'GET':
+                    response = self.session.request(method, url,
+                        headers=request_headers, params=data,
+                        timeout=self.timeout)
+                else:
+                    response = self.session.request(method, url,
+                        headers=request_headers, data=json.dumps(data),
+                        timeout=self.timeout)
+                call.error = response.status_code >= 500
+            return response
+
+        return request
+
+    def close(self):
+        self.session.close()
+
+
+class FakeAuthyAdapter(BaseAdapter):
+    """
+    Stand-in transport answering Authy API calls without the network.
+
+    Verification checks only succeed with `verification_code`. A share of
+    `error_rate` requests fail with a 503 and every call sleeps `latency`
+    seconds, so tests and benchmarks can model a slow or flaky Twilio.
+    """
+    verification_code = '1234'
+
+    def __init__(self, latency=0, error_rate=0):
+        super(FakeAuthyAdapter, self).__init__()
+        self.latency = latency
+        self.error_rate = error_rate
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        with self._lock:
+            self.requests.append(request)
+        if self.latency:
+            time.sleep(self.latency)
+        if self.error_rate and random.random() < self.error_rate:
+            return self.build_response(request, 503, {
+                'success': False,
+                'message': 'Service unavailable',
+                'error_code': '60000',
+            })
+        status_code, content = self.route(request)
+        return self.build_response(request, status_code, content)
+
+    def route(self, request):
+        url = urlparse(request.url)
+        path = url.path
+        params = dict(parse_qsl(url.query))
+        if path.endswith('/phones/verification/start'):
+            return 200, {
+                'success': True,
+                'message': 'Text message sent.',
+                'is_cellphone': True,
+            }
+        if path.endswith('/phones/verification/check'):
+            if params.get('verification_code') == self.verification_code:
+                return 200, {
+                    'success': True,
+                    'message': 'Verification code is correct.',
+                }
+            return 401, {
+                'success': False,
+                'message': 'Verification code is incorrect',
+                'error_code': '60022',
+            }
+        if path.endswith('/users/new'):
+            return 200, {
+                'success': True,
+                'message': 'User created successfully.',
+                'user': {'id': 1000000 + len(self.requests)},
+            }
+        return 404, {'success': False, 'message': 'Not found'}
+
+    def build_response(self, request, status_code, content):
+        response = requests.Response()
+        response.status_code = status_code
+        response._content = json.dumps(content).encode('utf-8')
+        response.headers['Content-Type'] = 'application/json'
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def build_authy_client():
+    """Create a client configured from the `AUTHY_*` settings."""
+    adapter = None
+    if settings.AUTHY_TRANSPORT:
+        adapter = import_string(settings.AUTHY_TRANSPORT)()
+    return PooledAuthyApiClient(
+        settings.ACCOUNT_SECURITY_API_KEY,
+        api_uri=settings.AUTHY_API_URI,
+        adapter=adapter,
+        pool_size=settings.AUTHY_POOL_SIZE,
+        timeout=(settings.AUTHY_CONNECT_TIMEOUT, settings.AUTHY_READ_TIMEOUT),
+    )
+
+
+def get_authy_client():
+    """Return the shared Authy client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = build_authy_client()
+    return _client
+
+
+def reset_authy_client():
+    """Drop the shared client so the next call rebuilds it."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+
+
+@receiver(setting_changed)
+def reset_authy_client_on_setting_changed(setting, **kwargs):
+    if setting == 'ACCOUNT_SECURITY_API_KEY' or setting.startswith('AUTHY_'):
+        reset_authy_client()
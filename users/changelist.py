@@ -0,0 +1,140 @@
+"""
+`UserAdmin` changelist support for large `users_user` tables.
+
+Django's admin paginator counts the matching rows with `COUNT(*)`, which
+reads the whole table or index. `EstimatedCountPaginator` reports a
+planner row estimate instead for results of at least
+`USER_ADMIN_COUNT_ESTIMATE_THRESHOLD` rows, filtered and searched ones
+only once a count capped at the threshold reached it:
+
+* PostgreSQL: the `Plan Rows` of `EXPLAIN`, for any queryset.
+* SQLite: the table size recorded in `sqlite_stat1` by `ANALYZE`, for
+  unfiltered querysets only; larger filtered results are counted exactly.
+
+Search matches an email or name prefix with `email__istartswith` and
+`name__istartswith`, served by the `users_user_email_prefix_idx` and
+`users_user_name_prefix_idx` indexes created by the
+`0011_user_admin_indexes` and `0012_user_name_prefix_index` migrations:
+`UPPER(column) text_pattern_ops` on PostgreSQL and `column COLLATE NOCASE`
+for the SQLite `LIKE` optimisation. Django rebuilds SQLite tables to alter
+them, dropping indexes it does not know about, so
+`install_sqlite_prefix_indexes` recreates them after every `migrate`.
+"""
+import json
+
+from django.conf import settings
+from django.core.paginator import EmptyPage, Paginator
+from django.db import DatabaseError, connections
+from django.utils.functional import cached_property
+
+
+SQLITE_PREFIX_INDEXES = [
+    """
+    CREATE INDEX IF NOT EXISTS users_user_email_prefix_idx
+    ON users_user (email COLLATE NOCASE)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS users_user_name_prefix_idx
+    ON users_user (name COLLATE NOCASE)
+    """,
+]
+
+
+def install_sqlite_prefix_indexes(using='default', **kwargs):
+    """`post_migrate` receiver creating the missing search prefix indexes."""
+    db = connections[using]
+    if db.vendor != 'sqlite':
+        return
+    with db.cursor() as cursor:
+        if 'users_user' in db.introspection.table_names(cursor):
+            for sql in SQLITE_PREFIX_INDEXES:
+                cursor.execute(sql)
+
+
+def postgres_estimate(queryset, cursor):
+    sql, params = queryset.order_by().query.sql_with_params()
+    cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+    plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def sqlite_estimate(queryset, cursor):
+    if queryset.query.where:
+        return None
+    try:
+        cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1',
+                       [queryset.model._meta.db_table])
+    except DatabaseError:
+        # `sqlite_stat1` only exists once `ANALYZE` has run.
+        return None
+    row = cursor.fetchone()
+    return int(row[0].split()[0]) if row else None
+
+
+ESTIMATORS = {
+    'postgresql': postgres_estimate,
+    'sqlite': sqlite_estimate,
+}
+
+
+def estimate_count(queryset):
+    """Planner row estimate of `queryset`, None when there is none."""
+    db = connections[queryset.db]
+    estimator = ESTIMATORS.get(db.vendor)
+    if estimator is None:
+        return None
+    with db.cursor() as cursor:
+        return estimator(queryset, cursor)
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator reporting a planner estimate as its `count` for results of at
+    least `threshold` rows.
+
+    Unfiltered querysets use the table estimate. Planner estimates of
+    filters and searches can be off by orders of magnitude, so those are
+    first counted up to `threshold` rows with a `LIMIT`; only larger
+    results use their estimate, never below `threshold`. Estimates may be
+    low when statistics are stale, so with one any page number is served
+    from its offset, coming back empty past the real last page.
+    """
+    estimated = False
+
+    def __init__(self, *args, threshold=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if threshold is None:
+            threshold = settings.USER_ADMIN_COUNT_ESTIMATE_THRESHOLD
+        self.threshold = threshold
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if queryset.query.where:
+            capped = queryset.order_by()[:self.threshold].count()
+            if capped < self.threshold:
+                return capped
+        estimate = estimate_count(queryset)
+        if estimate is None or estimate < self.threshold:
+            return super().count
+        self.estimated = True
+        return max(estimate, self.threshold)
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            # `count` is estimated, pages past it may still hold rows.
+            if self.estimated and int(number) >= 1:
+                return int(number)
+            raise
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if not self.estimated:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(
+            self.object_list[bottom:bottom + self.per_page], number, self)
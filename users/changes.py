@@ -0,0 +1,123 @@
+"""
+Incremental change feed of `users.User`.
+
+Clients keep the opaque cursor of their last poll and receive the Users
+saved since then, plus tombstones for the deleted ones, instead of whole
+snapshots. Users are read in `(updated_at, id)` order and tombstones in
+`(deleted_at, id)` order, each with a keyset seek on its index, so a poll
+where nothing changed is two empty index range scans.
+
+A row's `updated_at` is taken before its transaction commits, so a feed
+reading up to "now" could move its cursor past a row still waiting to
+commit. Reads therefore stop `USER_CHANGES_SETTLE_SECONDS` before now
+and, on PostgreSQL, before the start of the oldest transaction that has
+written and not yet committed (`oldest_write_started_at`). Elsewhere the
+settle delay is all there is: a transaction committing more than that
+after its save, such as a long import or admin bulk action, is missed
+by clients whose cursor already moved past it. Saves through
+`QuerySet.update()` do not touch `updated_at` and are not reported.
+"""
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import User, UserTombstone
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(position):
+    """Opaque cursor of a `{'users': (updated_at, id), 'deleted': ...}`."""
+    data = {key: [value[0].isoformat(), value[1]]
+            for key, value in position.items() if value is not None}
+    return urlsafe_b64encode(json.dumps(data).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Position encoded by `encode_cursor`, raises `InvalidCursor`."""
+    position = {'users': None, 'deleted': None}
+    if not cursor:
+        return position
+    try:
+        data = json.loads(urlsafe_b64decode(cursor.encode()))
+        for key in data:
+            if key not in position:
+                raise InvalidCursor(cursor)
+            timestamp, pk = data[key]
+            timestamp = parse_datetime(timestamp)
+            if timestamp is None:
+                raise InvalidCursor(cursor)
+            position[key] = (timestamp, int(pk))
+    except (TypeError, ValueError) as exc:
+        raise InvalidCursor(cursor) from exc
+    return position
+
+
+def seek(queryset, field, position, until):
+    """Rows of `queryset` after `position` and up to `until` in key order."""
+    queryset = queryset.filter(**{f'{field}__lte': until}).order_by(field, 'id')
+    if position is None:
+        return queryset
+    timestamp, pk = position
+    # The redundant lower bound starts an index range scan at the key.
+    return queryset.filter(
+        Q(**{f'{field}__gte': timestamp}) & (
+            Q(**{f'{field}__gt': timestamp}) | Q(id__gt=pk)))
+
+
+def oldest_write_started_at():
+    """
+    Start of the oldest other transaction holding uncommitted writes on
+    PostgreSQL, None when there is none or the database cannot tell.
+    `pg_stat_activity` only shows sessions of the same role, which the
+    application's connections share.
+    """
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT min(xact_start) FROM pg_stat_activity '
+            'WHERE backend_xid IS NOT NULL AND pid <> pg_backend_pid()')
+        return cursor.fetchone()[0]
+
+
+def get_changes(cursor=None, users=None, limit=None):
+    """
+    Users saved and deleted after `cursor`, at most `limit` of each. Returns
+    `(changed_users, deleted_user_ids, next_cursor, has_more)`; `users`
+    restricts the feed to a User queryset, without tombstones.
+    """
+    limit = limit or settings.USER_CHANGES_PAGE_SIZE
+    position = decode_cursor(cursor)
+    until = timezone.now()
+    oldest_write = oldest_write_started_at()
+    if oldest_write is not None:
+        until = min(until, oldest_write)
+    until -= timedelta(seconds=settings.USER_CHANGES_SETTLE_SECONDS)
+
+    changed = list(seek(User.objects.all() if users is None else users,
+                        'updated_at', position['users'], until)[:limit + 1])
+    has_more = len(changed) > limit
+    changed = changed[:limit]
+    if changed:
+        position['users'] = (changed[-1].updated_at, changed[-1].pk)
+
+    deleted = []
+    if users is None:
+        deleted = list(seek(UserTombstone.objects.all(), 'deleted_at',
+                            position['deleted'], until)[:limit + 1])
+        has_more = has_more or len(deleted) > limit
+        deleted = deleted[:limit]
+        if deleted:
+            position['deleted'] = (deleted[-1].deleted_at, deleted[-1].pk)
+
+    return (changed, [tombstone.user_id for tombstone in deleted],
+            encode_cursor(position), has_more)
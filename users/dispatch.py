@@ -0,0 +1,114 @@
+"""
+Background delivery of Authy phone verifications.
+
+`queue_phone_verification` records the request next to the User row and
+`drain` is called by the `dispatch_phone_verifications` worker to send the
+queued requests to the Twilio API, retrying failures with backoff.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .authy_client import get_authy_client
+from .models import PhoneVerificationDispatch
+
+
+logger = logging.getLogger(__name__)
+
+
+def queue_phone_verification(user):
+    """Create a pending verification request for the `user` phone number."""
+    return PhoneVerificationDispatch.objects.create(
+        user=user,
+        phone_number=user.phone_number,
+    )
+
+
+def retry_delay(attempts):
+    """Exponential backoff in seconds after `attempts` failed deliveries."""
+    return settings.AUTHY_DISPATCH_RETRY_DELAY * 2 ** max(attempts - 1, 0)
+
+
+def deliver(dispatch, retry=True):
+    """
+    Call Authy `verification_start` for a single dispatch and record the
+    outcome. Returns True when the verification SMS was accepted.
+
+    Without `retry` a failed dispatch is marked failed right away, so no
+    worker sends it later.
+    """
+    phone_number = dispatch.phone_number
+    authy_api = get_authy_client()
+    dispatch.attempts += 1
+    try:
+        authy_phone = authy_api.phones.verification_start(
+            phone_number.national_number,
+            phone_number.country_code
+        )
+        ok = authy_phone.ok()
+        error = '' if ok else str(authy_phone.errors())
+    except Exception as exc:
+        logger.warning('Authy verification_start failed: %s', exc)
+        ok = False
+        error = str(exc)
+
+    if ok:
+        dispatch.status = PhoneVerificationDispatch.STATUS_SENT
+        dispatch.last_error = ''
+    elif (not retry or
+            dispatch.attempts >= settings.AUTHY_DISPATCH_MAX_ATTEMPTS):
+        dispatch.status = PhoneVerificationDispatch.STATUS_FAILED
+        dispatch.last_error = error
+    else:
+        dispatch.last_error = error
+        dispatch.next_attempt_at = timezone.now() + timedelta(
+            seconds=retry_delay(dispatch.attempts))
+    dispatch.save(update_fields=[
+        'status', 'attempts', 'next_attempt_at', 'last_error', 'updated_at',
+    ])
+    return ok
+
+
+def claim(batch_size):
+    """
+    Lease up to `batch_size` due dispatches to this worker in a short
+    transaction. Rows are locked with `SKIP LOCKED` where the database
+    supports it while their `next_attempt_at` is pushed back by
+    `AUTHY_DISPATCH_CLAIM_SECONDS`, so other workers skip them until the
+    outcome is recorded or the lease runs out after a crash.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        dispatches = list(
+            PhoneVerificationDispatch.objects
+            .select_for_update(skip_locked=True)
+            .filter(
+                status=PhoneVerificationDispatch.STATUS_PENDING,
+                next_attempt_at__lte=now,
+            )
+            .order_by('next_attempt_at')[:batch_size]
+        )
+        PhoneVerificationDispatch.objects.filter(
+            pk__in=[dispatch.pk for dispatch in dispatches],
+        ).update(
+            next_attempt_at=now + timedelta(
+                seconds=settings.AUTHY_DISPATCH_CLAIM_SECONDS),
+            updated_at=now,
+        )
+    return dispatches
+
+
+def drain(batch_size=100):
+    """
+    Deliver up to `batch_size` due dispatches. Authy is called outside any
+    transaction and each outcome is saved on its own, so no row lock or
+    transaction is held across the HTTP calls. Returns the number of
+    processed rows.
+    """
+    dispatches = claim(batch_size)
+    for dispatch in dispatches:
+        deliver(dispatch)
+    return len(dispatches)
@@ -0,0 +1,195 @@
+"""
+Nearest vendor lookup on a fixed latitude/longitude grid.
+
+Active vendors with coordinates store the id of their `GRID_CELL_DEGREES`
+grid cell in the indexed `User.geo_cell` column, computed on save and left
+empty for every other User, so the index holds exactly the searchable rows.
+Cells are numbered row by row, so the cells of a bounding box are one
+`BETWEEN` range per grid row and are read with index range scans.
+`nearest_vendors` searches a box around the point and doubles it until it
+holds `k` vendors within its inscribed circle or reaches the search radius,
+reading dense boxes in order of a planar distance bound computed by the
+database; no spatial database extension is needed.
+"""
+import math
+
+from django.db.models import ExpressionWrapper, F, FloatField, Q
+
+
+# Changing the cell size requires recomputing every stored `geo_cell`.
+GRID_CELL_DEGREES = 0.01
+GRID_ROWS = round(180 / GRID_CELL_DEGREES)
+GRID_COLUMNS = round(360 / GRID_CELL_DEGREES)
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+# Margin for the planar approximation of `lower_bound`, far larger than its
+# error within the largest searched radius outside the polar caps.
+LOWER_BOUND_SLACK = 0.99
+# Boxes holding more than this many rows per requested vendor are read in
+# order of `lower_bound` instead of whole, sorting only pays off when most
+# rows can be skipped.
+DENSE_BOX_FACTOR = 8
+
+
+def grid_row(latitude):
+    return min(math.floor((latitude + 90) / GRID_CELL_DEGREES), GRID_ROWS - 1)
+
+
+def grid_column(longitude):
+    return math.floor((longitude + 180) / GRID_CELL_DEGREES) % GRID_COLUMNS
+
+
+def grid_cell(latitude, longitude):
+    """Grid cell id of a point, None unless both coordinates are set."""
+    if latitude is None or longitude is None:
+        return None
+    return grid_row(latitude) * GRID_COLUMNS + grid_column(longitude)
+
+
+def distance_km(latitude1, longitude1, latitude2, longitude2):
+    """Great-circle distance with the haversine formula."""
+    phi1, phi2 = math.radians(latitude1), math.radians(latitude2)
+    delta_phi = phi2 - phi1
+    delta_lambda = math.radians(longitude2 - longitude1)
+    a = (math.sin(delta_phi / 2) ** 2 +
+         math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def box_columns(latitude, longitude, radius_km):
+    """
+    `(south, north, columns)` of the box around every point within
+    `radius_km` of the given one, `columns` being `(west, east)` grid
+    column spans, two when it crosses the antimeridian.
+    """
+    delta_latitude = radius_km / KM_PER_DEGREE
+    south = max(latitude - delta_latitude, -90.0)
+    north = min(latitude + delta_latitude, 90.0)
+    # Meridians converge, the widest span is needed at the polar edge.
+    widest = max(abs(south), abs(north))
+    cos_latitude = math.cos(math.radians(widest))
+    if north >= 90.0 or south <= -90.0 or \
+            radius_km >= KM_PER_DEGREE * 180 * cos_latitude:
+        return south, north, [(0, GRID_COLUMNS - 1)]
+    delta_longitude = radius_km / (KM_PER_DEGREE * cos_latitude)
+    west = grid_column(longitude - delta_longitude)
+    east = grid_column(longitude + delta_longitude)
+    if west <= east:
+        return south, north, [(west, east)]
+    # The box crosses the antimeridian.
+    return south, north, [(west, GRID_COLUMNS - 1), (0, east)]
+
+
+def box_cells(latitude, longitude, radius_km):
+    """
+    `(first, last)` cell id ranges of the grid rows covering every point
+    within `radius_km` of the given one.
+    """
+    south, north, columns = box_columns(latitude, longitude, radius_km)
+    ranges = []
+    for row in range(grid_row(south), grid_row(north) + 1):
+        offset = row * GRID_COLUMNS
+        ranges += [(offset + west, offset + east) for west, east in columns]
+    return ranges
+
+
+def lower_bound(latitude, longitude, south, north):
+    """
+    Squared planar distance in degrees from the point, scaling longitudes
+    by the cosine of the box edge nearest to a pole. Within a box that does
+    not wrap, it is a lower bound of the squared great-circle distance up
+    to `LOWER_BOUND_SLACK`.
+    """
+    scale = math.cos(math.radians(max(abs(south), abs(north))))
+    delta_latitude = F('latitude') - latitude
+    delta_longitude = (F('longitude') - longitude) * scale
+    return ExpressionWrapper(
+        delta_latitude * delta_latitude + delta_longitude * delta_longitude,
+        output_field=FloatField())
+
+
+def vendors_within(latitude, longitude, radius_km, k):
+    """
+    `(distance_km, id)` of the up to `k` active vendors nearest to the
+    point within `radius_km`, closest first.
+
+    Boxes are read whole with plain index range scans unless they hold
+    more than `DENSE_BOX_FACTOR * k` rows. Dense boxes are then read in
+    order of the planar lower bound of their rows, `4k` at first and four
+    times as many while a closer vendor could still follow. Boxes crossing
+    the antimeridian or reaching a pole, where the bound does not hold, are
+    always read whole.
+    """
+    from .models import User
+
+    def closest(batch):
+        found = []
+        for pk, row_latitude, row_longitude, user_type, is_active, *bound \
+                in batch:
+            # Cells and coordinates left behind by `QuerySet.update()` are
+            # skipped.
+            if user_type != User.TYPE_VENDOR or not is_active or \
+                    row_latitude is None or row_longitude is None:
+                continue
+            distance = distance_km(latitude, longitude,
+                                   row_latitude, row_longitude)
+            if distance <= radius_km:
+                found.append((distance, pk))
+        return sorted(found)[:k]
+
+    south, north, columns = box_columns(latitude, longitude, radius_km)
+    cells = Q()
+    for first, last in box_cells(latitude, longitude, radius_km):
+        cells |= Q(geo_cell__range=(first, last))
+    # Filtering on the type and activity in the query could make the
+    # database pick their indexes over `geo_cell`.
+    rows = User.objects.filter(cells)
+    fields = ['id', 'latitude', 'longitude', 'user_type', 'is_active']
+    bounded = len(columns) == 1 and \
+        columns[0][1] - columns[0][0] < GRID_COLUMNS - 1
+    limit = DENSE_BOX_FACTOR * k + 1 if bounded else None
+    batch = list(rows.values_list(*fields)[:limit])
+    if limit is None or len(batch) < limit:
+        return closest(batch)
+
+    radius_degrees = radius_km / KM_PER_DEGREE / LOWER_BOUND_SLACK
+    rows = rows.annotate(
+        bound=lower_bound(latitude, longitude, south, north),
+    ).filter(bound__lte=radius_degrees ** 2).order_by('bound')
+    limit = 4 * k
+    while True:
+        batch = list(rows.values_list(*fields, 'bound')[:limit])
+        found = closest(batch)
+        if len(batch) < limit:
+            return found
+        # Rows not read yet are at least this far away.
+        bound_km = math.sqrt(batch[-1][-1]) * KM_PER_DEGREE * LOWER_BOUND_SLACK
+        if len(found) == k and found[-1][0] <= bound_km:
+            return found
+        limit *= 4
+
+
+def nearest_vendors(latitude, longitude, k, radius_km,
+                    start_km=GRID_CELL_DEGREES * KM_PER_DEGREE):
+    """
+    The `k` active vendors nearest to the point within `radius_km`,
+    closest first, as Users annotated with their `distance_km`.
+    """
+    from .models import User
+
+    search_km = min(start_km, radius_km)
+    while True:
+        found = vendors_within(latitude, longitude, search_km, k)
+        # Vendors outside the searched circle can only be farther away.
+        if len(found) >= k or search_km >= radius_km:
+            break
+        search_km = min(search_km * 2, radius_km)
+
+    vendors = User.objects.in_bulk([pk for distance, pk in found])
+    nearest = []
+    for distance, pk in found:
+        # Vendors deleted since they were found are left out.
+        if pk in vendors:
+            vendors[pk].distance_km = distance
+            nearest.append(vendors[pk])
+    return nearest
@@ -0,0 +1,195 @@
+"""
+Transactional email outbox.
+
+`OutboxEmailBackend` is configured as the Django `EMAIL_BACKEND`, so every
+djoser activation, confirmation and password reset email is written to the
+`OutboxEmail` table in the caller's transaction instead of talking to SMTP.
+`drain` is called by the `send_queued_email` worker to deliver the queued
+messages in batches over one connection of `EMAIL_DELIVERY_BACKEND`.
+"""
+import email
+import email.message
+import logging
+import smtplib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import transaction
+from django.utils import timezone
+
+from home.metrics import EMAILS
+
+from .models import OutboxEmail
+
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxEmailBackend(BaseEmailBackend):
+    """Email backend storing messages in the `OutboxEmail` table."""
+
+    def send_messages(self, email_messages):
+        outbox = [
+            OutboxEmail(
+                from_email=message.from_email,
+                recipients='\n'.join(message.recipients()),
+                subject=message.subject[:255],
+                message=message.message().as_bytes(),
+            )
+            for message in email_messages
+            if message.recipients()
+        ]
+        OutboxEmail.objects.bulk_create(outbox)
+        transaction.on_commit(
+            lambda: EMAILS.inc(len(outbox), status='queued'))
+        return len(outbox)
+
+
+class QueuedMIMEMessage(email.message.Message):
+    """Parsed outbox message serializable like Django's `SafeMIMEMessage`."""
+
+    def as_bytes(self, unixfrom=False, linesep='\n'):
+        policy = self.policy.clone(linesep=linesep)
+        return super(QueuedMIMEMessage, self).as_bytes(unixfrom, policy=policy)
+
+
+class QueuedEmailMessage(EmailMessage):
+    """`EmailMessage` replaying the MIME message stored in the outbox."""
+
+    def __init__(self, outbox_email):
+        super(QueuedEmailMessage, self).__init__(
+            subject=outbox_email.subject,
+            from_email=outbox_email.from_email,
+            to=outbox_email.recipients.splitlines(),
+        )
+        self.raw_message = bytes(outbox_email.message)
+
+    def message(self):
+        return email.message_from_bytes(self.raw_message,
+                    _class=QueuedMIMEMessage)
+
+
+def retry_delay(attempts):
+    """Exponential backoff in seconds after `attempts` failed deliveries."""
+    return settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** max(attempts - 1, 0)
+
+
+def record_attempt(outbox_email, error=''):
+    """Store the outcome of a delivery attempt, scheduling any retry."""
+    outbox_email.attempts += 1
+    if not error:
+        outbox_email.status = OutboxEmail.STATUS_SENT
+        outbox_email.sent_at = timezone.now()
+    elif outbox_email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        outbox_email.status = OutboxEmail.STATUS_FAILED
+    else:
+        outbox_email.next_attempt_at = timezone.now() + timedelta(
+            seconds=retry_delay(outbox_email.attempts))
+    outbox_email.last_error = error
+    outbox_email.save(update_fields=[
+        'status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at',
+    ])
+    if outbox_email.status == OutboxEmail.STATUS_PENDING:
+        EMAILS.inc(status='retry')
+    else:
+        EMAILS.inc(status=outbox_email.status)
+
+
+def connection_lost(exc):
+    """
+    Whether a send failed because of the connection rather than the
+    message, e.g. a refused recipient, which `smtplib` also reports as an
+    `OSError`.
+    """
+    if isinstance(exc, smtplib.SMTPServerDisconnected):
+        return True
+    return isinstance(exc, OSError) and \
+        not isinstance(exc, smtplib.SMTPException)
+
+
+def deliver(connection, outbox_email):
+    """
+    Send a single queued message over the open `connection` and record the
+    outcome. Returns None when the message was accepted, else the error.
+    """
+    try:
+        connection.send_messages([QueuedEmailMessage(outbox_email)])
+    except Exception as exc:
+        logger.warning('Sending queued email %s failed: %s',
+            outbox_email.pk, exc)
+        record_attempt(outbox_email, str(exc) or repr(exc))
+        return exc
+    record_attempt(outbox_email)
+    return None
+
+
+def claim(batch_size):
+    """
+    Lease up to `batch_size` due messages to this worker in a short
+    transaction. Rows are locked with `SKIP LOCKED` where the database
+    supports it while their `next_attempt_at` is pushed back by
+    `EMAIL_OUTBOX_CLAIM_SECONDS`, so other workers skip them until the
+    outcome is recorded or the lease runs out after a crash.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        outbox = list(
+            OutboxEmail.objects
+            .select_for_update(skip_locked=True)
+            .filter(
+                status=OutboxEmail.STATUS_PENDING,
+                next_attempt_at__lte=now,
+            )
+            .order_by('next_attempt_at')[:batch_size]
+        )
+        OutboxEmail.objects.filter(
+            pk__in=[outbox_email.pk for outbox_email in outbox],
+        ).update(next_attempt_at=now + timedelta(
+            seconds=settings.EMAIL_OUTBOX_CLAIM_SECONDS))
+    return outbox
+
+
+def open_connection(connection, outbox):
+    """
+    Open `connection`, or record the failed attempt of every message left
+    in `outbox` when the server cannot be reached. Returns True when open.
+    """
+    try:
+        connection.open()
+    except Exception as exc:
+        logger.warning('Opening the email connection failed: %s', exc)
+        for outbox_email in outbox:
+            record_attempt(outbox_email, str(exc) or repr(exc))
+        return False
+    return True
+
+
+def drain(batch_size=100):
+    """
+    Deliver up to `batch_size` due messages over a single connection,
+    reopened only when the server drops it. Messages are sent outside any
+    transaction and each outcome is saved on its own. Returns the number
+    of processed rows.
+    """
+    outbox = claim(batch_size)
+    if not outbox:
+        return 0
+
+    connection = get_connection(settings.EMAIL_DELIVERY_BACKEND)
+    pending = iter(outbox)
+    try:
+        if not open_connection(connection, pending):
+            return len(outbox)
+        for outbox_email in pending:
+            error = deliver(connection, outbox_email)
+            if error is not None and connection_lost(error):
+                # Refused recipients keep the connection usable, only
+                # reconnect once it is gone.
+                connection.close()
+                if not open_connection(connection, pending):
+                    break
+    finally:
+        connection.close()
+    return len(outbox)
@@ -0,0 +1,281 @@
+import csv
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError
+from django.core.management.base import BaseCommand
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+
+from allauth.account.models import EmailAddress
+from phonenumber_field.serializerfields import PhoneNumberField
+
+from users.models import User, allocate_usernames
+from users.phone import build_phone_number
+
+
+USER_FIELDS = (
+    'first_name',
+    'last_name',
+    'name',
+    'address',
+    'business_name',
+)
+
+TRUE_VALUES = ('1', 'true', 'yes', 'y', 't', 'on')
+FALSE_VALUES = ('0', 'false', 'no', 'n', 'f', 'off')
+
+
+def parse_bool(value, default):
+    """
+    Parse a boolean cell, `default` when it is missing. Raises `ValueError`
+    for anything outside the true/false vocabulary.
+    """
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str):
+        if value.strip().lower() in TRUE_VALUES:
+            return True
+        if value.strip().lower() in FALSE_VALUES:
+            return False
+    raise ValueError(f'"{value}" is not a valid boolean.')
+
+
+def init_worker():
+    """Make sure Django is configured in spawned hashing processes."""
+    django.setup()
+
+
+def read_rows(stream, data_format):
+    """Yield `(line_number, row)` pairs without loading the whole file."""
+    if data_format == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for line_number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as exc:
+                row = {'_raw': line, '_error': str(exc)}
+            else:
+                if not isinstance(row, dict):
+                    row = {'_raw': line, '_error': 'Expected a JSON object.'}
+            yield line_number, row
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk import Vendor and Customer users from a CSV or NDJSON file. '
+        'Rows failing validation are written to a rejects file.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or NDJSON file to import.')
+        parser.add_argument(
+            '--format', dest='format', choices=('csv', 'ndjson'), default=None,
+            help='Input format, guessed from the file extension by default.',
+        )
+        parser.add_argument(
+            '--rejects', dest='rejects', default=None,
+            help='NDJSON file receiving rejected rows with their errors. '
+                 'Defaults to `<path>.rejects.ndjson`.',
+        )
+        parser.add_argument(
+            '--chunk-size', dest='chunk_size', type=int, default=1000,
+            help='Number of rows inserted per transaction.',
+        )
+        parser.add_argument(
+            '--workers', dest='workers', type=int, default=None,
+            help='Password hashing processes, defaults to the CPU count.',
+        )
+        parser.add_argument(
+            '--verified', dest='verified', action='store_true', default=False,
+            help='Mark the imported email addresses as verified.',
+        )
+
+    def handle(self, *args, **options):
+        path = options.get('path')
+        data_format = options.get('format')
+        if data_format is None:
+            data_format = 'csv' if path.lower().endswith('.csv') else 'ndjson'
+        rejects_path = options.get('rejects') or f'{path}.rejects.ndjson'
+        self.chunk_size = options.get('chunk_size')
+        self.workers = options.get('workers') or os.cpu_count() or 1
+        self.verified = options.get('verified')
+
+        try:
+            stream = open(path, newline='', encoding='utf-8')
+        except OSError as exc:
+            raise CommandError(f'Cannot open {path}: {exc}')
+
+        self.imported = self.rejected = 0
+        # Lowercased emails and phone numbers read so far from the file.
+        self.emails, self.phones = set(), set()
+        rows = read_rows(stream, data_format)
+        with stream, open(rejects_path, 'w', encoding='utf-8') as rejects, \
+                ProcessPoolExecutor(max_workers=self.workers,
+                                    initializer=init_worker) as pool:
+            self.rejects = rejects
+            self.pool = pool
+            while True:
+                chunk = list(itertools.islice(rows, self.chunk_size))
+                if not chunk:
+                    break
+                self.import_chunk(chunk)
+
+        self.stdout.write(
+            f'Imported {self.imported} user(s), rejected {self.rejected}.')
+        if self.rejected:
+            self.stdout.write(f'Rejected rows written to {rejects_path}.')
+
+    def reject(self, line_number, row, errors):
+        self.rejected += 1
+        self.rejects.write(json.dumps({
+            'line': line_number,
+            'row': row,
+            'errors': errors,
+        }, default=str) + '\n')
+
+    def clean_row(self, row):
+        """Validate a raw row, returning `(user_kwargs, errors)`."""
+        if '_error' in row:
+            return None, {'row': [row['_error']]}
+
+        errors = {}
+        email = (row.get('email') or '').strip()
+        try:
+            validate_email(email)
+        except ValidationError as exc:
+            errors['email'] = exc.messages
+        email = User.objects.normalize_email(email)
+
+        user_type = row.get('user_type') or User.TYPE_CUSTOMER
+        if user_type not in dict(User.USER_TYPES_CHOICES):
+            errors['user_type'] = [f'"{user_type}" is not a valid choice.']
+
+        phone_number = None
+        if row.get('phone_number'):
+            phone_number, is_valid = build_phone_number(
+                row.get('country_code') or '', row['phone_number'])
+            if phone_number and not is_valid:
+                errors['phone_number'] = [
+                    PhoneNumberField.default_error_messages['invalid']]
+        elif user_type == User.TYPE_VENDOR:
+            errors['phone_number'] = ['This field is required.']
+
+        try:
+            is_active = parse_bool(row.get('is_active'), default=True)
+        except ValueError as exc:
+            errors['is_active'] = [str(exc)]
+            is_active = True
+        kwargs = {
+            'email': email,
+            'user_type': user_type,
+            'phone_number': phone_number or None,
+            'is_active': is_active,
+            'password': row.get('password') or None,
+        }
+        for field in USER_FIELDS:
+            kwargs[field] = (row.get(field) or '').strip()
+        kwargs['name'] = kwargs['name'] or None
+        return kwargs, errors
+
+    def import_chunk(self, chunk):
+        valid = []
+        emails, phones = self.emails, self.phones
+        for line_number, row in chunk:
+            kwargs, errors = self.clean_row(row)
+            if not errors:
+                # Duplicates inside the file are rejected like existing ones,
+                # ignoring case like allauth's email lookups.
+                if kwargs['email'].lower() in emails:
+                    errors['email'] = ['Duplicate email in import file.']
+                phone = str(kwargs['phone_number'] or '')
+                if phone and phone in phones:
+                    errors['phone_number'] = [
+                        'Duplicate phone number in import file.']
+            if errors:
+                self.reject(line_number, row, errors)
+                continue
+            emails.add(kwargs['email'].lower())
+            if kwargs['phone_number']:
+                phones.add(str(kwargs['phone_number']))
+            valid.append((line_number, row, kwargs))
+
+        existing_emails = set(
+            User.objects.filter(
+                email__in=[kwargs['email'] for _, _, kwargs in valid])
+            .values_list('email', flat=True))
+        existing_phones = set(
+            str(phone) for phone in
+            User.objects.filter(phone_number__in=[
+                kwargs['phone_number'] for _, _, kwargs in valid
+                if kwargs['phone_number']])
+            .values_list('phone_number', flat=True))
+        new = []
+        for line_number, row, kwargs in valid:
+            if kwargs['email'] in existing_emails:
+                self.reject(line_number, row,
+                    {'email': ['User with this email already exists.']})
+            elif str(kwargs['phone_number'] or '') in existing_phones:
+                self.reject(line_number, row, {'phone_number': [
+                    'User with this phone number already exists.']})
+            else:
+                new.append((line_number, row, kwargs))
+        if not new:
+            return
+
+        passwords = [kwargs.pop('password') for _, _, kwargs in new]
+        hashed = self.pool.map(make_password, passwords,
+                    chunksize=max(1, len(passwords) // (self.workers * 4)))
+        usernames = allocate_usernames([
+            [kwargs['name'], kwargs['email'], User._meta.verbose_name]
+            for _, _, kwargs in new
+        ])
+        users = [
+            (line_number, row,
+             User(username=username, password=password, **kwargs))
+            for (line_number, row, kwargs), username, password
+            in zip(new, usernames, hashed)
+        ]
+        try:
+            self.insert([user for _, _, user in users])
+        except IntegrityError:
+            # An email, phone number or username taken since it was checked,
+            # e.g. by a concurrent signup: retry row by row to find it.
+            for line_number, row, user in users:
+                try:
+                    self.insert([user])
+                except IntegrityError as exc:
+                    self.reject(line_number, row, {'row': [str(exc)]})
+
+    def insert(self, users):
+        """Create `users` with their primary EmailAddress atomically."""
+        with transaction.atomic():
+            User.objects.bulk_create(users)
+            user_ids = dict(
+                User.objects.filter(email__in=[u.email for u in users])
+                .values_list('email', 'id'))
+            EmailAddress.objects.bulk_create([
+                EmailAddress(
+                    user_id=user_ids[user.email],
+                    email=user.email,
+                    primary=True,
+                    verified=self.verified,
+                )
+                for user in users
+            ])
+        self.imported += len(users)
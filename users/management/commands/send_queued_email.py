@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.mail import drain
+
+
+class Command(BaseCommand):
+    help = 'Send queued outbox emails over a reused connection.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', dest='batch_size', type=int, default=100,
+            help='Maximum number of emails sent over one connection.',
+        )
+        parser.add_argument(
+            '--loop', dest='loop', action='store_true', default=False,
+            help='Keep polling the outbox instead of exiting once drained.',
+        )
+        parser.add_argument(
+            '--interval', dest='interval', type=float, default=1.0,
+            help='Seconds to sleep between polls of an empty outbox.',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options.get('batch_size')
+        while True:
+            processed = drain(batch_size=batch_size)
+            if processed:
+                self.stdout.write(f'Processed {processed} email(s).')
+                continue
+            if not options.get('loop'):
+                break
+            time.sleep(options.get('interval'))
@@ -0,0 +1,70 @@
+from django.db import migrations
+
+
+# `users.search.POSTGRES_DOCUMENT`, searches must use the same expression.
+POSTGRES_FORWARD = [
+    """
+    CREATE INDEX users_user_vendor_search_idx ON users_user
+    USING GIN ((
+        setweight(to_tsvector('simple', coalesce(business_name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(address, '')), 'B')
+    )) WHERE user_type = 'vendor'
+    """,
+]
+
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS users_user_vendor_search_idx",
+]
+
+# The triggers keeping the table in sync are installed after every migrate
+# by `users.search.install_sqlite_triggers`, table rebuilds drop them.
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE users_vendor_search
+    USING fts5(business_name, address)
+    """,
+    """
+    INSERT INTO users_vendor_search (rowid, business_name, address)
+    SELECT id, business_name, address FROM users_user
+    WHERE user_type = 'vendor' AND is_active
+    """,
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS users_vendor_search_delete",
+    "DROP TRIGGER IF EXISTS users_vendor_search_update",
+    "DROP TRIGGER IF EXISTS users_vendor_search_insert",
+    "DROP TABLE IF EXISTS users_vendor_search",
+]
+
+STATEMENTS = {
+    'postgresql': (POSTGRES_FORWARD, POSTGRES_BACKWARD),
+    'sqlite': (SQLITE_FORWARD, SQLITE_BACKWARD),
+}
+
+
+def run(schema_editor, direction):
+    statements = STATEMENTS.get(schema_editor.connection.vendor)
+    if statements is None:
+        return
+    for sql in statements[direction]:
+        schema_editor.execute(sql)
+
+
+def create_search_index(apps, schema_editor):
+    run(schema_editor, 0)
+
+
+def drop_search_index(apps, schema_editor):
+    run(schema_editor, 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_user_change_feed'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
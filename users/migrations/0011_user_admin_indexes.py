@@ -0,0 +1,63 @@
+# Generated by Django 2.2.28 on 2026-10-18 00:20
+
+from django.db import migrations, models
+
+
+# Prefix index for `email__istartswith`, see `users.changelist`. PostgreSQL
+# compares `UPPER(email)` with `LIKE`, which needs the pattern operator
+# class outside the C locale.
+POSTGRES_FORWARD = [
+    """
+    CREATE INDEX users_user_email_prefix_idx ON users_user
+    (UPPER(email::text) text_pattern_ops)
+    """,
+]
+
+# Recreated after every migrate by `users.changelist`, table rebuilds drop it.
+SQLITE_FORWARD = [
+    """
+    CREATE INDEX IF NOT EXISTS users_user_email_prefix_idx
+    ON users_user (email COLLATE NOCASE)
+    """,
+]
+
+BACKWARD = [
+    "DROP INDEX IF EXISTS users_user_email_prefix_idx",
+]
+
+STATEMENTS = {
+    'postgresql': (POSTGRES_FORWARD, BACKWARD),
+    'sqlite': (SQLITE_FORWARD, BACKWARD),
+}
+
+
+def run(schema_editor, direction):
+    statements = STATEMENTS.get(schema_editor.connection.vendor)
+    if statements is None:
+        return
+    for sql in statements[direction]:
+        schema_editor.execute(sql)
+
+
+def create_email_prefix_index(apps, schema_editor):
+    run(schema_editor, 0)
+
+
+def drop_email_prefix_index(apps, schema_editor):
+    run(schema_editor, 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0010_vendor_location'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['is_staff', 'date_joined', 'id'], name='users_user_staff_joined_idx'),
+        ),
+        migrations.RunPython(create_email_prefix_index,
+                             drop_email_prefix_index),
+    ]
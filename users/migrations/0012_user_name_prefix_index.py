@@ -0,0 +1,57 @@
+# Generated by Django 2.2.28 on 2026-10-18 12:00
+
+from django.db import migrations
+
+
+# Prefix index for `name__istartswith`, see `users.changelist`.
+POSTGRES_FORWARD = [
+    """
+    CREATE INDEX users_user_name_prefix_idx ON users_user
+    (UPPER(name::text) text_pattern_ops)
+    """,
+]
+
+# Recreated after every migrate by `users.changelist`, table rebuilds drop it.
+SQLITE_FORWARD = [
+    """
+    CREATE INDEX IF NOT EXISTS users_user_name_prefix_idx
+    ON users_user (name COLLATE NOCASE)
+    """,
+]
+
+BACKWARD = [
+    "DROP INDEX IF EXISTS users_user_name_prefix_idx",
+]
+
+STATEMENTS = {
+    'postgresql': (POSTGRES_FORWARD, BACKWARD),
+    'sqlite': (SQLITE_FORWARD, BACKWARD),
+}
+
+
+def run(schema_editor, direction):
+    statements = STATEMENTS.get(schema_editor.connection.vendor)
+    if statements is None:
+        return
+    for sql in statements[direction]:
+        schema_editor.execute(sql)
+
+
+def create_name_prefix_index(apps, schema_editor):
+    run(schema_editor, 0)
+
+
+def drop_name_prefix_index(apps, schema_editor):
+    run(schema_editor, 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0011_user_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_name_prefix_index,
+                             drop_name_prefix_index),
+    ]
@@ -1,16 +1,92 @@
+import re
+import unicodedata
+
 from django.contrib.auth.models import (
     AbstractUser,
     BaseUserManager,
 )
 from django.conf import settings
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import IntegrityError, models, transaction
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 
-from allauth.utils import generate_unique_username
+from allauth.account.adapter import get_adapter
+from allauth.utils import generate_username_candidates
 
 from phonenumber_field.modelfields import PhoneNumberField
 
+from .geo import grid_cell
+
+
+def username_base(txts):
+    """
+    Base username from the first of `txts` giving a valid one.
+
+    Mirrors the private `allauth.utils._generate_unique_username_base` of
+    allauth 0.41, check it still matches when upgrading allauth.
+    """
+    adapter = get_adapter()
+    for txt in txts:
+        if not txt:
+            continue
+        username = unicodedata.normalize('NFKD', str(txt))
+        username = username.encode('ascii', 'ignore').decode('ascii')
+        username = re.sub(r'[^\w\s@+.-]', '', username).lower()
+        # Only the local part of email addresses, like allauth.
+        username = username.split('@')[0].strip()
+        username = re.sub(r'\s+', '_', username)
+        try:
+            return adapter.clean_username(username, shallow=True)
+        except ValidationError:
+            pass
+    return 'user'
+
+
+def allocate_usernames(txts_list):
+    """
+    Pick a free username for every entry of `txts_list` with a single
+    indexed query.
+
+    Uses the same base name and random suffix candidates as allauth's
+    `generate_unique_username`, which also checks them in one `IN` query,
+    but does so for the whole batch at once. Entries whose candidates are
+    all taken get None. A username taken concurrently after the lookup is
+    handled by the savepoint retry of `User.save`.
+    """
+    adapter = get_adapter()
+    candidates_list = [
+        generate_username_candidates(username_base(txts))
+        for txts in txts_list
+    ]
+    taken = set(
+        User.objects.filter(
+            username__in={c for cs in candidates_list for c in cs})
+        .values_list('username', flat=True)
+    )
+    usernames = []
+    for candidates in candidates_list:
+        username = None
+        for candidate in candidates:
+            if candidate in taken:
+                continue
+            try:
+                username = adapter.clean_username(candidate, shallow=True)
+            except ValidationError:
+                continue
+            # Keep usernames unique within the batch as well.
+            taken.add(username)
+            break
+        usernames.append(username)
+    return usernames
+
+
+def allocate_username(txts):
+    """Pick a free username derived from `txts`, see `allocate_usernames`."""
+    return allocate_usernames([txts])[0]
+
 
 class UserManager(BaseUserManager):
 
@@ -72,19 +148,81 @@ class User(AbstractUser):
         null=True,
         help_text='Authentication ID from Twilio 2FA API.',
     )
+    # Change feed position, see `users.changes`.
+    updated_at = models.DateTimeField(auto_now=True)
+    # Optional Vendor location, `geo_cell` indexes active vendors for
+    # `users.geo`.
+    latitude = models.FloatField(null=True, blank=True,
+        validators=[MinValueValidator(-90), MaxValueValidator(90)])
+    longitude = models.FloatField(null=True, blank=True,
+        validators=[MinValueValidator(-180), MaxValueValidator(180)])
+    geo_cell = models.IntegerField(null=True, blank=True, editable=False)
+
+    # Inserts retried with a new username after losing a concurrent race.
+    USERNAME_ALLOCATION_ATTEMPTS = 5
+    # Fields whose `update_fields` saves are not changes for the change feed,
+    # logins update `last_login` alone.
+    UNTRACKED_FIELDS = {'last_login'}
 
     objects = UserManager()
 
+    class Meta(AbstractUser.Meta):
+        # Keyset pagination over `(date_joined, id)`, see `users.pagination`,
+        # also ordering the `UserAdmin` changelist filters.
+        indexes = [
+            models.Index(fields=['date_joined', 'id'],
+                name='users_user_joined_idx'),
+            models.Index(fields=['user_type', 'date_joined', 'id'],
+                name='users_user_type_joined_idx'),
+            models.Index(fields=['is_active', 'date_joined', 'id'],
+                name='users_user_active_joined_idx'),
+            models.Index(fields=['is_staff', 'date_joined', 'id'],
+                name='users_user_staff_joined_idx'),
+            models.Index(fields=['updated_at', 'id'],
+                name='users_user_updated_idx'),
+            models.Index(fields=['geo_cell'], name='users_user_geo_cell_idx'),
+        ]
 
     def save(self, *args, **kwargs):
-        """Custom save to autosave `username` field."""
-        if not self.id:
-            self.username = generate_unique_username([
-                self.name,
-                self.email,
-                self.Meta.verbose_name
-            ])
-        return super(User, self).save(*args, **kwargs)
+        """
+        Custom save to autosave `username` field. A concurrent signup taking
+        the same username is resolved by retrying the insert inside a
+        savepoint with a freshly allocated one.
+
+        Saves limited to `update_fields` also bump `updated_at`, so they
+        show up in the change feed, unless they only record a login in
+        `last_login`. They also keep `geo_cell` in line with the
+        coordinates, see `users.geo`.
+        """
+        self.geo_cell = None
+        if self.is_vendor and self.is_active:
+            self.geo_cell = grid_cell(self.latitude, self.longitude)
+        if self.id:
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                update_fields = set(update_fields)
+                if update_fields - self.UNTRACKED_FIELDS:
+                    update_fields.add('updated_at')
+                if update_fields & {'latitude', 'longitude', 'user_type',
+                                    'is_active'}:
+                    update_fields.add('geo_cell')
+                kwargs['update_fields'] = update_fields
+            return super(User, self).save(*args, **kwargs)
+
+        txts = [self.name, self.email, self.Meta.verbose_name]
+        for attempt in range(self.USERNAME_ALLOCATION_ATTEMPTS):
+            self.username = allocate_username(txts)
+            if self.username is None:
+                continue
+            try:
+                with transaction.atomic():
+                    return super(User, self).save(*args, **kwargs)
+            except IntegrityError:
+                username_taken = User.objects.filter(
+                    username=self.username).exists()
+                if not username_taken:
+                    raise
+        raise IntegrityError('Unable to allocate a unique username.')
 
     @property
     def is_phone_verified(self):
@@ -100,3 +238,100 @@ class User(AbstractUser):
 
     def get_absolute_url(self):
         return reverse("users:detail", kwargs={"username": self.username})
+
+
+class UserTombstone(models.Model):
+    """
+    Deletion marker of a User, reported by the change feed so synced
+    clients can drop their copy. Written by a `post_delete` receiver.
+    """
+    user_id = models.IntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['deleted_at', 'id']),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} ({self.deleted_at})'
+
+
+class PhoneVerificationDispatch(models.Model):
+    """
+    Queued Authy `verification_start` request for a User phone number.
+
+    Rows are written in the same transaction as the User and drained by the
+    `dispatch_phone_verifications` worker command, so the signup request
+    never waits on the Twilio API.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    )
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='phone_verification_dispatches',
+    )
+    phone_number = PhoneNumberField()
+    status = models.CharField(choices=STATUS_CHOICES, max_length=20,
+                default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f'{self.phone_number} ({self.status})'
+
+
+class OutboxEmail(models.Model):
+    """
+    Email message queued by `users.mail.OutboxEmailBackend`.
+
+    The rendered MIME message is stored as-is so the
+    `send_queued_email` worker can deliver it later over a shared SMTP
+    connection without rebuilding the djoser templates.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    )
+
+    from_email = models.CharField(max_length=254)
+    recipients = models.TextField(help_text='Newline separated addresses.')
+    subject = models.CharField(max_length=255, blank=True)
+    message = models.BinaryField()
+    status = models.CharField(choices=STATUS_CHOICES, max_length=20,
+                default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f'{self.subject} ({self.status})'
@@ -0,0 +1,112 @@
+"""
+Keyset pagination for the User listing endpoints.
+
+DRF's `CursorPagination` seeks on the first ordering field only and walks
+an offset over rows sharing its value. `UserKeysetPagination` seeks on the
+whole `(date_joined, id)` key instead, so every page is a single range scan
+of the matching `users.User` index, whatever its depth.
+"""
+from base64 import b64encode
+from urllib import parse
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+
+class UserKeysetPagination(CursorPagination):
+    """
+    Cursor pagination over `(date_joined, id)`, newest users first.
+
+    Cursors carry the key of the row next to the page boundary, pages are
+    fetched with `WHERE (date_joined, id) < (...) ORDER BY date_joined
+    DESC, id DESC LIMIT page_size + 1`.
+    """
+    ordering = ('-date_joined', '-id')
+    page_size = settings.USER_LIST_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.USER_LIST_MAX_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+
+        if reverse:
+            queryset = queryset.order_by(*(key.lstrip('-')
+                        for key in self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if self.cursor is not None:
+            queryset = queryset.filter(
+                self.get_seek_filter(self.cursor.position, reverse))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+
+        # Coming from a neighbouring page there always is a way back.
+        self.has_next = has_more if not reverse else True
+        self.has_previous = has_more if reverse else self.cursor is not None
+        if not self.page:
+            self.has_next = self.has_previous = False
+        return self.page
+
+    def get_seek_filter(self, position, reverse):
+        """
+        Rows after `position` in the page direction. The redundant bound on
+        `date_joined` lets the database start an index range scan at the
+        key instead of evaluating the OR over the whole index.
+        """
+        date_joined, pk = position
+        if reverse:
+            return Q(date_joined__gte=date_joined) & (
+                Q(date_joined__gt=date_joined) | Q(pk__gt=pk))
+        return Q(date_joined__lte=date_joined) & (
+            Q(date_joined__lt=date_joined) | Q(pk__lt=pk))
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=False, position=self.page[-1]))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=True, position=self.page[0]))
+
+    def decode_cursor(self, request):
+        cursor = super(UserKeysetPagination, self).decode_cursor(request)
+        if cursor is None:
+            return None
+        try:
+            date_joined, pk = cursor.position.rsplit('|', 1)
+            position = (parse_datetime(date_joined), int(pk))
+        except (AttributeError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if position[0] is None:
+            raise NotFound(self.invalid_cursor_message)
+        return cursor._replace(position=position)
+
+    def encode_cursor(self, cursor):
+        # Links are built from the boundary User of the current page.
+        instance = cursor.position
+        tokens = {'p': f'{instance.date_joined.isoformat()}|{instance.pk}'}
+        if cursor.reverse:
+            tokens['r'] = '1'
+        querystring = parse.urlencode(tokens, doseq=True)
+        encoded = b64encode(querystring.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param,
+                    encoded)
@@ -0,0 +1,69 @@
+"""
+Phone number helpers shared by the signup serializers and the importers.
+
+Parsing a number and checking `is_valid()` walks the libphonenumber
+metadata and is surprisingly CPU heavy, while the verify/register flow
+sends the same number over and over. `lookup_phone_number` memoizes both in
+a bounded, thread-safe LRU cache of `PHONE_NUMBER_CACHE_SIZE` entries;
+`phone_cache_info()` reports its hit and miss counters.
+"""
+import copy
+from functools import lru_cache
+
+from django.conf import settings
+
+from phonenumber_field.phonenumber import PhoneNumber, to_python
+from phonenumber_field.serializerfields import PhoneNumberField
+from rest_framework.exceptions import ValidationError
+
+
+@lru_cache(maxsize=settings.PHONE_NUMBER_CACHE_SIZE)
+def _lookup(value, region):
+    phone_number = to_python(value, region=region)
+    return phone_number, bool(phone_number) and phone_number.is_valid()
+
+
+def lookup_phone_number(value, region=None):
+    """
+    Parse `value` into a `PhoneNumber` and return it with its validity as
+    `(phone_number, is_valid)`. Empty values are returned unchanged.
+    """
+    if not isinstance(value, str):
+        phone_number = to_python(value, region=region)
+        return phone_number, bool(phone_number) and phone_number.is_valid()
+    phone_number, is_valid = _lookup(value, region)
+    if isinstance(phone_number, PhoneNumber):
+        # Cached instances are shared, hand out a copy callers may change.
+        phone_number = copy.copy(phone_number)
+    return phone_number, is_valid
+
+
+def phone_cache_info():
+    """`functools` cache statistics: hits, misses, maxsize and currsize."""
+    return _lookup.cache_info()
+
+
+def clear_phone_cache():
+    _lookup.cache_clear()
+
+
+def build_phone_number(country_code, phone_number):
+    """
+    Combine a `country_code`, with or without the `+` prefix, and a
+    national `phone_number` and return `(phone_number, is_valid)` from
+    `lookup_phone_number`.
+    """
+    country_code = str(country_code)
+    if not country_code.startswith('+'):
+        country_code = f'+{country_code}'
+    return lookup_phone_number(f'{country_code}{phone_number}')
+
+
+class CachedPhoneNumberField(PhoneNumberField):
+    """`PhoneNumberField` validating through `lookup_phone_number`."""
+
+    def to_internal_value(self, data):
+        phone_number, is_valid = lookup_phone_number(data)
+        if phone_number and not is_valid:
+            raise ValidationError(self.error_messages['invalid'])
+        return phone_number
@@ -0,0 +1,160 @@
+"""
+Ranked full-text search of vendors by `business_name` and `address`.
+
+Each database has its own index, created by the `0009_vendor_search`
+migration:
+
+* PostgreSQL: a partial GIN index over the vendor `tsvector`, business
+  names weighted above addresses and ranked with `ts_rank`.
+* SQLite: the `users_vendor_search` FTS5 table of active vendors, kept in
+  sync with `users_user` by triggers (which, unlike signals, also see
+  `bulk_create` and `QuerySet.update()`), ranked with `bm25`. Django
+  rebuilds SQLite tables to alter them, dropping their triggers, so they
+  are reinstalled by `install_sqlite_triggers` after every `migrate`.
+
+Every search term is matched as a word prefix and all of them must match.
+Results are ordered by descending rank, then id, and paged with an opaque
+cursor holding the `(rank, id)` of the last row.
+"""
+import json
+import re
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, connections
+
+from .models import User
+
+
+# Weighted vendor document, the expression must match the index exactly.
+POSTGRES_DOCUMENT = (
+    "setweight(to_tsvector('simple', coalesce(business_name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(address, '')), 'B')"
+)
+
+POSTGRES_SEARCH = f"""
+    SELECT * FROM (
+        SELECT users_user.*, ts_rank({POSTGRES_DOCUMENT}, query)::float8 AS rank
+        FROM users_user, to_tsquery('simple', %s) query
+        WHERE users_user.user_type = 'vendor' AND users_user.is_active
+        AND {POSTGRES_DOCUMENT} @@ query
+    ) ranked {{seek}}
+    ORDER BY ranked.rank DESC, ranked.id LIMIT %s
+"""
+
+# Only the page is joined to `users_user`, the index holds active vendors.
+SQLITE_SEARCH = """
+    SELECT users_user.*, page.rank FROM (
+        SELECT * FROM (
+            SELECT rowid AS id, -bm25(users_vendor_search, 10.0, 1.0) AS rank
+            FROM users_vendor_search WHERE users_vendor_search MATCH %s
+        ) ranked {seek}
+        ORDER BY ranked.rank DESC, ranked.id LIMIT %s
+    ) page
+    JOIN users_user ON users_user.id = page.id
+    ORDER BY page.rank DESC, page.id
+"""
+
+SQLITE_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS users_vendor_search_insert
+    AFTER INSERT ON users_user
+    WHEN new.user_type = 'vendor' AND new.is_active BEGIN
+        INSERT INTO users_vendor_search (rowid, business_name, address)
+        VALUES (new.id, new.business_name, new.address);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS users_vendor_search_update
+    AFTER UPDATE OF business_name, address, user_type, is_active ON users_user
+    BEGIN
+        DELETE FROM users_vendor_search WHERE rowid = old.id;
+        INSERT INTO users_vendor_search (rowid, business_name, address)
+        SELECT new.id, new.business_name, new.address
+        WHERE new.user_type = 'vendor' AND new.is_active;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS users_vendor_search_delete
+    AFTER DELETE ON users_user BEGIN
+        DELETE FROM users_vendor_search WHERE rowid = old.id;
+    END
+    """,
+]
+
+SEEK = 'WHERE ranked.rank < %s OR (ranked.rank = %s AND ranked.id > %s)'
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def install_sqlite_triggers(using='default', **kwargs):
+    """`post_migrate` receiver creating the missing FTS5 sync triggers."""
+    db = connections[using]
+    if db.vendor != 'sqlite':
+        return
+    with db.cursor() as cursor:
+        if 'users_vendor_search' not in db.introspection.table_names(cursor):
+            return
+        for sql in SQLITE_TRIGGERS:
+            cursor.execute(sql)
+
+
+def tokenize(text):
+    return re.findall(r'\w+', text.lower())
+
+
+def postgres_query(terms):
+    return ' & '.join(f'{term}:*' for term in terms)
+
+
+def sqlite_query(terms):
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+BACKENDS = {
+    'postgresql': (POSTGRES_SEARCH, postgres_query),
+    'sqlite': (SQLITE_SEARCH, sqlite_query),
+}
+
+
+def encode_cursor(vendor):
+    data = [vendor.rank, vendor.pk]
+    return urlsafe_b64encode(json.dumps(data).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        rank, pk = json.loads(urlsafe_b64decode(cursor.encode()))
+        return float(rank), int(pk)
+    except (TypeError, ValueError) as exc:
+        raise InvalidCursor(cursor) from exc
+
+
+def search_vendors(text, limit, cursor=None):
+    """
+    Active vendors matching every word of `text`, best first. Returns up to
+    `limit` Users annotated with their `rank` and the cursor of the next
+    page, or None on the last one.
+    """
+    terms = tokenize(text)
+    if not terms:
+        return [], None
+    try:
+        search, build_query = BACKENDS[connection.vendor]
+    except KeyError:
+        raise ImproperlyConfigured(
+            f'Vendor search does not support {connection.vendor}.')
+
+    params = [build_query(terms)]
+    seek = ''
+    if cursor is not None:
+        rank, pk = decode_cursor(cursor)
+        seek = SEEK
+        params += [rank, rank, pk]
+    vendors = list(User.objects.raw(search.format(seek=seek),
+                                    params + [limit + 1]))
+    if len(vendors) > limit:
+        return vendors[:limit], encode_cursor(vendors[limit - 1])
+    return vendors, None
@@ -1,9 +1,7 @@
-import phonenumbers
-
 from django.conf import settings
 
-from allauth.account.utils import setup_user_email
-from authy.api import AuthyApiClient
+from allauth.account.adapter import get_adapter
+from allauth.account.models import EmailAddress
 
 from djoser.conf import settings as djoser_settings
 from djoser.serializers import (
@@ -16,9 +14,10 @@ from rest_framework import (
 )
 
 from phonenumber_field.serializerfields import PhoneNumberField
-from phonenumber_field.phonenumber import to_python
 
-from .models import User
+from .authy_client import get_authy_client
+from .models import PhoneVerificationDispatch, User
+from .phone import CachedPhoneNumberField, build_phone_number
 
 
 DEFAULT_USER_FIELDS = (
@@ -38,15 +37,42 @@ class CreateUserSerializer(UserCreatePasswordRetypeSerializer):
             'password': {'write_only': True}
         }
 
-    def create(self, validated_data):
+    def perform_create(self, validated_data):
         """
         Performs the creation of a User and a related EmailAddress instance
-        used for `allauth`.
+        used for `allauth` with one INSERT each.
+
+        Runs inside the transaction opened by the view. Unlike
+        `setup_user_email` the EmailAddress is inserted without checking for
+        existing addresses first: the User email is unique, and a conflicting
+        address raises an `IntegrityError` reported as `cannot_create_user`.
         """
-        user = super(CreateUserSerializer, self).create(validated_data)
-        setup_user_email(self.context['request'], user, [])
+        user = User.objects.create_user(
+            **self.get_user_defaults(), **validated_data)
+        EmailAddress.objects.create(user=user, email=user.email,
+            primary=True, verified=self.is_email_verified(user))
         return user
 
+    def get_user_defaults(self):
+        """Field values set on the User insert besides `validated_data`."""
+        return {
+            'user_type': User.TYPE_CUSTOMER,
+            'is_active': not djoser_settings.SEND_ACTIVATION_EMAIL,
+        }
+
+    def is_email_verified(self, user):
+        """
+        Whether `allauth` stashed the signup email as verified in the session.
+        Only existing sessions are read, API signups usually carry none.
+        """
+        request = self.context['request']
+        if settings.SESSION_COOKIE_NAME not in request.COOKIES:
+            return False
+        if not request.session.get('account_verified_email'):
+            return False
+        stashed_email = get_adapter(request).unstash_verified_email(request)
+        return stashed_email.lower() == user.email.lower()
+
 
 class CreateVendorUserSerializer(CreateUserSerializer):
     """
@@ -65,6 +91,8 @@ class CreateVendorUserSerializer(CreateUserSerializer):
             'phone_number',
             'address',
             'business_name',
+            'latitude',
+            'longitude',
             'is_phone_verified',
         )
         read_only_fields = (
@@ -74,21 +102,30 @@ class CreateVendorUserSerializer(CreateUserSerializer):
             'password': {'write_only': True}
         }
 
+    def get_user_defaults(self):
+        """Vendors are active right away and verify their phone instead."""
+        return {
+            'user_type': User.TYPE_VENDOR,
+            'is_active': True,
+        }
+
+    def validate(self, attrs):
+        attrs = super(CreateVendorUserSerializer, self).validate(attrs)
+        if (attrs.get('latitude') is None) != (attrs.get('longitude') is None):
+            raise exceptions.ValidationError(
+                'Provide both latitude and longitude or neither.')
+        return attrs
 
     def validate_phone_number(self, value):
         """
         Validate `country_code` with `phone_number` using the
         `phonenumber_field` validation methods.
         """
-        # Format country_code with + sign.
-        country_code = self.initial_data['country_code']
-        if not country_code.startswith('+'):
-            country_code = f'+{country_code}'
-
-        phone_number = self.initial_data['phone_number']
-        phone_number = f'{country_code}{phone_number}'
-        phone_number = to_python(phone_number)
-        if phone_number and not phone_number.is_valid():
+        phone_number, is_valid = build_phone_number(
+            self.initial_data['country_code'],
+            self.initial_data['phone_number']
+        )
+        if phone_number and not is_valid:
             raise exceptions.ValidationError(
                      PhoneNumberField.default_error_messages['invalid'])
         return phone_number
@@ -98,16 +135,15 @@ class PhoneSerializer(serializers.Serializer):
     """
     Serializer for `phone_number` verification.
     """
-    phone_number = PhoneNumberField(required=True)
+    phone_number = CachedPhoneNumberField(required=True)
 
     def validate(self, data):
         """
         Validate the phone number on the Authy API Server. If valid,
         Twilio API will send 4 digit verification token via SMS.
         """
-        phone_number = phonenumbers.parse(
-                        str(data.get('phone_number')), None)
-        authy_api = AuthyApiClient(settings.ACCOUNT_SECURITY_API_KEY)
+        phone_number = data.get('phone_number')
+        authy_api = get_authy_client()
         authy_phone = authy_api.phones.verification_start(
             phone_number.national_number,
             phone_number.country_code
@@ -120,16 +156,14 @@ class PhoneSerializer(serializers.Serializer):
 
 
 class PhoneVerificationSerializer(serializers.Serializer):
-    phone_number = PhoneNumberField(required=True)
+    phone_number = CachedPhoneNumberField(required=True)
     verification_code = serializers.CharField(min_length=4,
                             required=True,
                             write_only=True)
 
     def validate(self, data):
-        # TODO: move to field validation
-        phone_number = phonenumbers.parse(
-                    str(data.get('phone_number')), None)
-        authy_api = AuthyApiClient(settings.ACCOUNT_SECURITY_API_KEY)
+        phone_number = data.get('phone_number')
+        authy_api = get_authy_client()
         authy_phone = authy_api.phones.verification_check(
             phone_number.national_number,
             phone_number.country_code,
@@ -139,3 +173,57 @@ class PhoneVerificationSerializer(serializers.Serializer):
             return data
         else:
             raise exceptions.ValidationError(authy_phone.errors())
+
+
+class VendorSearchResultSerializer(serializers.ModelSerializer):
+    """Public profile of a Vendor found by the vendor search."""
+
+    class Meta:
+        model = User
+        fields = (
+            'id',
+            'name',
+            'business_name',
+            'address',
+        )
+        read_only_fields = fields
+
+
+class NearbyVendorsQuerySerializer(serializers.Serializer):
+    """Query parameters of the nearest vendors lookup."""
+    latitude = serializers.FloatField(min_value=-90, max_value=90)
+    longitude = serializers.FloatField(min_value=-180, max_value=180)
+    k = serializers.IntegerField(min_value=1,
+            max_value=settings.VENDOR_NEARBY_MAX_RESULTS,
+            default=settings.VENDOR_NEARBY_RESULTS)
+    radius_km = serializers.FloatField(min_value=0,
+            max_value=settings.VENDOR_NEARBY_MAX_RADIUS_KM,
+            default=settings.VENDOR_NEARBY_RADIUS_KM)
+
+
+class NearbyVendorSerializer(VendorSearchResultSerializer):
+    """Vendor found by the proximity search with its distance."""
+    distance_km = serializers.FloatField(read_only=True)
+
+    class Meta(VendorSearchResultSerializer.Meta):
+        fields = VendorSearchResultSerializer.Meta.fields + (
+            'latitude',
+            'longitude',
+            'distance_km',
+        )
+        read_only_fields = fields
+
+
+class PhoneVerificationDispatchSerializer(serializers.ModelSerializer):
+    """Read-only status of a queued Authy phone verification."""
+
+    class Meta:
+        model = PhoneVerificationDispatch
+        fields = (
+            'phone_number',
+            'status',
+            'attempts',
+            'created_at',
+            'updated_at',
+        )
+        read_only_fields = fields
@@ -0,0 +1,35 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from .authentication import invalidate_token, invalidate_user
+from .models import User, UserTombstone
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """
+    Drop the cached authentication snapshot of a changed User, right away
+    and again once the transaction commits: until then other connections
+    still read the old row and may cache it again. `QuerySet.update()`
+    sends no signal and bypasses this, see `users.authentication`.
+    """
+    user_id = instance.pk
+    invalidate_user(user_id)
+    transaction.on_commit(lambda: invalidate_user(user_id))
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_cached_token(sender, instance, **kwargs):
+    key = instance.key
+    invalidate_token(key)
+    transaction.on_commit(lambda: invalidate_token(key))
+
+
+@receiver(post_delete, sender=User)
+def create_user_tombstone(sender, instance, **kwargs):
+    """Record the deletion for the change feed, see `users.changes`."""
+    UserTombstone.objects.create(user_id=instance.pk)
@@ -0,0 +1,197 @@
+"""
+Query count regression harness.
+
+`QueryCountMixin` test cases describe one `Scenario` per API endpoint
+under their URL `prefix`. The harness checks that every endpoint found in
+the URLconf has a scenario (or a documented reason in `skipped`), then runs
+each scenario against databases holding 1, 100 and 10k extra users and
+records how many queries it ran. It fails when a count differs between
+sizes, which betrays an N+1 query, or exceeds the budget checked in next
+to the test module.
+
+    QUERYCOUNT_SIZES=1,100       run with fewer sizes while iterating
+    QUERYCOUNT_UPDATE_BUDGET=1   rewrite the budget file with the counts
+"""
+import json
+import os
+import re
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.sites.models import Site
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework.test import APIClient
+
+from home.report import get_urls
+
+from ..models import User
+
+
+DEFAULT_SIZES = (1, 100, 10000)
+
+
+def api_endpoints(prefix):
+    """
+    URL name to path template of the endpoints under `prefix`, in URLconf
+    order. Format suffix variants and paths shadowed by an earlier pattern
+    are left out.
+    """
+    endpoints = {}
+    paths = set()
+    for url in get_urls():
+        path = url['url']
+        if not path.startswith(prefix) or '<format>' in path:
+            continue
+        if path in paths:
+            continue
+        paths.add(path)
+        endpoints[url['name']] = path
+    return endpoints
+
+
+def fill_path(template, kwargs):
+    # Regex patterns are reported with their escapes, e.g. `export\.<ext>`.
+    return re.sub(r'<(?:\w+:)?(\w+)>',
+        lambda match: str(kwargs[match.group(1)]), template).replace('\\', '')
+
+
+class Scenario:
+    """
+    A request against the endpoint named `name`. `user`, `kwargs`, `data`
+    and `headers` are callables receiving the test case and the run number
+    and return the authenticated User (also set as `case.actor`), the path arguments, the payload and
+    extra request META. They run before queries are captured.
+    """
+
+    def __init__(self, method, name, status=200, user=None, kwargs=None,
+                 data=None, headers=None):
+        self.method = method
+        self.name = name
+        self.status = status
+        self.user = user
+        self.kwargs = kwargs
+        self.data = data
+        self.headers = headers
+
+    @property
+    def key(self):
+        return f'{self.method.upper()} {self.name}'
+
+
+class QueryCountMixin:
+    """`TestCase` mixin running the harness, see the module documentation."""
+    prefix = None
+    budget_path = None
+    scenarios = ()
+    # URL names deliberately not measured, with the reason.
+    skipped = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.password_hash = make_password('Password0978')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.run_number = 0
+        self.seeded = 0
+
+    def get_sizes(self):
+        sizes = os.environ.get('QUERYCOUNT_SIZES')
+        if sizes:
+            return tuple(int(size) for size in sizes.split(','))
+        return DEFAULT_SIZES
+
+    def seed(self, size):
+        """Make sure `size` seeded users exist."""
+        users = [
+            User(
+                username=f'querycount{i}',
+                email=f'querycount{i}@example.com',
+                password=self.password_hash,
+                user_type=(User.TYPE_VENDOR if i % 2 else
+                           User.TYPE_CUSTOMER),
+            )
+            for i in range(self.seeded, size)
+        ]
+        User.objects.bulk_create(users, batch_size=500)
+        self.seeded = max(self.seeded, size)
+
+    def make_user(self, **kwargs):
+        self.run_number += 1
+        kwargs.setdefault('email', f'actor{self.run_number}@example.com')
+        kwargs.setdefault('password', 'Password0978')
+        return User.objects.create_user(**kwargs)
+
+    def run_scenario(self, scenario, path):
+        run_number = self.run_number = self.run_number + 1
+        # The authenticated User is available to the other callables.
+        self.actor = scenario.user(self, run_number) if scenario.user \
+            else None
+        self.client.force_authenticate(self.actor)
+        kwargs = scenario.kwargs(self, run_number) if scenario.kwargs else {}
+        data = scenario.data(self, run_number) if scenario.data else None
+        headers = scenario.headers(self, run_number) \
+            if scenario.headers else {}
+        url = fill_path(path, kwargs)
+        # Measure cold requests, not whatever earlier runs cached.
+        cache.clear()
+        ContentType.objects.clear_cache()
+        Site.objects.clear_cache()
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, scenario.method)(
+                url, data, format='json', **headers)
+            if response.streaming:
+                # Streamed bodies query the database while being consumed.
+                b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, scenario.status,
+            f'{scenario.key} {url}: {getattr(response, "data", "")}')
+        return len(queries)
+
+    def load_budget(self):
+        try:
+            with open(self.budget_path) as stream:
+                return json.load(stream)
+        except FileNotFoundError:
+            return {}
+
+    def test_urlconf_covered(self):
+        """Test every endpoint has a scenario or a reason to be skipped."""
+        endpoints = set(api_endpoints(self.prefix))
+        covered = {scenario.name for scenario in self.scenarios}
+        self.assertEqual(endpoints - covered - set(self.skipped), set(),
+            'Add a query count scenario for the new endpoints.')
+        self.assertEqual((covered | set(self.skipped)) - endpoints, set(),
+            'Scenarios refer to endpoints missing from the URLconf.')
+
+    def test_query_counts(self):
+        """Test query counts are constant and within the budget."""
+        endpoints = api_endpoints(self.prefix)
+        counts = {scenario.key: {} for scenario in self.scenarios}
+        for size in self.get_sizes():
+            self.seed(size)
+            for scenario in self.scenarios:
+                counts[scenario.key][size] = self.run_scenario(
+                    scenario, endpoints[scenario.name])
+
+        budget = self.load_budget()
+        if os.environ.get('QUERYCOUNT_UPDATE_BUDGET'):
+            budget = {key: max(sizes.values())
+                      for key, sizes in sorted(counts.items())}
+            with open(self.budget_path, 'w') as stream:
+                json.dump(budget, stream, indent=4, sort_keys=True)
+                stream.write('\n')
+
+        failures = []
+        for key, sizes in counts.items():
+            if len(set(sizes.values())) > 1:
+                failures.append(f'{key} grows with the data: {sizes}')
+            if key not in budget:
+                failures.append(f'{key} has no budget, ran {sizes}')
+            elif max(sizes.values()) > budget[key]:
+                failures.append(
+                    f'{key} exceeds its budget of {budget[key]}: {sizes}')
+        if failures:
+            self.fail('\n'.join(failures))
@@ -0,0 +1,112 @@
+"""
+Unit tests for the User admin changelist.
+"""
+from unittest import mock, skipUnless
+
+from django.core.paginator import EmptyPage
+from django.db import connection
+from django.db.models import Q
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..changelist import EstimatedCountPaginator, estimate_count
+from ..models import User
+
+
+# The manifest storage needs `collectstatic` to render admin pages.
+@override_settings(
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class UserChangelistTests(TestCase):
+
+    CHANGELIST_URL = reverse('admin:users_user_changelist')
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin@a.com',
+                        'Password0978')
+        self.client.force_login(self.admin)
+        User.objects.create_user('alice@a.com', 'Password0978')
+        User.objects.create_user('Alfred@a.com', 'Password0978',
+            user_type=User.TYPE_VENDOR)
+        User.objects.create_user('bob@a.com', 'Password0978',
+            is_active=False, name='Zoe Smith')
+
+    def emails(self, **params):
+        res = self.client.get(self.CHANGELIST_URL, params)
+        self.assertEqual(res.status_code, 200)
+        return sorted(user.email for user in res.context['cl'].result_list)
+
+    def test_filters(self):
+        self.assertEqual(self.emails(user_type__exact=User.TYPE_VENDOR),
+            ['Alfred@a.com'])
+        self.assertEqual(self.emails(is_active__exact=0), ['bob@a.com'])
+        self.assertEqual(self.emails(is_staff__exact=1), ['admin@a.com'])
+
+    def test_email_prefix_search(self):
+        """Test the search matches email prefixes, ignoring case."""
+        self.assertEqual(self.emails(q='AL'), ['Alfred@a.com', 'alice@a.com'])
+        self.assertEqual(self.emails(q='a.com'), [])
+
+    def test_name_prefix_search(self):
+        self.assertEqual(self.emails(q='zoe'), ['bob@a.com'])
+        self.assertEqual(self.emails(q='Smith'), [])
+
+    @skipUnless(connection.vendor == 'sqlite', 'SQLite query plan')
+    def test_prefix_indexes(self):
+        """Test the search is served by the prefix indexes."""
+        plan = User.objects.filter(
+            Q(email__istartswith='al') | Q(name__istartswith='al')).explain()
+        self.assertIn('users_user_email_prefix_idx', plan)
+        self.assertIn('users_user_name_prefix_idx', plan)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'SQLite statistics')
+class EstimatedCountPaginatorTests(TestCase):
+
+    def setUp(self):
+        for n in range(5):
+            User.objects.create_user(f'{n}@a.com', 'Password0978')
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        # Rows added after the statistics were gathered.
+        User.objects.create_user('5@a.com', 'Password0978')
+
+    def test_estimate_above_threshold(self):
+        """Test the planner estimate is used without counting the rows."""
+        self.assertEqual(estimate_count(User.objects.all()), 5)
+        paginator = EstimatedCountPaginator(
+            User.objects.order_by('id'), 2, threshold=5)
+        with self.assertNumQueries(1):
+            self.assertEqual(paginator.count, 5)
+        self.assertEqual(paginator.num_pages, 3)
+
+    def test_exact_count_below_threshold(self):
+        paginator = EstimatedCountPaginator(
+            User.objects.order_by('id'), 2, threshold=10)
+        self.assertEqual(paginator.count, 6)
+
+    def test_exact_count_when_filtered(self):
+        """Test SQLite has no estimate for filtered querysets."""
+        queryset = User.objects.filter(is_active=True).order_by('id')
+        self.assertIsNone(estimate_count(queryset))
+        paginator = EstimatedCountPaginator(queryset, 2, threshold=1)
+        self.assertEqual(paginator.count, 6)
+
+    @mock.patch('users.changelist.estimate_count', return_value=1000000)
+    def test_capped_count_when_filtered(self, estimate_count):
+        """Test a search matching fewer rows than the threshold is exact."""
+        paginator = EstimatedCountPaginator(
+            User.objects.filter(email__istartswith='1').order_by('id'), 2,
+            threshold=5)
+        self.assertEqual(paginator.count, 1)
+        estimate_count.assert_not_called()
+
+    def test_pages_past_underestimate(self):
+        """Test a stale estimate leaves the later rows reachable."""
+        paginator = EstimatedCountPaginator(
+            User.objects.order_by('id'), 2, threshold=5)
+        self.assertEqual(paginator.num_pages, 3)
+        self.assertEqual([user.email for user in paginator.page(3)],
+            ['4@a.com', '5@a.com'])
+        self.assertEqual(list(paginator.page(4)), [])
+        with self.assertRaises(EmptyPage):
+            paginator.page(0)
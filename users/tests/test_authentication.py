@@ -1,8 +1,9 @@
 """
 Unit tests for User Authentication Signup and Login.
 """
+from django.contrib.sites.models import Site
 from django.core import mail
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 
@@ -56,6 +57,34 @@ class CustomerRegistrationTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
         self.assertTrue(bool(len(mail.outbox)))
 
+    @override_settings(EMAIL_BACKEND='users.mail.OutboxEmailBackend')
+    def test_create_valid_customer_query_count(self):
+        """
+        Test signup runs as one transaction of 10 statements: the email
+        uniqueness check, the username lookup, the User and EmailAddress
+        inserts, the Site lookup and the queued activation email, plus the
+        transaction and username savepoint statements.
+        """
+        Site.objects.clear_cache()
+        with self.assertNumQueries(10):
+            res = self.client.post(self.SIGNUP_URL, self.DEFAULT_PAYLOAD)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        user = User.objects.get(email=self.DEFAULT_PAYLOAD['email'])
+        self.assertFalse(user.is_active)
+        email = EmailAddress.objects.get(user=user)
+        self.assertTrue(email.primary)
+        self.assertFalse(email.verified)
+
+    def test_create_customer_email_address_taken(self):
+        """Test signup fails when the EmailAddress is already registered."""
+        other = User.objects.create_user('b@a.com', 'Password0978')
+        EmailAddress.objects.create(user=other,
+            email=self.DEFAULT_PAYLOAD['email'])
+        res = self.client.post(self.SIGNUP_URL, self.DEFAULT_PAYLOAD)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(User.objects.filter(
+            email=self.DEFAULT_PAYLOAD['email']).exists())
+
 
 class VendorRegistrationTests(TestCase):
     """Test the Vendor users registration API."""
@@ -92,3 +121,19 @@ class VendorRegistrationTests(TestCase):
         res = self.client.post(self.SIGNUP_URL, self.VENDOR_PAYLOAD)
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
         self.assertFalse(bool(len(mail.outbox)))
+
+    @override_settings(AUTHY_DISPATCH_MODE='background')
+    def test_create_valid_vendor_query_count(self):
+        """
+        Test vendor signup inserts the User with its final `user_type` and
+        `is_active` in 9 statements: the email uniqueness check, the
+        username lookup, the User, EmailAddress and phone verification
+        inserts, plus the transaction and username savepoint statements.
+        """
+        with self.assertNumQueries(9):
+            res = self.client.post(self.SIGNUP_URL, self.VENDOR_PAYLOAD)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        user = User.objects.get(email=self.VENDOR_PAYLOAD['email'])
+        self.assertEqual(user.user_type, User.TYPE_VENDOR)
+        self.assertTrue(user.is_active)
+        self.assertTrue(EmailAddress.objects.filter(user=user).exists())
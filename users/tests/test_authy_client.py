@@ -0,0 +1,66 @@
+"""
+Unit tests for the shared Authy API client.
+"""
+import threading
+
+from django.test import SimpleTestCase, override_settings
+
+from ..authy_client import (
+    FakeAuthyAdapter,
+    PooledAuthyApiClient,
+    get_authy_client,
+)
+
+
+@override_settings(
+    ACCOUNT_SECURITY_API_KEY='key',
+    AUTHY_TRANSPORT='users.authy_client.FakeAuthyAdapter',
+)
+class AuthyClientTests(SimpleTestCase):
+
+    def test_client_shared(self):
+        """Test the same client is returned to every thread."""
+        clients = []
+        threads = [
+            threading.Thread(target=lambda: clients.append(get_authy_client()))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(set(map(id, clients))), 1)
+        self.assertIs(clients[0], get_authy_client())
+
+    def test_client_rebuilt_on_setting_change(self):
+        """Test changing an `AUTHY_*` setting drops the shared client."""
+        client = get_authy_client()
+        with self.settings(AUTHY_READ_TIMEOUT=1):
+            self.assertIsNot(get_authy_client(), client)
+            self.assertEqual(get_authy_client().timeout[1], 1)
+
+    def test_requests_use_session(self):
+        """Test every resource sends through the pooled session."""
+        client = get_authy_client()
+        adapter = client.session.get_adapter(client.api_uri)
+        self.assertIsInstance(adapter, FakeAuthyAdapter)
+
+        phone = client.phones.verification_start(123456789, 48)
+        self.assertTrue(phone.ok())
+        phone = client.phones.verification_check(123456789, 48, '0000')
+        self.assertFalse(phone.ok())
+        user = client.users.create('a@a.com', '123456789', 48)
+        self.assertTrue(user.ok())
+        self.assertEqual(len(adapter.requests), 3)
+        self.assertEqual(adapter.requests[0].headers['X-Authy-API-Key'], 'key')
+
+
+class PooledAuthyApiClientTests(SimpleTestCase):
+
+    def test_default_adapter_bounded(self):
+        """Test the default transport is a blocking, bounded pool."""
+        client = PooledAuthyApiClient('key', pool_size=4, timeout=(1, 2))
+        adapter = client.session.get_adapter(client.api_uri)
+        self.assertEqual(adapter._pool_maxsize, 4)
+        self.assertTrue(adapter._pool_block)
+        self.assertEqual(client.timeout, (1, 2))
@@ -0,0 +1,218 @@
+"""
+Unit tests for the cache-backed Token and JWT authentication.
+"""
+import os
+import tempfile
+
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ..authentication import (
+    check_auth_cache,
+    get_cache,
+    token_cache_key,
+    user_cache_key,
+)
+from ..models import User
+
+
+# The authentication cache is only used with a backend shared by processes.
+SHARED_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'auth': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'users-auth-tests'),
+    },
+}
+
+
+@override_settings(CACHES=SHARED_CACHES, AUTH_CACHE_ALIAS='auth')
+class CachedAuthenticationTests(TestCase):
+
+    ME_URL = reverse('users:user-me')
+
+    def setUp(self):
+        get_cache().clear()
+        self.addCleanup(get_cache().clear)
+        self.user = User.objects.create_user('a@a.com', 'Password0978')
+        self.client = APIClient()
+
+    def authenticate_token(self):
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        return token
+
+    def authenticate_jwt(self):
+        token = AccessToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'JWT {token}')
+
+    def test_token_warm_cache_no_queries(self):
+        """Test a cached token authenticates without database queries."""
+        self.authenticate_token()
+        with self.assertNumQueries(1):
+            res = self.client.get(self.ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(0):
+            res = self.client.get(self.ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], 'a@a.com')
+
+    def test_jwt_warm_cache_no_queries(self):
+        """Test a cached JWT user authenticates without database queries."""
+        self.authenticate_jwt()
+        with self.assertNumQueries(1):
+            self.client.get(self.ME_URL)
+        with self.assertNumQueries(0):
+            res = self.client.get(self.ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], 'a@a.com')
+
+    def test_deactivation_invalidates(self):
+        """Test deactivating a User is picked up on the next request."""
+        self.authenticate_token()
+        self.client.get(self.ME_URL)
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(self.ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.authenticate_jwt()
+        res = self.client.get(self.ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_invalidates(self):
+        """Test the snapshot is refreshed after a password change."""
+        self.authenticate_jwt()
+        self.client.get(self.ME_URL)
+        self.user.set_password('Password1234')
+        self.user.save()
+        with self.assertNumQueries(1):
+            self.client.get(self.ME_URL)
+        res = self.client.post(reverse('users:user-set-password'), {
+            'current_password': 'Password1234',
+            'new_password': 'Password5678',
+        })
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_snapshot_read_only(self):
+        """Test snapshots hold no password and writes load a fresh User."""
+        self.authenticate_token()
+        self.client.get(self.ME_URL)
+        self.assertNotIn(self.user.password,
+            get_cache().get(user_cache_key(self.user.pk)))
+
+        # A change the snapshot missed is neither served to nor overwritten
+        # by the update.
+        User.objects.filter(pk=self.user.pk).update(email='b@a.com')
+        res = self.client.patch(self.ME_URL, {})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], 'b@a.com')
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.email, 'b@a.com')
+
+    def test_token_deleted_invalidates(self):
+        """Test a deleted token stops authenticating immediately."""
+        token = self.authenticate_token()
+        self.client.get(self.ME_URL)
+        token.delete()
+        res = self.client.get(self.ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@override_settings(CACHES=SHARED_CACHES, AUTH_CACHE_ALIAS='auth')
+class HeaderDispatchAuthenticationTests(TestCase):
+
+    ME_URL = reverse('users:user-me')
+
+    def setUp(self):
+        get_cache().clear()
+        self.addCleanup(get_cache().clear)
+        self.user = User.objects.create_user('a@a.com', 'Password0978')
+        self.client = APIClient(enforce_csrf_checks=True)
+
+    def test_jwt_skips_session(self):
+        """Test bearer requests never load the session or check CSRF."""
+        self.client.force_login(self.user)
+        token = AccessToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'JWT {token}')
+        self.client.get(self.ME_URL)
+        with self.assertNumQueries(0):
+            res = self.client.get(self.ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        # No CSRF token is required for the JWT authenticated update.
+        res = self.client.patch(self.ME_URL, {'first_name': 'Aaa'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_token_keyword_case(self):
+        """Test the Token keyword is matched ignoring case, as DRF does."""
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'token {token.key}')
+        res = self.client.get(self.ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_session_cookie(self):
+        """Test session cookies still authenticate and enforce CSRF."""
+        self.client.force_login(self.user)
+        res = self.client.get(self.ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = self.client.patch(self.ME_URL, {'first_name': 'Aaa'})
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_unauthenticated(self):
+        """Test missing or unknown credentials get a 401 with a challenge."""
+        res = self.client.get(self.ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(res['WWW-Authenticate'], 'JWT realm="api"')
+
+        self.client.credentials(HTTP_AUTHORIZATION='Basic YTph')
+        res = self.client.get(self.ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class LocalCacheTests(TestCase):
+
+    ME_URL = reverse('users:user-me')
+
+    def test_local_cache_disabled(self):
+        """Test per-process caches are not used and fail the check."""
+        user = User.objects.create_user('a@a.com', 'Password0978')
+        token = AccessToken.for_user(user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'JWT {token}')
+        client.get(self.ME_URL)
+        with self.assertNumQueries(1):
+            res = client.get(self.ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([error.id for error in check_auth_cache(None)],
+            ['users.W001'])
+
+
+@override_settings(CACHES=SHARED_CACHES, AUTH_CACHE_ALIAS='auth')
+class CommitInvalidationTests(TransactionTestCase):
+
+    def setUp(self):
+        get_cache().clear()
+        self.addCleanup(get_cache().clear)
+        self.user = User.objects.create_user('a@a.com', 'Password0978')
+
+    def test_recached_before_commit(self):
+        """Test snapshots cached from the old rows are dropped on commit."""
+        key = Token.objects.create(user=self.user).key
+        with transaction.atomic():
+            self.user.is_active = False
+            self.user.save()
+            Token.objects.get(key=key).delete()
+            # A concurrent request still reading the committed rows.
+            get_cache().set(user_cache_key(self.user.pk), ('stale',))
+            get_cache().set(token_cache_key(key), self.user.pk)
+        self.assertIsNone(get_cache().get(user_cache_key(self.user.pk)))
+        self.assertIsNone(get_cache().get(token_cache_key(key)))
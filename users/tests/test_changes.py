@@ -0,0 +1,112 @@
+"""
+Unit tests for the User change feed.
+"""
+from unittest import mock
+
+from django.contrib.auth.models import update_last_login
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ..models import User, UserTombstone
+
+
+@override_settings(USER_CHANGES_SETTLE_SECONDS=0, USER_CHANGES_PAGE_SIZE=2)
+class UserChangesViewTests(TestCase):
+
+    CHANGES_URL = reverse('users:changes')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.staff = User.objects.create_user('staff@a.com', 'Password0978',
+                        is_staff=True)
+        self.users = [
+            User.objects.create_user(f'{n}@a.com', 'Password0978')
+            for n in range(3)
+        ]
+        self.client.force_authenticate(self.staff)
+
+    def poll(self, cursor=None):
+        """Follow the feed until it is drained, return the last cursor."""
+        changed, deleted = [], []
+        while True:
+            params = {'cursor': cursor} if cursor else {}
+            res = self.client.get(self.CHANGES_URL, params)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            changed += [user['id'] for user in res.data['results']]
+            deleted += res.data['deleted']
+            cursor = res.data['cursor']
+            if not res.data['has_more']:
+                return changed, deleted, cursor
+
+    def test_initial_sync(self):
+        """Test a poll without cursor pages through every User."""
+        changed, deleted, cursor = self.poll()
+        self.assertEqual(changed,
+            [self.staff.pk] + [user.pk for user in self.users])
+        self.assertEqual(deleted, [])
+
+    def test_held_back_by_open_transaction(self):
+        """Test rows saved after an uncommitted write began are held back."""
+        cursor = self.poll()[2]
+        started_at = User.objects.get(pk=self.users[2].pk).updated_at
+        self.users[1].save()
+        with mock.patch('users.changes.oldest_write_started_at',
+                return_value=started_at):
+            self.assertEqual(self.poll(cursor)[0], [])
+        self.assertEqual(self.poll(cursor)[0], [self.users[1].pk])
+
+    def test_delta(self):
+        """Test only Users saved after the cursor are returned."""
+        cursor = self.poll()[2]
+        self.assertEqual(self.poll(cursor)[:2], ([], []))
+
+        user = self.users[1]
+        user.first_name = 'Changed'
+        user.save()
+        # Saves limited to some fields are reported too.
+        self.users[0].set_password('Password1234')
+        self.users[0].save(update_fields=['password'])
+        changed, deleted, cursor = self.poll(cursor)
+        self.assertEqual(changed, [user.pk, self.users[0].pk])
+        self.assertEqual(self.poll(cursor)[:2], ([], []))
+
+        # Logins only update `last_login` and are not changes.
+        update_last_login(None, self.users[2])
+        self.assertEqual(self.poll(cursor)[:2], ([], []))
+
+    def test_tombstones(self):
+        """Test deleted Users are reported once."""
+        cursor = self.poll()[2]
+        pk = self.users[2].pk
+        self.users[2].delete()
+        self.assertTrue(UserTombstone.objects.filter(user_id=pk).exists())
+        changed, deleted, cursor = self.poll(cursor)
+        self.assertEqual((changed, deleted), ([], [pk]))
+        self.assertEqual(self.poll(cursor)[:2], ([], []))
+
+    def test_settle_delay(self):
+        """Test rows saved within the settle delay are held back."""
+        with self.settings(USER_CHANGES_SETTLE_SECONDS=60):
+            changed, deleted, cursor = self.poll()
+        self.assertEqual(changed, [])
+        self.assertEqual(len(self.poll(cursor)[0]), 4)
+
+    def test_own_account_only(self):
+        """Test non-staff users follow their own account."""
+        self.users[2].delete()
+        self.client.force_authenticate(self.users[0])
+        changed, deleted, cursor = self.poll()
+        self.assertEqual((changed, deleted), ([self.users[0].pk], []))
+
+    def test_empty_poll_query_count(self):
+        """Test a poll without changes reads both indexes once."""
+        cursor = self.poll()[2]
+        with self.assertNumQueries(2):
+            self.client.get(self.CHANGES_URL, {'cursor': cursor})
+
+    def test_invalid_cursor(self):
+        res = self.client.get(self.CHANGES_URL, {'cursor': 'bm9wZQ=='})
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,154 @@
+"""
+Unit tests for the queued Authy phone verification dispatch.
+"""
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ..authy_client import FakeAuthyAdapter, PooledAuthyApiClient
+from ..dispatch import claim
+from ..models import PhoneVerificationDispatch, User
+
+
+VENDOR_PAYLOAD = {
+    'first_name': 'Aaa',
+    'last_name': 'Aaa',
+    'email': 'a@a.com',
+    'password': 'Password0978',
+    're_password': 'Password0978',
+    'country_code': '+48',
+    'phone_number': '123456789',
+}
+
+
+def fake_authy_client(**kwargs):
+    return PooledAuthyApiClient('key', adapter=FakeAuthyAdapter(**kwargs))
+
+
+@override_settings(AUTHY_DISPATCH_MODE='background')
+class VendorSignupDispatchTests(TestCase):
+    """Test that Vendor signup queues the phone verification."""
+
+    SIGNUP_URL = reverse('users:vendor')
+    STATUS_URL = reverse('users:phone_verify_status')
+
+    def setUp(self):
+        self.client = APIClient()
+
+    @mock.patch('users.dispatch.get_authy_client')
+    def test_signup_returns_pending(self, get_authy_client):
+        """Test signup queues the verification without calling Authy."""
+        res = self.client.post(self.SIGNUP_URL, VENDOR_PAYLOAD)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['phone_verification_status'],
+            PhoneVerificationDispatch.STATUS_PENDING)
+        self.assertFalse(get_authy_client.called)
+
+        dispatch = PhoneVerificationDispatch.objects.get()
+        self.assertEqual(dispatch.user.email, VENDOR_PAYLOAD['email'])
+        self.assertEqual(str(dispatch.phone_number), '+48123456789')
+
+    def test_status_endpoint(self):
+        """Test the Vendor can poll the latest verification status."""
+        self.client.post(self.SIGNUP_URL, VENDOR_PAYLOAD)
+        user = User.objects.get(email=VENDOR_PAYLOAD['email'])
+        self.client.force_authenticate(user)
+
+        res = self.client.get(self.STATUS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['status'],
+            PhoneVerificationDispatch.STATUS_PENDING)
+        self.assertEqual(res.data['attempts'], 0)
+
+    def test_status_endpoint_not_found(self):
+        """Test users without a queued verification get a 404."""
+        user = User.objects.create_user('b@b.com', 'Password0978')
+        self.client.force_authenticate(user)
+        res = self.client.get(self.STATUS_URL)
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+    @override_settings(AUTHY_DISPATCH_MODE='sync')
+    @mock.patch('users.dispatch.get_authy_client')
+    def test_sync_signup_failed(self, get_authy_client):
+        """Test a failed `sync` call is not left for a worker to resend."""
+        phones = get_authy_client.return_value.phones
+        phones.verification_start.side_effect = ConnectionError('timed out')
+        res = self.client.post(self.SIGNUP_URL, VENDOR_PAYLOAD)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        dispatch = PhoneVerificationDispatch.objects.get()
+        self.assertEqual(dispatch.status,
+            PhoneVerificationDispatch.STATUS_FAILED)
+        self.assertEqual(dispatch.last_error, 'timed out')
+
+
+@override_settings(AUTHY_DISPATCH_MAX_ATTEMPTS=2, AUTHY_DISPATCH_RETRY_DELAY=0)
+class DispatchWorkerTests(TestCase):
+    """Test the `dispatch_phone_verifications` command."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('a@a.com', 'Password0978',
+                        phone_number='+48123456789')
+        self.dispatch = PhoneVerificationDispatch.objects.create(
+            user=self.user, phone_number=self.user.phone_number)
+
+    def test_drain_sent(self):
+        """Test a successful Authy call marks the dispatch as sent."""
+        authy_api = fake_authy_client()
+        with mock.patch('users.dispatch.get_authy_client',
+                return_value=authy_api):
+            call_command('dispatch_phone_verifications', stdout=mock.Mock())
+
+        request, = authy_api.session.get_adapter(authy_api.api_uri).requests
+        self.assertIn('"phone_number": 123456789', request.body)
+        self.dispatch.refresh_from_db()
+        self.assertEqual(self.dispatch.status,
+            PhoneVerificationDispatch.STATUS_SENT)
+        self.assertEqual(self.dispatch.attempts, 1)
+
+    def test_drain_retries_then_fails(self):
+        """Test failed Authy calls are retried up to the attempts limit."""
+        authy_api = fake_authy_client(error_rate=1)
+        with mock.patch('users.dispatch.get_authy_client',
+                return_value=authy_api):
+            call_command('dispatch_phone_verifications', stdout=mock.Mock())
+
+        adapter = authy_api.session.get_adapter(authy_api.api_uri)
+        self.assertEqual(len(adapter.requests), 2)
+        self.dispatch.refresh_from_db()
+        self.assertEqual(self.dispatch.status,
+            PhoneVerificationDispatch.STATUS_FAILED)
+        self.assertIn('Service unavailable', self.dispatch.last_error)
+
+    @mock.patch('users.dispatch.get_authy_client')
+    def test_drain_network_error(self, get_authy_client):
+        """Test connection errors keep the dispatch pending for a retry."""
+        phones = get_authy_client.return_value.phones
+        phones.verification_start.side_effect = ConnectionError('timed out')
+        with self.settings(AUTHY_DISPATCH_RETRY_DELAY=60):
+            call_command('dispatch_phone_verifications', stdout=mock.Mock())
+
+        self.dispatch.refresh_from_db()
+        self.assertEqual(self.dispatch.status,
+            PhoneVerificationDispatch.STATUS_PENDING)
+        self.assertEqual(self.dispatch.attempts, 1)
+        self.assertEqual(self.dispatch.last_error, 'timed out')
+
+    def test_claimed_rows_leased(self):
+        """Test claimed dispatches are skipped until their lease runs out."""
+        self.assertEqual(claim(10), [self.dispatch])
+        self.assertEqual(claim(10), [])
+        # The worker died before recording an outcome.
+        with mock.patch('users.dispatch.timezone.now', return_value=
+                timezone.now() + timedelta(
+                    seconds=settings.AUTHY_DISPATCH_CLAIM_SECONDS + 1)):
+            self.assertEqual(claim(10), [self.dispatch])
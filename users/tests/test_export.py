@@ -0,0 +1,135 @@
+"""
+Unit tests for the streaming User exports.
+"""
+import csv
+import io
+import json
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ..models import User
+
+
+def read_ndjson(response):
+    content = b''.join(response.streaming_content).decode()
+    return [json.loads(line) for line in content.splitlines()]
+
+
+def read_csv(response):
+    content = b''.join(response.streaming_content).decode()
+    return list(csv.DictReader(io.StringIO(content)))
+
+
+class UserExportViewTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.staff = User.objects.create_user('staff@a.com', 'Password0978',
+                        is_staff=True)
+        self.vendor = User.objects.create_user('vendor@a.com', 'Password0978',
+                        user_type=User.TYPE_VENDOR,
+                        business_name='Vendor, "Ltd"')
+        self.inactive = User.objects.create_user('old@a.com', 'Password0978',
+                        is_active=False,
+                        date_joined=timezone.now() - timedelta(days=30))
+        self.client.force_authenticate(self.staff)
+
+    def url(self, extension='ndjson'):
+        return reverse('users:export', kwargs={'extension': extension})
+
+    def test_export_ndjson(self):
+        """Test every user is streamed as a JSON line."""
+        res = self.client.get(self.url())
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        rows = read_ndjson(res)
+        self.assertEqual([row['email'] for row in rows],
+            ['staff@a.com', 'vendor@a.com', 'old@a.com'])
+        self.assertNotIn('password', rows[0])
+        self.assertEqual(rows[1]['business_name'], 'Vendor, "Ltd"')
+
+    def test_export_csv(self):
+        """Test CSV exports have a header row and quoted values."""
+        res = self.client.get(self.url('csv'))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('attachment;', res['Content-Disposition'])
+        rows = read_csv(res)
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[1]['business_name'], 'Vendor, "Ltd"')
+        self.assertEqual(rows[0]['phone_number'], '')
+
+    def test_export_csv_formulas(self):
+        """Test cells read as spreadsheet formulas are escaped."""
+        User.objects.filter(pk=self.vendor.pk).update(
+            name='=HYPERLINK("http://a.com")', business_name='@SUM(A1)',
+            address='-1+1', phone_number='+48123456789')
+        res = self.client.get(self.url('csv'),
+            {'fields': 'name,business_name,address,phone_number'})
+        row = read_csv(res)[1]
+        self.assertEqual(row['name'], '\'=HYPERLINK("http://a.com")')
+        self.assertEqual(row['business_name'], "'@SUM(A1)")
+        self.assertEqual(row['address'], "'-1+1")
+        self.assertEqual(row['phone_number'], '+48123456789')
+
+    def test_export_filters(self):
+        """Test the user type, activity and date joined filters."""
+        res = self.client.get(self.url(), {'user_type': 'vendor'})
+        self.assertEqual([row['email'] for row in read_ndjson(res)],
+            ['vendor@a.com'])
+        res = self.client.get(self.url(), {'is_active': 'false'})
+        self.assertEqual([row['email'] for row in read_ndjson(res)],
+            ['old@a.com'])
+        joined = (timezone.now() - timedelta(days=1)).isoformat()
+        res = self.client.get(self.url(), {'joined_before': joined})
+        self.assertEqual([row['email'] for row in read_ndjson(res)],
+            ['old@a.com'])
+        res = self.client.get(self.url(), {'joined_after': joined})
+        self.assertEqual(len(read_ndjson(res)), 2)
+
+    def test_export_fields(self):
+        """Test `fields` selects the exported columns."""
+        res = self.client.get(self.url(), {'fields': 'email,user_type'})
+        self.assertEqual(read_ndjson(res)[1],
+            {'email': 'vendor@a.com', 'user_type': 'vendor'})
+        res = self.client.get(self.url(), {'fields': 'email,password'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_invalid_date(self):
+        res = self.client.get(self.url(), {'joined_after': 'yesterday'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_staff_only(self):
+        """Test non-staff users cannot export."""
+        self.client.force_authenticate(self.vendor)
+        res = self.client.get(self.url())
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+
+@override_settings(STATICFILES_STORAGE=
+    'django.contrib.staticfiles.storage.StaticFilesStorage')
+class UserAdminExportTests(TestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin@a.com',
+                        'Password0978')
+        User.objects.create_user('vendor@a.com', 'Password0978',
+            user_type=User.TYPE_VENDOR)
+        self.client.force_login(self.admin)
+
+    def test_export_action(self):
+        """Test the changelist action streams the selected users."""
+        vendor = User.objects.get(email='vendor@a.com')
+        res = self.client.post(reverse('admin:users_user_changelist'), {
+            'action': 'export_csv',
+            '_selected_action': [vendor.pk],
+        })
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([row['email'] for row in read_csv(res)],
+            ['vendor@a.com'])
@@ -0,0 +1,152 @@
+"""
+Unit tests for the grid index and the nearest vendors lookup.
+"""
+import math
+
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from .. import geo
+from ..models import User
+
+
+def destination(latitude, longitude, bearing, distance_km):
+    """Point `distance_km` away from the given one towards `bearing`."""
+    phi1, lambda1 = math.radians(latitude), math.radians(longitude)
+    theta = math.radians(bearing)
+    delta = distance_km / geo.EARTH_RADIUS_KM
+    phi2 = math.asin(math.sin(phi1) * math.cos(delta) +
+                     math.cos(phi1) * math.sin(delta) * math.cos(theta))
+    lambda2 = lambda1 + math.atan2(
+        math.sin(theta) * math.sin(delta) * math.cos(phi1),
+        math.cos(delta) - math.sin(phi1) * math.sin(phi2))
+    longitude2 = (math.degrees(lambda2) + 540) % 360 - 180
+    return math.degrees(phi2), longitude2
+
+
+class GridTests(SimpleTestCase):
+
+    def test_distance(self):
+        """Test the haversine distance, Paris to London is about 344 km."""
+        self.assertAlmostEqual(
+            geo.distance_km(48.8566, 2.3522, 51.5074, -0.1278), 343.5,
+            delta=1)
+
+    def test_box_covers_circle(self):
+        """Test the box holds the cells of points on the circle."""
+        for latitude, longitude in ((0, 0), (52.2, 21.0), (-33.9, 151.2),
+                                    (70.0, 179.99), (0, -179.9995),
+                                    (89.99, 10.0)):
+            ranges = geo.box_cells(latitude, longitude, 25)
+            for bearing in range(0, 360, 15):
+                point = destination(latitude, longitude, bearing, 24.9)
+                cell = geo.grid_cell(*point)
+                self.assertTrue(
+                    any(first <= cell <= last for first, last in ranges),
+                    (latitude, longitude, bearing))
+
+    def test_antimeridian(self):
+        """Test boxes crossing the antimeridian wrap to the west edge."""
+        ranges = geo.box_cells(0, 179.999, 5)
+        self.assertIn(0, [first % geo.GRID_COLUMNS for first, last in ranges])
+
+    def test_antimeridian_west(self):
+        """Test boxes crossing the antimeridian westwards keep its column."""
+        ranges = geo.box_cells(0, -179.9995, 56)
+        cell = geo.grid_cell(0, 179.498)
+        self.assertLess(geo.distance_km(0, -179.9995, 0, 179.498), 56)
+        self.assertTrue(any(first <= cell <= last for first, last in ranges))
+
+
+class NearbyVendorsViewTests(TestCase):
+
+    NEARBY_URL = reverse('users:vendor_nearby')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(
+            User.objects.create_user('customer@a.com', 'Password0978'))
+
+    def vendor(self, n, latitude, longitude, **kwargs):
+        return User.objects.create_user(f'{n}@a.com', 'Password0978',
+            user_type=User.TYPE_VENDOR, business_name=f'Vendor {n}',
+            latitude=latitude, longitude=longitude, **kwargs)
+
+    def nearby(self, **params):
+        res = self.client.get(self.NEARBY_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [vendor['business_name'] for vendor in res.data['results']]
+
+    def test_nearest_first(self):
+        """Test the k nearest vendors within the radius are returned."""
+        self.vendor(1, 52.2300, 21.0100)   # ~0.6 km
+        self.vendor(2, 52.2297, 21.0122)   # ~0.8 km
+        self.vendor(3, 52.4064, 16.9252)   # Poznan, ~280 km
+        self.vendor(4, 52.2400, 21.0500, is_active=False)
+        User.objects.create_user('5@a.com', 'Password0978',
+            latitude=52.2297, longitude=21.0012)
+        center = {'latitude': 52.2297, 'longitude': 21.0012}
+        self.assertEqual(self.nearby(**center), ['Vendor 1', 'Vendor 2'])
+        self.assertEqual(self.nearby(k=1, **center), ['Vendor 1'])
+        self.assertEqual(self.nearby(radius_km=0.7, **center), ['Vendor 1'])
+
+    def test_expanding_search(self):
+        """Test the search widens until the radius to find far vendors."""
+        self.vendor(1, 52.4064, 16.9252)
+        self.assertEqual(self.nearby(latitude=52.2297, longitude=21.0012,
+            radius_km=100), [])
+        self.assertEqual(self.nearby(latitude=52.2297, longitude=18.0,
+            radius_km=100), ['Vendor 1'])
+
+    def test_location_updates(self):
+        """Test moved vendors are found at their new location."""
+        vendor = self.vendor(1, 10.0, 10.0)
+        vendor.latitude, vendor.longitude = -10.0, -10.0
+        vendor.save(update_fields=['latitude', 'longitude'])
+        self.assertEqual(self.nearby(latitude=10, longitude=10), [])
+        self.assertEqual(self.nearby(latitude=-10, longitude=-10),
+            ['Vendor 1'])
+
+        vendor.is_active = False
+        vendor.save(update_fields=['is_active'])
+        self.assertIsNone(User.objects.get(pk=vendor.pk).geo_cell)
+        vendor.is_active = True
+        vendor.save(update_fields=['is_active'])
+        self.assertEqual(self.nearby(latitude=-10, longitude=-10),
+            ['Vendor 1'])
+
+        # `QuerySet.update()` skips `save` and leaves the cell behind.
+        User.objects.filter(pk=vendor.pk).update(is_active=False)
+        self.assertEqual(self.nearby(latitude=-10, longitude=-10), [])
+
+    def test_dense_box(self):
+        """Test the nearest vendors are exact when the box is read in part."""
+        vendors = [
+            User.objects.create(username=f'vendor{n}', email=f'{n}@a.com',
+                user_type=User.TYPE_VENDOR, latitude=52.2297 + n * 0.00013,
+                longitude=21.0012 - (n % 7) * 0.00021)
+            for n in range(60)
+        ]
+        nearest = geo.nearest_vendors(52.2302, 21.0003, k=3, radius_km=10)
+        expected = sorted(vendors, key=lambda vendor: geo.distance_km(
+            52.2302, 21.0003, vendor.latitude, vendor.longitude))[:3]
+        self.assertEqual(nearest, expected)
+        self.assertEqual([vendor.distance_km for vendor in nearest],
+            sorted(vendor.distance_km for vendor in nearest))
+
+    def test_stale_coordinates(self):
+        """Test rows whose coordinates `update()` cleared are skipped."""
+        vendor = User.objects.create(username='polar', email='p@a.com',
+            user_type=User.TYPE_VENDOR, latitude=89.99, longitude=10)
+        User.objects.filter(pk=vendor.pk).update(latitude=None, longitude=None)
+        self.assertEqual(geo.nearest_vendors(89.99, 10, k=1, radius_km=5), [])
+
+    def test_invalid_parameters(self):
+        res = self.client.get(self.NEARBY_URL, {'latitude': 91,
+            'longitude': 0})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        res = self.client.get(self.NEARBY_URL, {'latitude': 0})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,129 @@
+"""
+Unit tests for the `import_users` management command.
+"""
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from allauth.account.models import EmailAddress
+
+from ..models import User
+
+
+class ImportUsersTests(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def import_users(self, path):
+        stdout = StringIO()
+        call_command('import_users', path, workers=1, chunk_size=2,
+            stdout=stdout)
+        return stdout.getvalue()
+
+    def read_rejects(self, path):
+        with open(f'{path}.rejects.ndjson') as f:
+            return [json.loads(line) for line in f]
+
+    def test_import_csv(self):
+        """Test CSV rows are imported with their EmailAddress."""
+        path = self.write('users.csv', '\n'.join([
+            'email,password,name,user_type,country_code,phone_number,business_name',
+            'a@a.com,Password0978,Aaa,customer,,,',
+            'b@a.com,Password0978,Bbb,vendor,48,123456789,Shop',
+            'c@a.com,,Ccc,,,,',
+        ]))
+        output = self.import_users(path)
+        self.assertIn('Imported 3 user(s), rejected 0.', output)
+
+        vendor = User.objects.get(email='b@a.com')
+        self.assertEqual(vendor.user_type, User.TYPE_VENDOR)
+        self.assertEqual(str(vendor.phone_number), '+48123456789')
+        self.assertEqual(vendor.business_name, 'Shop')
+        self.assertEqual(vendor.username, 'bbb')
+        self.assertTrue(vendor.check_password('Password0978'))
+        self.assertFalse(User.objects.get(email='c@a.com').has_usable_password())
+        self.assertEqual(
+            set(EmailAddress.objects.values_list('email', 'user__email')),
+            {(e, e) for e in ('a@a.com', 'b@a.com', 'c@a.com')})
+
+    def test_import_ndjson_rejects(self):
+        """Test invalid and duplicate NDJSON rows are reported."""
+        User.objects.create_user('taken@a.com')
+        path = self.write('users.ndjson', '\n'.join([
+            json.dumps({'email': 'a@a.com'}),
+            json.dumps({'email': 'not-an-email'}),
+            json.dumps({'email': 'taken@a.com'}),
+            json.dumps({'email': 'v@a.com', 'user_type': 'vendor',
+                        'country_code': '1', 'phone_number': '123456789'}),
+            '{broken',
+            json.dumps({'email': 'a@a.com'}),
+            json.dumps({'email': 'A@a.com'}),
+        ]))
+        output = self.import_users(path)
+        self.assertIn('Imported 1 user(s), rejected 6.', output)
+
+        rejects = {r['line']: r['errors'] for r in self.read_rejects(path)}
+        self.assertEqual(set(rejects), {2, 3, 4, 5, 6, 7})
+        self.assertIn('email', rejects[2])
+        self.assertIn('already exists', rejects[3]['email'][0])
+        self.assertIn('phone_number', rejects[4])
+        self.assertIn('row', rejects[5])
+        # Also across chunks and ignoring case.
+        self.assertIn('Duplicate email', rejects[6]['email'][0])
+        self.assertIn('Duplicate email', rejects[7]['email'][0])
+
+    def test_import_is_active(self):
+        """Test `is_active` is parsed explicitly and bad values rejected."""
+        path = self.write('users.ndjson', '\n'.join([
+            json.dumps({'email': 'a@a.com', 'is_active': False}),
+            json.dumps({'email': 'b@a.com', 'is_active': 0}),
+            json.dumps({'email': 'c@a.com', 'is_active': 'No'}),
+            json.dumps({'email': 'd@a.com'}),
+            json.dumps({'email': 'e@a.com', 'is_active': 'true'}),
+            json.dumps({'email': 'f@a.com', 'is_active': ''}),
+            json.dumps({'email': 'g@a.com', 'is_active': 2}),
+            json.dumps([1, 2]),
+        ]))
+        output = self.import_users(path)
+        self.assertIn('Imported 5 user(s), rejected 3.', output)
+        self.assertEqual(
+            dict(User.objects.values_list('email', 'is_active')),
+            {'a@a.com': False, 'b@a.com': False, 'c@a.com': False,
+             'd@a.com': True, 'e@a.com': True})
+
+        rejects = {r['line']: r['errors'] for r in self.read_rejects(path)}
+        self.assertIn('is_active', rejects[6])
+        self.assertIn('is_active', rejects[7])
+        self.assertEqual(rejects[8], {'row': ['Expected a JSON object.']})
+
+    def test_import_integrity_error(self):
+        """Test a batch hitting a unique constraint is retried row by row."""
+        User.objects.create_user('taken@a.com', username='taken')
+        path = self.write('users.ndjson', '\n'.join([
+            json.dumps({'email': 'a@a.com'}),
+            json.dumps({'email': 'b@a.com'}),
+        ]))
+        # A username taken after it was allocated, as by a concurrent signup.
+        with mock.patch(
+                'users.management.commands.import_users.allocate_usernames',
+                return_value=['free', 'taken']):
+            output = self.import_users(path)
+        self.assertIn('Imported 1 user(s), rejected 1.', output)
+        self.assertTrue(User.objects.filter(email='a@a.com').exists())
+        self.assertEqual(EmailAddress.objects.count(), 1)
+        rejects = {r['line']: r['errors'] for r in self.read_rejects(path)}
+        self.assertEqual(set(rejects), {2})
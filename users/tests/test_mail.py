@@ -0,0 +1,133 @@
+"""
+Unit tests for the transactional email outbox.
+"""
+from unittest import mock
+
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from benchmarks.loadtest.smtp import SMTPSink
+
+from ..models import OutboxEmail, User
+
+
+@override_settings(EMAIL_BACKEND='users.mail.OutboxEmailBackend')
+class OutboxEmailBackendTests(TestCase):
+
+    SIGNUP_URL = reverse('users:user-list')
+    PAYLOAD = {
+        'email': 'a@a.com',
+        'password': 'Password0978',
+        're_password': 'Password0978',
+    }
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_activation_email_queued(self):
+        """Test customer signup queues the activation email."""
+        res = self.client.post(self.SIGNUP_URL, self.PAYLOAD)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        outbox_email = OutboxEmail.objects.get()
+        self.assertEqual(outbox_email.recipients, 'a@a.com')
+        self.assertEqual(outbox_email.status, OutboxEmail.STATUS_PENDING)
+        self.assertIn(b'/api/auth/users/activate/', bytes(outbox_email.message))
+
+    def test_email_rolled_back_with_user(self):
+        """Test the queued email is discarded when the signup fails."""
+        with mock.patch('djoser.signals.user_registered.send',
+                side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.client.post(self.SIGNUP_URL, self.PAYLOAD)
+        self.assertFalse(User.objects.exists())
+        self.assertFalse(OutboxEmail.objects.exists())
+
+    def test_password_reset_email_queued(self):
+        """Test password reset emails go through the outbox."""
+        User.objects.create_user('a@a.com', 'Password0978')
+        res = self.client.post(reverse('user-reset-password'),
+                {'email': 'a@a.com'})
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(OutboxEmail.objects.count(), 1)
+
+
+@override_settings(
+    EMAIL_BACKEND='users.mail.OutboxEmailBackend',
+    EMAIL_DELIVERY_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+    EMAIL_HOST_USER='',
+    EMAIL_HOST_PASSWORD='',
+    EMAIL_USE_TLS=False,
+    EMAIL_OUTBOX_MAX_ATTEMPTS=2,
+)
+class SendQueuedEmailTests(TestCase):
+    """Test the `send_queued_email` command."""
+
+    def queue(self, count):
+        for i in range(count):
+            mail.send_mail('Subject', 'Body', 'from@a.com', [f'{i}@a.com'])
+
+    def test_drain_single_connection(self):
+        """Test a batch is delivered over one SMTP connection."""
+        self.queue(5)
+        with SMTPSink() as sink:
+            with self.settings(EMAIL_HOST=sink.host, EMAIL_PORT=sink.port):
+                call_command('send_queued_email', stdout=mock.Mock())
+
+        self.assertEqual(sink.connections, 1)
+        self.assertEqual(len(sink.messages), 5)
+        self.assertEqual(sink.messages[0][1], ['0@a.com'])
+        self.assertIn(b'Subject: Subject', sink.messages[0][2])
+        self.assertEqual(
+            OutboxEmail.objects.filter(status=OutboxEmail.STATUS_SENT).count(),
+            5)
+
+    def test_drain_refused_recipient(self):
+        """Test a refused recipient does not reopen the connection."""
+        self.queue(3)
+        with SMTPSink(reject={'1@a.com'}) as sink:
+            with self.settings(EMAIL_HOST=sink.host, EMAIL_PORT=sink.port):
+                call_command('send_queued_email', stdout=mock.Mock())
+
+        self.assertEqual(sink.connections, 1)
+        self.assertEqual([m[1] for m in sink.messages],
+            [['0@a.com'], ['2@a.com']])
+        refused = OutboxEmail.objects.get(recipients='1@a.com')
+        self.assertEqual(refused.status, OutboxEmail.STATUS_PENDING)
+        self.assertEqual(refused.attempts, 1)
+
+    def test_drain_reconnects_once(self):
+        """Test a dropped connection is reopened for the rest of the batch."""
+        self.queue(4)
+        with SMTPSink(hang_up={'1@a.com'}) as sink:
+            with self.settings(EMAIL_HOST=sink.host, EMAIL_PORT=sink.port):
+                call_command('send_queued_email', stdout=mock.Mock())
+
+        self.assertEqual(sink.connections, 2)
+        self.assertEqual([m[1] for m in sink.messages],
+            [['0@a.com'], ['2@a.com'], ['3@a.com']])
+
+    def test_drain_retry_backoff(self):
+        """Test unreachable servers are retried after a delay."""
+        self.queue(1)
+        sink = SMTPSink()
+        sink.stop()
+        with self.settings(EMAIL_HOST=sink.host, EMAIL_PORT=sink.port):
+            call_command('send_queued_email', stdout=mock.Mock())
+
+        outbox_email = OutboxEmail.objects.get()
+        self.assertEqual(outbox_email.status, OutboxEmail.STATUS_PENDING)
+        self.assertEqual(outbox_email.attempts, 1)
+        self.assertTrue(outbox_email.last_error)
+
+        # A due retry that fails again reaches the attempts limit.
+        OutboxEmail.objects.update(next_attempt_at=outbox_email.created_at)
+        with self.settings(EMAIL_HOST=sink.host, EMAIL_PORT=sink.port):
+            call_command('send_queued_email', stdout=mock.Mock())
+        outbox_email.refresh_from_db()
+        self.assertEqual(outbox_email.status, OutboxEmail.STATUS_FAILED)
@@ -1,8 +1,52 @@
+from unittest import mock
+
 import pytest
 from django.conf import settings
+from django.db import IntegrityError
+from django.test import TestCase
+
+from users.models import User, allocate_username
 
 pytestmark = pytest.mark.django_db
 
 
 def test_user_get_absolute_url(user: settings.AUTH_USER_MODEL):
     assert user.get_absolute_url() == f"/users/{user.username}/"
+
+
+class UsernameAllocationTests(TestCase):
+
+    def test_username_from_name(self):
+        """Test the username is derived from the User name."""
+        user = User.objects.create_user('john@a.com', name='John Smith')
+        self.assertEqual(user.username, 'john_smith')
+
+    def test_username_collision_suffixed(self):
+        """Test a taken base name gets a random suffix."""
+        first = User.objects.create_user('john@a.com')
+        second = User.objects.create_user('john@b.com')
+        self.assertEqual(first.username, 'john')
+        self.assertTrue(second.username.startswith('john'))
+        self.assertNotEqual(first.username, second.username)
+
+    def test_allocate_single_query(self):
+        """Test candidates are resolved with one query."""
+        User.objects.create_user('john@a.com')
+        with self.assertNumQueries(1):
+            username = allocate_username(['john'])
+        self.assertNotEqual(username, 'john')
+
+    def test_concurrent_insert_retried(self):
+        """Test losing a race for a username retries with a new one."""
+        User.objects.create_user('john@a.com')
+        with mock.patch('users.models.allocate_username',
+                side_effect=['john', 'john42']):
+            user = User.objects.create_user('john@b.com')
+        self.assertEqual(user.username, 'john42')
+        self.assertTrue(User.objects.filter(email='john@b.com').exists())
+
+    def test_other_integrity_errors_raised(self):
+        """Test non-username constraint violations are not retried."""
+        User.objects.create_user('john@a.com')
+        with self.assertRaises(IntegrityError):
+            User(email='john@a.com').save()
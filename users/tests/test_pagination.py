@@ -0,0 +1,88 @@
+"""
+Unit tests for the keyset paginated User list.
+"""
+from datetime import timedelta
+
+from django.urls import reverse
+from django.utils import timezone
+from django.test import TestCase
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ..models import User
+
+
+class UserKeysetPaginationTests(TestCase):
+
+    LIST_URL = reverse('users:user-list')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.staff = User.objects.create_user('staff@a.com', 'Password0978',
+                        is_staff=True)
+        # Pairs of users share a `date_joined`, exercising the `id` tie break.
+        joined = timezone.now() - timedelta(days=1)
+        for n in range(10):
+            User.objects.create_user(f'{n}@a.com', 'Password0978',
+                date_joined=joined + timedelta(minutes=n // 2),
+                user_type=User.TYPE_VENDOR if n % 2 else User.TYPE_CUSTOMER,
+                is_active=n < 8)
+        self.client.force_authenticate(self.staff)
+
+    def expected(self, **filters):
+        return list(User.objects.filter(**filters)
+                    .order_by('-date_joined', '-id')
+                    .values_list('id', flat=True))
+
+    def walk(self, url):
+        pages = []
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            pages.append(res.data)
+            url = res.data['next']
+        return pages
+
+    def test_pages_cover_all_users_in_order(self):
+        """Test following `next` returns every user once, newest first."""
+        pages = self.walk(f'{self.LIST_URL}?page_size=3')
+        ids = [user['id'] for page in pages for user in page['results']]
+        self.assertEqual(ids, self.expected())
+        self.assertEqual(len(pages), 4)
+        self.assertIsNone(pages[0]['previous'])
+
+    def test_previous_link(self):
+        """Test `previous` returns the preceding page."""
+        pages = self.walk(f'{self.LIST_URL}?page_size=3')
+        res = self.client.get(pages[2]['previous'])
+        self.assertEqual(res.data['results'], pages[1]['results'])
+        res = self.client.get(res.data['previous'])
+        self.assertEqual(res.data['results'], pages[0]['results'])
+        self.assertIsNone(res.data['previous'])
+
+    def test_filters(self):
+        """Test the `user_type` and `is_active` filters."""
+        pages = self.walk(
+            f'{self.LIST_URL}?page_size=2&user_type=vendor&is_active=false')
+        ids = [user['id'] for page in pages for user in page['results']]
+        self.assertEqual(ids, self.expected(
+            user_type=User.TYPE_VENDOR, is_active=False))
+
+    def test_invalid_filter(self):
+        """Test invalid filter values are rejected."""
+        res = self.client.get(self.LIST_URL, {'user_type': 'admin'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        res = self.client.get(self.LIST_URL, {'is_active': 'maybe'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_invalid_cursor(self):
+        """Test a tampered cursor is answered with 404."""
+        res = self.client.get(self.LIST_URL, {'cursor': 'cD1ub3BlfDE='})
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_page_query_count(self):
+        """Test a deep page costs the same single query as the first."""
+        pages = self.walk(f'{self.LIST_URL}?page_size=3')
+        with self.assertNumQueries(1):
+            self.client.get(pages[-1]['previous'])
@@ -0,0 +1,54 @@
+"""
+Unit tests for the memoized phone number parsing.
+"""
+from django.test import SimpleTestCase
+
+from ..phone import (
+    build_phone_number,
+    clear_phone_cache,
+    lookup_phone_number,
+    phone_cache_info,
+)
+from ..serializers import PhoneSerializer
+
+
+class PhoneNumberCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        clear_phone_cache()
+        self.addCleanup(clear_phone_cache)
+
+    def test_lookup_hits(self):
+        """Test repeated lookups are served from the cache."""
+        phone_number, is_valid = lookup_phone_number('+48123456789')
+        self.assertTrue(is_valid)
+        self.assertEqual(phone_number.as_e164, '+48123456789')
+        lookup_phone_number('+48123456789')
+        info = phone_cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 1))
+
+    def test_lookup_returns_copies(self):
+        """Test changing a returned number does not alter the cache."""
+        phone_number, _ = lookup_phone_number('+48123456789')
+        phone_number.national_number = 1
+        phone_number, _ = lookup_phone_number('+48123456789')
+        self.assertEqual(phone_number.national_number, 123456789)
+
+    def test_invalid_numbers(self):
+        """Test invalid and unparsable numbers are cached as invalid."""
+        self.assertFalse(lookup_phone_number('+1123')[1])
+        self.assertFalse(lookup_phone_number('not a number')[1])
+        self.assertEqual(lookup_phone_number(''), ('', False))
+
+    def test_build_phone_number(self):
+        """Test country codes are accepted with or without `+`."""
+        self.assertEqual(build_phone_number('48', '123456789'),
+            build_phone_number('+48', '123456789'))
+        self.assertEqual(phone_cache_info().hits, 1)
+
+    def test_serializer_field(self):
+        """Test the serializer field validates through the cache."""
+        serializer = PhoneSerializer(data={'phone_number': '+1123'})
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('phone_number', serializer.errors)
+        self.assertEqual(phone_cache_info().misses, 1)
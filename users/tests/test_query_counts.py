@@ -0,0 +1,128 @@
+"""
+Query count regression tests of the `/api/auth/` endpoints.
+"""
+import os
+
+from django.contrib.auth.tokens import default_token_generator
+from django.test import TestCase, override_settings
+
+from djoser.utils import encode_uid
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from ..models import PhoneVerificationDispatch, User
+from .querycount import QueryCountMixin, Scenario
+
+
+def customer(case, n):
+    return case.make_user()
+
+
+def inactive(case, n):
+    return case.make_user(is_active=False)
+
+
+def vendor_with_dispatch(case, n):
+    user = case.make_user(user_type=User.TYPE_VENDOR)
+    PhoneVerificationDispatch.objects.create(user=user,
+        phone_number='+48600000000')
+    return user
+
+
+def staff(case, n):
+    return case.make_user(is_staff=True)
+
+
+def uid_token(user):
+    return {
+        'uid': encode_uid(user.pk),
+        'token': default_token_generator.make_token(user),
+    }
+
+
+def signup(n):
+    return {
+        'email': f'signup{n}@example.com',
+        'password': 'Password0978',
+        're_password': 'Password0978',
+    }
+
+
+@override_settings(
+    EMAIL_BACKEND='users.mail.OutboxEmailBackend',
+    AUTHY_TRANSPORT='users.authy_client.FakeAuthyAdapter',
+    AUTHY_DISPATCH_MODE='background',
+)
+class AuthQueryCountTests(QueryCountMixin, TestCase):
+    prefix = '/api/auth/'
+    budget_path = os.path.join(os.path.dirname(__file__),
+        'query_budget.json')
+    scenarios = (
+        Scenario('get', 'api-root'),
+        Scenario('get', 'users:user-list', user=staff),
+        Scenario('post', 'users:user-list', status.HTTP_201_CREATED,
+            data=lambda case, n: signup(n)),
+        Scenario('post', 'users:vendor', status.HTTP_201_CREATED,
+            data=lambda case, n: dict(signup(n), country_code='+48',
+                phone_number=str(600000000 + n))),
+        Scenario('get', 'users:changes', user=staff),
+        Scenario('get', 'users:vendor_search', user=customer,
+            data=lambda case, n: {'q': 'vendor'}),
+        Scenario('get', 'users:vendor_nearby', user=customer,
+            data=lambda case, n: {'latitude': 52.23, 'longitude': 21.01}),
+        Scenario('get', 'users:export', user=staff,
+            kwargs=lambda case, n: {'extension': 'ndjson'}),
+        Scenario('post', 'users:phone_verify', status.HTTP_204_NO_CONTENT,
+            user=customer,
+            data=lambda case, n: {'phone_number': '+48600000000'}),
+        Scenario('get', 'users:phone_verify_status',
+            user=vendor_with_dispatch),
+        Scenario('post', 'users:phone_register', status.HTTP_204_NO_CONTENT,
+            user=customer,
+            data=lambda case, n: {'phone_number': '+48600000000',
+                                  'verification_code': '1234'}),
+        Scenario('get', 'users:user-me', user=customer),
+        Scenario('patch', 'users:user-me', user=customer,
+            data=lambda case, n: {'first_name': 'Changed'}),
+        Scenario('get', 'users:user-detail', user=customer,
+            kwargs=lambda case, n: {'id': case.actor.pk}),
+        Scenario('post', 'users:user-activation', status.HTTP_204_NO_CONTENT,
+            data=lambda case, n: uid_token(inactive(case, n))),
+        Scenario('get', 'users:activate-from-email',
+            status.HTTP_204_NO_CONTENT,
+            kwargs=lambda case, n: uid_token(inactive(case, n))),
+        Scenario('post', 'users:user-resend-activation',
+            status.HTTP_204_NO_CONTENT,
+            data=lambda case, n: {'email': inactive(case, n).email}),
+        Scenario('post', 'users:user-reset-password',
+            status.HTTP_204_NO_CONTENT,
+            data=lambda case, n: {'email': customer(case, n).email}),
+        Scenario('post', 'users:user-reset-password-confirm',
+            status.HTTP_204_NO_CONTENT,
+            data=lambda case, n: dict(uid_token(customer(case, n)),
+                new_password='NewPassword0978')),
+        Scenario('post', 'users:user-reset-username',
+            status.HTTP_204_NO_CONTENT,
+            data=lambda case, n: {'email': customer(case, n).email}),
+        Scenario('post', 'users:user-reset-username-confirm',
+            status.HTTP_204_NO_CONTENT,
+            data=lambda case, n: dict(uid_token(customer(case, n)),
+                new_email=f'changed{n}@example.com')),
+        Scenario('post', 'users:user-set-password', status.HTTP_204_NO_CONTENT,
+            user=customer,
+            data=lambda case, n: {'current_password': 'Password0978',
+                                  'new_password': 'NewPassword0978'}),
+        Scenario('post', 'users:user-set-username', status.HTTP_204_NO_CONTENT,
+            user=customer,
+            data=lambda case, n: {'current_password': 'Password0978',
+                                  'new_email': f'changed{n}@example.com'}),
+        Scenario('post', 'jwt-create',
+            data=lambda case, n: {'email': customer(case, n).email,
+                                  'password': 'Password0978'}),
+        Scenario('post', 'jwt-refresh',
+            data=lambda case, n: {
+                'refresh': str(RefreshToken.for_user(customer(case, n)))}),
+        Scenario('post', 'jwt-verify',
+            data=lambda case, n: {
+                'token': str(RefreshToken.for_user(customer(case, n)))}),
+    )
@@ -0,0 +1,93 @@
+"""
+Unit tests for the vendor search.
+"""
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ..models import User
+
+
+class VendorSearchViewTests(TestCase):
+
+    SEARCH_URL = reverse('users:vendor_search')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.customer = User.objects.create_user('customer@a.com',
+                            'Password0978', business_name='Pizza Customer')
+        self.client.force_authenticate(self.customer)
+
+    def vendor(self, n, business_name, address='', **kwargs):
+        return User.objects.create_user(f'{n}@a.com', 'Password0978',
+            user_type=User.TYPE_VENDOR, business_name=business_name,
+            address=address, **kwargs)
+
+    def search(self, q, **params):
+        res = self.client.get(self.SEARCH_URL, dict(params, q=q))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def names(self, data):
+        return [vendor['business_name'] for vendor in data['results']]
+
+    def test_prefix_match(self):
+        """Test every word is matched as a prefix of the indexed words."""
+        self.vendor(1, 'Pizzeria Napoli', '1 Main Street')
+        self.vendor(2, 'Sushi Bar', '2 Main Street')
+        self.assertEqual(self.names(self.search('pizz')), ['Pizzeria Napoli'])
+        self.assertEqual(self.names(self.search('MAIN str sush')),
+            ['Sushi Bar'])
+        self.assertEqual(self.names(self.search('pizza sushi')), [])
+
+    def test_ranking(self):
+        """Test business name matches rank above address matches."""
+        self.vendor(1, 'Corner Shop', '3 Bakery Lane')
+        self.vendor(2, 'Bakery Bread', '4 High Street')
+        self.assertEqual(self.names(self.search('bakery')),
+            ['Bakery Bread', 'Corner Shop'])
+
+    def test_only_active_vendors(self):
+        """Test customers and inactive vendors are not returned."""
+        self.vendor(1, 'Pizza Closed', is_active=False)
+        self.assertEqual(self.names(self.search('pizza')), [])
+
+    def test_index_follows_changes(self):
+        """Test updates, type and activity changes and deletions are indexed."""
+        vendor = self.vendor(1, 'Old Name')
+        vendor.business_name = 'New Name'
+        vendor.save()
+        self.assertEqual(self.names(self.search('old')), [])
+        self.assertEqual(self.names(self.search('new')), ['New Name'])
+
+        User.objects.filter(pk=vendor.pk).update(
+            user_type=User.TYPE_CUSTOMER)
+        self.assertEqual(self.names(self.search('new')), [])
+        User.objects.filter(pk=vendor.pk).update(user_type=User.TYPE_VENDOR)
+        self.assertEqual(self.names(self.search('new')), ['New Name'])
+
+        vendor.is_active = False
+        vendor.save()
+        self.assertEqual(self.names(self.search('new')), [])
+
+        vendor.delete()
+        self.assertEqual(self.names(self.search('new')), [])
+
+    def test_pagination(self):
+        """Test `next` pages through equally ranked results in id order."""
+        vendors = [self.vendor(n, f'Cafe {n}') for n in range(5)]
+        data = self.search('cafe', page_size=2)
+        ids = [vendor['id'] for vendor in data['results']]
+        while data['next']:
+            res = self.client.get(data['next'])
+            data = res.data
+            ids += [vendor['id'] for vendor in data['results']]
+        self.assertEqual(ids, [vendor.pk for vendor in vendors])
+
+    def test_invalid_query(self):
+        res = self.client.get(self.SEARCH_URL, {'q': ' ?! '})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        res = self.client.get(self.SEARCH_URL, {'q': 'cafe', 'cursor': 'x'})
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
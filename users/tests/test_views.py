@@ -1,11 +1,20 @@
+import json
+from unittest import mock
+
 import pytest
 from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.core import mail
 from django.test import RequestFactory, TestCase
 from django.urls import reverse
 
+from djoser import signals
+from djoser.utils import encode_uid
+
 from rest_framework import status
 from rest_framework.test import APIClient
 
+from users.models import User
 from users.views import (
     UserRedirectView,
     UserUpdateView,
@@ -69,4 +78,31 @@ class TestUserActivationView(TestCase):
         """Test endpoint access invalid `uid` and `token` fails."""
         url = reverse('users:activate-from-email', args=(1, 1))
         res = self.client.get(url)
-        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('uid', json.loads(res.json()))
+
+    def test_activation_success(self):
+        """Test a valid link activates the User without an HTTP loopback."""
+        user = User.objects.create_user('a@a.com', 'Password0978',
+                    is_active=False)
+        url = reverse('users:activate-from-email', args=(
+            encode_uid(user.pk),
+            default_token_generator.make_token(user),
+        ))
+        handler = mock.Mock()
+        signals.user_activated.connect(handler)
+        self.addCleanup(signals.user_activated.disconnect, handler)
+
+        with mock.patch('requests.post') as post:
+            res = self.client.get(url)
+        self.assertFalse(post.called)
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        user.refresh_from_db()
+        self.assertTrue(user.is_active)
+        self.assertEqual(handler.call_args[1]['user'], user)
+        self.assertEqual(len(mail.outbox), 1)
+
+        # Using the link again is reported as a stale token.
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertIn('detail', json.loads(res.json()))
@@ -1,11 +1,16 @@
-from django.urls import include, path
+from django.urls import include, path, re_path
 
 from rest_framework.routers import DefaultRouter
 
 from .views import (
+    NearbyVendorsView,
+    PhoneVerificationStatusView,
     PhoneVerificationView,
     PhoneRegistrationView,
     SwayUserViewSet,
+    UserChangesView,
+    UserExportView,
+    VendorSearchView,
     VendorUserView,
     user_activation_view,
 )
@@ -17,9 +22,16 @@ router.register('', SwayUserViewSet)
 
 urlpatterns = [
     path('phone-verify/', PhoneVerificationView.as_view(), name='phone_verify'),
+    path('phone-verify/status/', PhoneVerificationStatusView.as_view(),
+        name='phone_verify_status'),
     path('phone-register/', PhoneRegistrationView.as_view(), name='phone_register'),
 
     path('vendor/', VendorUserView.as_view(), name='vendor'),
+    path('vendors/search/', VendorSearchView.as_view(), name='vendor_search'),
+    path('vendors/nearby/', NearbyVendorsView.as_view(), name='vendor_nearby'),
+    path('changes/', UserChangesView.as_view(), name='changes'),
+    re_path(r'^export\.(?P<extension>ndjson|csv)$', UserExportView.as_view(),
+        name='export'),
 
     path('', include(router.urls)),
     path('activate/<str:uid>/<str:token>', user_activation_view,
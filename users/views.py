@@ -1,16 +1,15 @@
 import json
 import phonenumbers
-import requests
+from datetime import datetime, time
 
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.tokens import default_token_generator
-from django.contrib.sites.shortcuts import get_current_site
+from django.db import transaction
 from django.urls import reverse
+from django.utils import dateparse, timezone
 from django.views.generic import DetailView, RedirectView, UpdateView
 
-from authy.api import AuthyApiClient
-
 from djoser import signals
 from djoser.compat import get_user_email
 from djoser.conf import settings as djoser_settings
@@ -19,42 +18,87 @@ from djoser.views import UserViewSet
 from phonenumbers.phonenumberutil import NumberParseException
 
 from rest_framework import (
+    exceptions,
     generics,
     status,
     views,
     viewsets,
     permissions,
 )
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
-from .models import User
+from . import changes, export, geo, search
+from .authy_client import get_authy_client
+from .dispatch import deliver, queue_phone_verification
+from .models import PhoneVerificationDispatch, User
+from .pagination import UserKeysetPagination
 from .serializers import (
     CreateUserSerializer,
     CreateVendorUserSerializer,
+    NearbyVendorSerializer,
+    NearbyVendorsQuerySerializer,
     PhoneSerializer,
+    PhoneVerificationDispatchSerializer,
     PhoneVerificationSerializer,
+    VendorSearchResultSerializer,
 )
 
 
-class SwayUserViewSet(UserViewSet):
+class UserFilterMixin:
+    """Filters the User queryset with the `user_type` and `is_active` params."""
+    boolean_values = {
+        'true': True, '1': True,
+        'false': False, '0': False,
+    }
+
+    def filter_users(self, queryset):
+        params = self.request.query_params
+        user_type = params.get('user_type')
+        if user_type is not None:
+            if user_type not in dict(User.USER_TYPES_CHOICES):
+                raise exceptions.ValidationError(
+                    {'user_type': [f'"{user_type}" is not a valid choice.']})
+            queryset = queryset.filter(user_type=user_type)
+        is_active = params.get('is_active')
+        if is_active is not None:
+            if is_active.lower() not in self.boolean_values:
+                raise exceptions.ValidationError(
+                    {'is_active': ['Must be a valid boolean.']})
+            queryset = queryset.filter(
+                is_active=self.boolean_values[is_active.lower()])
+        return queryset
+
+
+class SwayUserViewSet(UserFilterMixin, UserViewSet):
     """Provides the endpoints for registering and managing the User account."""
+    pagination_class = UserKeysetPagination
+
+    def get_queryset(self):
+        queryset = super(SwayUserViewSet, self).get_queryset()
+        if self.action == 'list':
+            queryset = self.filter_users(queryset)
+        return queryset
 
     def perform_create(self, serializer):
         """
         Method for executing `create` requests. Only Customers are sent with
         activation emails while Vendors require phone 2FA.
         """
-        user = serializer.save()
-        # Dispatch signal for successful User registration.
-        signals.user_registered.send(
-            sender=self.__class__,
-            user=user,
-            request=self.request
-        )
-        if djoser_settings.SEND_ACTIVATION_EMAIL and user.is_customer:
-            context = {'user': user}
-            to = [get_user_email(user)]
-            djoser_settings.EMAIL.activation(self.request, context).send(to)
+        # The activation email is queued in the outbox with the User row.
+        with transaction.atomic():
+            user = serializer.save()
+            # Dispatch signal for successful User registration.
+            signals.user_registered.send(
+                sender=self.__class__,
+                user=user,
+                request=self.request
+            )
+            if djoser_settings.SEND_ACTIVATION_EMAIL and user.is_customer:
+                context = {'user': user}
+                to = [get_user_email(user)]
+                djoser_settings.EMAIL.activation(self.request, context).send(to)
 
 
 class VendorUserView(generics.CreateAPIView):
@@ -64,11 +108,15 @@ class VendorUserView(generics.CreateAPIView):
     permission_classes = djoser_settings.PERMISSIONS.user_create
     token_generator = default_token_generator
 
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        response.data['phone_verification_status'] = self.dispatch.status
+        return response
+
     def perform_create(self, serializer):
-        user = serializer.save()
-        user.user_type = User.TYPE_VENDOR
-        user.is_active = True
-        user.save(update_fields=['user_type', 'is_active'])
+        with transaction.atomic():
+            user = serializer.save()
+            self.dispatch = queue_phone_verification(user)
         # Dispatch signal for successful User registration.
         signals.user_registered.send(
             sender=self.__class__,
@@ -76,14 +124,155 @@ class VendorUserView(generics.CreateAPIView):
             request=self.request
         )
 
-        # Verify phone number
-        authy_api = AuthyApiClient(settings.ACCOUNT_SECURITY_API_KEY)
-        authy_phone = authy_api.phones.verification_start(
-            user.phone_number.national_number,
-            user.phone_number.country_code
-        )
-        if not authy_phone.ok():
-            raise exceptions.ValidationError(authy_phone.errors())
+        # Verify phone number. In `background` mode the queued dispatch is
+        # sent by the `dispatch_phone_verifications` worker. A failed `sync`
+        # dispatch is marked failed, the client is told the signup failed.
+        if settings.AUTHY_DISPATCH_MODE == 'sync':
+            if not deliver(self.dispatch, retry=False):
+                raise exceptions.ValidationError(self.dispatch.last_error)
+
+
+class UserExportView(UserFilterMixin, views.APIView):
+    """
+    Streams Users as NDJSON or CSV for staff.
+
+    Besides `user_type` and `is_active`, rows are filtered by the
+    `joined_after` and `joined_before` dates. `fields` selects a comma
+    separated subset of `export.EXPORT_FIELDS`.
+    """
+    permission_classes = [permissions.IsAdminUser]
+    swagger_schema = None
+
+    def get_fields(self):
+        fields = self.request.query_params.get('fields')
+        if not fields:
+            return export.DEFAULT_EXPORT_FIELDS
+        fields = tuple(field.strip() for field in fields.split(','))
+        unknown = [field for field in fields
+                   if field not in export.EXPORT_FIELDS]
+        if unknown:
+            raise exceptions.ValidationError({'fields': [
+                f'Unknown fields: {", ".join(unknown)}.']})
+        return fields
+
+    def parse_date_joined(self, value):
+        """Parse an ISO 8601 datetime, dates are read as local midnight."""
+        try:
+            date_joined = dateparse.parse_datetime(value)
+            if date_joined is None:
+                date = dateparse.parse_date(value)
+                if date is None:
+                    return None
+                date_joined = datetime.combine(date, time.min)
+        except ValueError:
+            return None
+        if timezone.is_naive(date_joined):
+            date_joined = timezone.make_aware(date_joined)
+        return date_joined
+
+    def filter_date_joined(self, queryset):
+        for param, lookup in (('joined_after', 'gte'),
+                              ('joined_before', 'lt')):
+            value = self.request.query_params.get(param)
+            if value is None:
+                continue
+            date_joined = self.parse_date_joined(value)
+            if date_joined is None:
+                raise exceptions.ValidationError({param: [
+                    'Enter an ISO 8601 date or date and time.']})
+            queryset = queryset.filter(
+                **{f'date_joined__{lookup}': date_joined})
+        return queryset
+
+    def get(self, request, extension):
+        queryset = self.filter_date_joined(
+            self.filter_users(User.objects.all()))
+        return export.export_response(queryset, self.get_fields(), extension)
+
+
+class UserChangesView(views.APIView):
+    """
+    Users changed since the `cursor` of the previous poll.
+
+    Replies with the changed Users, the ids of the deleted ones, the cursor
+    to poll with next and whether more changes are waiting right away.
+    Staff follow every User, other users their own account only.
+
+    Known gap: outside PostgreSQL, a User saved in a transaction that
+    commits more than `USER_CHANGES_SETTLE_SECONDS` after the save (a long
+    import or admin bulk action) can be skipped by a cursor that already
+    moved past it, see `users.changes`.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        users = None
+        if not request.user.is_staff:
+            users = User.objects.filter(pk=request.user.pk)
+        try:
+            changed, deleted, cursor, has_more = changes.get_changes(
+                request.query_params.get('cursor'), users)
+        except changes.InvalidCursor:
+            raise exceptions.NotFound(
+                UserKeysetPagination.invalid_cursor_message)
+        serializer = djoser_settings.SERIALIZERS.user(changed, many=True,
+                        context={'request': request, 'view': self})
+        return Response({
+            'results': serializer.data,
+            'deleted': deleted,
+            'cursor': cursor,
+            'has_more': has_more,
+        })
+
+
+class VendorSearchView(views.APIView):
+    """
+    Active Vendors matching the words of `q` in their business name or
+    address, best matches first. Pages are followed with `next`.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_page_size(self):
+        try:
+            page_size = int(self.request.query_params['page_size'])
+        except (KeyError, ValueError):
+            return settings.VENDOR_SEARCH_PAGE_SIZE
+        return min(max(page_size, 1), settings.VENDOR_SEARCH_MAX_PAGE_SIZE)
+
+    def get(self, request):
+        text = request.query_params.get('q', '')
+        if not search.tokenize(text):
+            raise exceptions.ValidationError({'q': ['Enter search words.']})
+        try:
+            vendors, cursor = search.search_vendors(text,
+                self.get_page_size(), request.query_params.get('cursor'))
+        except search.InvalidCursor:
+            raise exceptions.NotFound(
+                UserKeysetPagination.invalid_cursor_message)
+        next_link = None
+        if cursor is not None:
+            next_link = replace_query_param(request.build_absolute_uri(),
+                            'cursor', cursor)
+        return Response({
+            'next': next_link,
+            'results': VendorSearchResultSerializer(vendors, many=True).data,
+        })
+
+
+class NearbyVendorsView(views.APIView):
+    """
+    The `k` active Vendors nearest to `latitude`, `longitude` within
+    `radius_km`, closest first.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        query = NearbyVendorsQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        vendors = geo.nearest_vendors(**query.validated_data)
+        return Response({
+            'results': NearbyVendorSerializer(vendors, many=True).data,
+        })
 
 
 class PhoneVerificationView(generics.GenericAPIView):
@@ -101,6 +290,20 @@ class PhoneVerificationView(generics.GenericAPIView):
         return Response(status=status.HTTP_400_BAD_REQUEST)
 
 
+class PhoneVerificationStatusView(generics.RetrieveAPIView):
+    """Returns the status of the latest phone verification of the user."""
+
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = PhoneVerificationDispatchSerializer
+
+    def get_object(self):
+        dispatch = PhoneVerificationDispatch.objects.filter(
+            user=self.request.user).first()
+        if dispatch is None:
+            raise exceptions.NotFound()
+        return dispatch
+
+
 class PhoneRegistrationView(generics.GenericAPIView):
     """Handles the Twilio phone registration.
 
@@ -121,7 +324,7 @@ class PhoneRegistrationView(generics.GenericAPIView):
 
         phone = serializer.validated_data['phone_number']
         user = self.get_object()
-        authy_api = AuthyApiClient(settings.ACCOUNT_SECURITY_API_KEY)
+        authy_api = get_authy_client()
         authy_user = authy_api.users.create(
             user.email,
             str(phone.national_number),
@@ -148,18 +351,42 @@ class PhoneRegistrationView(generics.GenericAPIView):
 class UserActivationView(views.APIView):
     """
     Custom view to handle GET request on registration User activation.
+
+    Validates `uid` and `token` with the djoser activation serializer and
+    activates the User in this request, replying with the same status and
+    JSON-encoded body as the djoser `user-activation` endpoint.
     """
-    def get (self, request, uid, token):
-        site = get_current_site(self.request)
-        domain = getattr(settings, 'DOMAIN', '') or site.domain
-        protocol = 'https://' if request.is_secure() else 'http://'
-        activation_url = reverse('user-activation')
-        activation_url = f'{protocol}{domain}{activation_url}'
-
-        post_data = {'uid': uid, 'token': token}
-        result = requests.post(activation_url, data=post_data)
-        content = json.dumps(result.text)
-        return Response(content, status=result.status_code)
+    token_generator = default_token_generator
+
+    def get(self, request, uid, token):
+        serializer = djoser_settings.SERIALIZERS.activation(
+            data={'uid': uid, 'token': token},
+            context={'request': request, 'view': self}
+        )
+        try:
+            serializer.is_valid(raise_exception=True)
+        except exceptions.APIException as exc:
+            # Mirror `rest_framework.views.exception_handler` data.
+            detail = exc.detail
+            if not isinstance(detail, (list, dict)):
+                detail = {'detail': detail}
+            content = JSONRenderer().render(detail).decode()
+            return Response(json.dumps(content), status=exc.status_code)
+
+        user = serializer.user
+        user.is_active = True
+        user.save()
+        signals.user_activated.send(
+            sender=self.__class__,
+            user=user,
+            request=self.request
+        )
+        if djoser_settings.SEND_CONFIRMATION_EMAIL:
+            context = {'user': user}
+            to = [get_user_email(user)]
+            djoser_settings.EMAIL.confirmation(self.request, context).send(to)
+
+        return Response(json.dumps(''), status=status.HTTP_204_NO_CONTENT)
 
 user_activation_view = UserActivationView.as_view()
 